@@ -1,6 +1,10 @@
-from .grid_workers import *
-from .helpers import *
-from .models import *
-from .problems import *
-from .utils import *
-from .workers import *
+from miprometheus.utils.lazy_import import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {}, subpackages=[
+    '.grid_workers',
+    '.helpers',
+    '.models',
+    '.problems',
+    '.utils',
+    '.workers'
+])
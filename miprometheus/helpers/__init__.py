@@ -1,5 +1,7 @@
-# Helpers.
-from .index_splitter import IndexSplitter
-from .problem_initializer import ProblemInitializer
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['IndexSplitter', 'ProblemInitializer']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    # Helpers.
+    'IndexSplitter': '.index_splitter',
+    'ProblemInitializer': '.problem_initializer'
+})
@@ -36,7 +36,7 @@ from miprometheus.workers import Worker
 
 class ProblemInitializer(Worker):
 
-	def __init__(self, config=None, name=None, path=None):
+	def __init__(self, config=None, name=None, path=None, processes=None):
 		"""
 		Initialize :py:class:`ProblemInitializer`, which runs the :py:func:`__init__` for a provided \
 		``Problem``, downloading and/or generating its datasets as necessary, optionally overriding some parameters.
@@ -50,6 +50,11 @@ class ProblemInitializer(Worker):
 		:param path: Path to initialize problem, overrides default data_folder if provided.
 		:type path: str
 
+		:param processes: Number of processes used to generate & preprocess the datasets, for the problems \
+		supporting it (e.g. :py:class:`COG`, :py:class:`SortOfCLEVR`), passed as their ``processes`` parameter. \
+		Overrides the config if provided.
+		:type processes: int
+
 		"""
 
 		# Call base constructor to set up app state, registry and add default params.
@@ -74,6 +79,10 @@ class ProblemInitializer(Worker):
 		if path is not None:
 			self.params.add_default_params({'problem': {'data_folder': path}})
 
+		# If the number of processes is provided, override the parallelism level of the problem.
+		if processes is not None:
+			self.params.add_config_params({'problem': {'processes': processes}})
+
 		# Pass initialization only flag.
 		self.params.add_default_params({'problem': {'initialization_only': True}})
 
@@ -139,6 +148,9 @@ if __name__ == "__main__":
 	parser.add_argument('--path', type=str,
 	help='Change from problem default path to this path when initializing')
 
+	parser.add_argument('--processes', type=int,
+	help='Number of processes used to generate & preprocess the datasets, for the problems supporting it')
+
 	# Add a command line dict parser
 	# parser.add_argument('--options', type=json.loads,
 	# help='A dictionary to initialize from, obtained directly from the command line.' +
@@ -154,4 +166,4 @@ if __name__ == "__main__":
 		print("Both a config and a problem name is provided. Please only provide one or the other.")
 		exit(1)	
 
-	ProblemInitializer(args.c, args.problem, args.path)
+	ProblemInitializer(args.c, args.problem, args.path, args.processes)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+startup_benchmark.py: times the startup of fresh interpreters importing parts of ``miprometheus`` (as done by the \
+workers, grid workers & DataLoader workers), and lists the heavy dependencies they load.
+
+Usage:
+
+    >>> python -m miprometheus.helpers.startup_benchmark --runs 10
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import sys
+import time
+import argparse
+import subprocess
+
+# statements executed by each interpreter.
+STATEMENTS = ['pass',
+              'import miprometheus',
+              'from miprometheus.utils import ParamInterface',
+              'from miprometheus.problems import ProblemFactory',
+              'from miprometheus.models import ModelFactory',
+              'from miprometheus.problems import SerialRecallCommandLines',
+              'from miprometheus.workers import OfflineTrainer',
+              'from miprometheus import *']
+
+# dependencies whose import is reported.
+HEAVY_MODULES = ['torch', 'torchvision', 'torchtext', 'tensorboardX', 'matplotlib', 'PyQt5', 'h5py', 'nltk', 'PIL']
+
+
+def benchmark(statement, runs):
+    """
+    Times the execution of ``statement`` in fresh interpreters.
+
+    :param statement: Python statement to execute.
+    :type statement: str
+
+    :param runs: Number of interpreters to start.
+    :type runs: int
+
+    :return: mean & min time of 1 run (in ms), list of the heavy modules loaded by ``statement``.
+
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+
+    # list the heavy modules loaded by the statement.
+    script = '{}\nimport sys\nprint(",".join(m for m in {} if m in sys.modules))'.format(statement, HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    modules = output.strip().splitlines()[-1] if output.strip() else ''
+
+    return sum(times) / len(times), min(times), modules
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the startup time of the miprometheus imports.')
+    parser.add_argument('--runs', type=int, default=5, help='Number of interpreters per statement (DEFAULT: 5).')
+    parser.add_argument('--statements', type=str, nargs='+', default=STATEMENTS,
+                        help='Statements to time (DEFAULT: the imports done by the workers).')
+    args = parser.parse_args()
+
+    print('{:>10} {:>10}  {:<56} {}'.format('mean [ms]', 'min [ms]', 'statement', 'heavy modules'))
+    for statement in args.statements:
+        try:
+            mean, minimum, modules = benchmark(statement, args.runs)
+            print('{:>10.1f} {:>10.1f}  {:<56} {}'.format(mean, minimum, statement, modules))
+        except subprocess.CalledProcessError:
+            print('{:>10} {:>10}  {:<56}'.format('failed', 'failed', statement))
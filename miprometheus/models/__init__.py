@@ -1,22 +1,26 @@
-# Sequential models.
-from .controllers import *
+from miprometheus.utils.lazy_import import lazy_attributes
 
-# MANN models.
-from .dnc import *
-from .dwm import *
-from .encoder_solver import *
-from .lstm import *
-from .ntm import *
-from .thalnet import *
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    # Other imports.
+    'Model': '.model',
+    'ModelFactory': '.model_factory',
+    'SequentialModel': '.sequential_model'
+}, subpackages=[
+    # Sequential models.
+    '.controllers',
 
-# VQA models.
-from .mac import *
-from .s_mac import *
-from .relational_net import *
-from .vision import *
-from .vqa_baselines import *
+    # MANN models.
+    '.dnc',
+    '.dwm',
+    '.encoder_solver',
+    '.lstm',
+    '.ntm',
+    '.thalnet',
 
-# Other imports.
-from .model import Model
-from .model_factory import ModelFactory
-from .sequential_model import SequentialModel
+    # VQA models.
+    '.mac',
+    '.s_mac',
+    '.relational_net',
+    '.vision',
+    '.vqa_baselines'
+])
@@ -1,18 +1,14 @@
-from .controller_factory import ControllerFactory
-from .feedforward_controller import FeedforwardController
-from .ffgru_controller import FFGRUStateTuple, FFGRUController
-from .gru_controller import GRUStateTuple, GRUController
-from .lstm_controller import LSTMStateTuple, LSTMController
-from .rnn_controller import RNNStateTuple, RNNController
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'ControllerFactory',
-    'FeedforwardController',
-    'FFGRUStateTuple',
-    'FFGRUController',
-    'GRUStateTuple',
-    'GRUController',
-    'LSTMStateTuple',
-    'LSTMController',
-    'RNNStateTuple',
-    'RNNController']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ControllerFactory': '.controller_factory',
+    'FeedforwardController': '.feedforward_controller',
+    'FFGRUStateTuple': '.ffgru_controller',
+    'FFGRUController': '.ffgru_controller',
+    'GRUStateTuple': '.gru_controller',
+    'GRUController': '.gru_controller',
+    'LSTMStateTuple': '.lstm_controller',
+    'LSTMController': '.lstm_controller',
+    'RNNStateTuple': '.rnn_controller',
+    'RNNController': '.rnn_controller'
+})
@@ -1,29 +1,21 @@
-from .control_and_params import ControlParams
-from .dnc_cell import NTMCellStateTuple, DNCCell
-from .dnc_model import DNC
-from .interface import InterfaceStateTuple, Interface
-from .memory import Memory
-from .memory_usage import MemoryUsage
-from .param_gen import Param_Generator
-from .plot_data import plot_memory_attention, plot_memory
-from .temporal_linkage import TemporalLinkageState, TemporalLinkage
-from .tensor_utils import normalize, sim, outer_prod, circular_conv
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'ControlParams',
-    'NTMCellStateTuple',
-    'DNCCell',
-    'DNC',
-    'InterfaceStateTuple',
-    'Interface',
-    'Memory',
-    'MemoryUsage',
-    'Param_Generator',
-    'plot_memory_attention',
-    'plot_memory',
-    'TemporalLinkageState',
-    'TemporalLinkage',
-    'normalize',
-    'sim',
-    'outer_prod',
-    'circular_conv']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ControlParams': '.control_and_params',
+    'NTMCellStateTuple': '.dnc_cell',
+    'DNCCell': '.dnc_cell',
+    'DNC': '.dnc_model',
+    'InterfaceStateTuple': '.interface',
+    'Interface': '.interface',
+    'Memory': '.memory',
+    'MemoryUsage': '.memory_usage',
+    'Param_Generator': '.param_gen',
+    'plot_memory_attention': '.plot_data',
+    'plot_memory': '.plot_data',
+    'TemporalLinkageState': '.temporal_linkage',
+    'TemporalLinkage': '.temporal_linkage',
+    'normalize': '.tensor_utils',
+    'sim': '.tensor_utils',
+    'outer_prod': '.tensor_utils',
+    'circular_conv': '.tensor_utils'
+})
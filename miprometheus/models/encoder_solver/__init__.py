@@ -1,20 +1,15 @@
-from .es_lstm_model import EncoderSolverLSTM
-from .es_ntm_model import EncoderSolverNTM
-from .mae_cell import MAECellStateTuple, MAECell
-from .mae_interface import MAEInterfaceStateTuple, MAEInterface
-from .maes_model import MAES
-from .mas_cell import MASCellStateTuple, MASCell
-from .mas_interface import MASInterfaceStateTuple, MASInterface
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'EncoderSolverLSTM',
-    'EncoderSolverNTM',
-    'MAECellStateTuple',
-    'MAECell',
-    'MAEInterfaceStateTuple',
-    'MAEInterface',
-    'MAES',
-    'MASCellStateTuple',
-    'MASCell',
-    'MASInterfaceStateTuple',
-    'MASInterface']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'EncoderSolverLSTM': '.es_lstm_model',
+    'EncoderSolverNTM': '.es_ntm_model',
+    'MAECellStateTuple': '.mae_cell',
+    'MAECell': '.mae_cell',
+    'MAEInterfaceStateTuple': '.mae_interface',
+    'MAEInterface': '.mae_interface',
+    'MAES': '.maes_model',
+    'MASCellStateTuple': '.mas_cell',
+    'MASCell': '.mas_cell',
+    'MASInterfaceStateTuple': '.mas_interface',
+    'MASInterface': '.mas_interface'
+})
@@ -1,3 +1,5 @@
-from .lstm_model import LSTM
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['LSTM']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'LSTM': '.lstm_model'
+})
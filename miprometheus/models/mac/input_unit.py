@@ -45,6 +45,7 @@ the reference paper.
 """
 __author__ = "Vincent Marois"
 import torch
+from collections import OrderedDict
 from torch.nn import Module
 
 from miprometheus.models.mac.utils_mac import linear
@@ -56,7 +57,7 @@ class InputUnit(Module):
     Implementation of the ``InputUnit`` of the MAC network.
     """
 
-    def __init__(self, dim, embedded_dim):
+    def __init__(self, dim, embedded_dim, image_cache_size=0):
         """
         Constructor for the ``InputUnit``.
 
@@ -66,6 +67,10 @@ class InputUnit(Module):
         :param embedded_dim: dimension of the word embeddings.
         :type embedded_dim: int
 
+        :param image_cache_size: maximum number of image encodings kept in the (LRU) cache used in inference \
+        mode, 0 to disable it. Default: 0.
+        :type image_cache_size: int
+
         """
 
         # call base constructor
@@ -87,25 +92,33 @@ class InputUnit(Module):
         # TODO: linear(2*self.dim, self.dim, bias=True) ?
         self.lstm_proj = torch.nn.Linear(2 * self.dim, self.dim)
 
-    def forward(self, questions, questions_len, feature_maps):
+        # LRU cache of the image encodings (feature maps & kb_proj), indexed by image (e.g. image filename).
+        self.image_cache_size = image_cache_size
+        self.image_cache = OrderedDict()
+
+    def train(self, mode=True):
         """
-        Forward pass of the ``InputUnit``.
+        Sets the module in training (or evaluation) mode. The weights will change: empties the image cache.
 
-        :param questions: tensor of the questions words, shape [batch_size x maxQuestionLength x embedded_dim].
-        :type questions: torch.tensor
+        :param mode: whether to set training mode (``True``) or evaluation mode (``False``).
+        :type mode: bool
 
-        :param questions_len: Unpadded questions length.
-        :type questions_len: list
+        """
+        if mode:
+            self.image_cache.clear()
+        return super(InputUnit, self).train(mode)
+
+    def encode_images(self, feature_maps):
+        """
+        Encodes the images: 2-layers CNN & linear projection of the knowledge base.
 
         :param feature_maps: [batch_size x nb_kernels x feat_H x feat_W] coming from `ResNet101`.
         :type feature_maps: torch.tensor
 
         :return:
 
-            - question encodings: [batch_size x 2*dim] (torch.tensor),
-            - word encodings: [batch_size x maxQuestionLength x dim] (torch.tensor),
-            - images_encodings: [batch_size x nb_kernels x (H*W)] (torch.tensor).
-
+            - images_encodings: [batch_size x nb_kernels x (H*W)] (torch.tensor),
+            - kb_proj: [batch_size x dim x (H*W)] (torch.tensor).
 
         """
         batch_size = feature_maps.shape[0]
@@ -120,6 +133,92 @@ class InputUnit(Module):
         kb_proj = self.kb_proj_layer(
             feature_maps.permute(0, 2, 1)).permute(0, 2, 1)
 
+        return feature_maps, kb_proj
+
+    def encode_images_cached(self, feature_maps, image_indices):
+        """
+        Encodes the images using the LRU image cache: the images of the batch which are not in the cache are \
+        encoded once (even if several questions of the batch are about the same image), and added to the cache.
+
+        :param feature_maps: [batch_size x nb_kernels x feat_H x feat_W] coming from `ResNet101`.
+        :type feature_maps: torch.tensor
+
+        :param image_indices: indices of the images of the batch (e.g. image filenames).
+        :type image_indices: list
+
+        :return: images_encodings & kb_proj, cf :py:func:`encode_images`.
+
+        """
+        # encode the (unique) images which are not in the cache.
+        missing = OrderedDict()
+        for i, image_index in enumerate(image_indices):
+            if image_index not in self.image_cache and image_index not in missing:
+                missing[image_index] = i
+
+        if missing:
+            encodings, projections = self.encode_images(feature_maps[list(missing.values())])
+            for j, image_index in enumerate(missing.keys()):
+                self.image_cache[image_index] = (encodings[j].clone(), projections[j].clone())
+
+        # gather the encodings of the batch, marking them as recently used.
+        for image_index in image_indices:
+            self.image_cache.move_to_end(image_index)
+        encodings = torch.stack([self.image_cache[image_index][0] for image_index in image_indices])
+        projections = torch.stack([self.image_cache[image_index][1] for image_index in image_indices])
+
+        # evict the least recently used encodings.
+        while len(self.image_cache) > max(self.image_cache_size, len(missing)):
+            self.image_cache.popitem(last=False)
+
+        return encodings, projections
+
+    def forward(self, questions, questions_len, feature_maps, image_indices=None, images_index=None):
+        """
+        Forward pass of the ``InputUnit``.
+
+        :param questions: tensor of the questions words, shape [batch_size x maxQuestionLength x embedded_dim].
+        :type questions: torch.tensor
+
+        :param questions_len: Unpadded questions length.
+        :type questions_len: list
+
+        :param feature_maps: [batch_size x nb_kernels x feat_H x feat_W] coming from `ResNet101`.
+        :type feature_maps: torch.tensor
+
+        :param image_indices: indices of the images of the batch (e.g. image filenames, which are unique across \
+        the CLEVR splits), used to index the image cache in inference mode \
+        (i.e. in evaluation mode & without autograd). Default: ``None`` (no cache).
+        :type image_indices: list
+
+        :param images_index: index of the image of each sample, when ``feature_maps`` only contains the unique \
+        images of the batch [batch_size]. Default: ``None`` (one image per sample).
+        :type images_index: torch.tensor
+
+        :return:
+
+            - question encodings: [batch_size x 2*dim] (torch.tensor),
+            - word encodings: [batch_size x maxQuestionLength x dim] (torch.tensor),
+            - images_encodings: [batch_size x nb_kernels x (H*W)] (torch.tensor).
+
+
+        """
+        batch_size = questions.shape[0]
+        if images_index is not None:
+            images_index = images_index.to(feature_maps.device)
+
+        # images processing (reusing the cached encodings in inference mode)
+        if image_indices is not None and self.image_cache_size > 0 and not self.training \
+                and not torch.is_grad_enabled():
+            # the cache is indexed per sample.
+            if images_index is not None:
+                feature_maps = feature_maps[images_index]
+            feature_maps, kb_proj = self.encode_images_cached(feature_maps, image_indices)
+        else:
+            # encode each (unique) image once.
+            feature_maps, kb_proj = self.encode_images(feature_maps)
+            if images_index is not None:
+                feature_maps, kb_proj = feature_maps[images_index], kb_proj[images_index]
+
         # avoid useless computations on padding elements: pack sequences
         embed = torch.nn.utils.rnn.pack_padded_sequence(
             questions, questions_len, batch_first=True)
@@ -51,6 +51,7 @@ from torch.nn import Module
 from miprometheus.models.mac.control_unit import ControlUnit
 from miprometheus.models.mac.read_unit import ReadUnit
 from miprometheus.models.mac.write_unit import WriteUnit
+from miprometheus.models.mac.utils_mac import StateHistory
 from miprometheus.utils.app_state import AppState
 app_state = AppState()
 
@@ -156,9 +157,10 @@ class MACUnit(Module):
             control = control * control_mask
             memory = memory * memory_mask
 
-        # start list of states
-        controls = [control]
-        memories = [memory]
+        # start the history of states (only needed by the self-attention of the write unit)
+        if self.write.self_attention:
+            controls = StateHistory(control, self.max_step)
+            memories = StateHistory(memory, self.max_step)
 
         # main loop of recurrence over the MACCell
         for i in range(self.max_step):
@@ -174,23 +176,26 @@ class MACUnit(Module):
             if self.training:
                 control = control * control_mask
 
-            # save new control state
-            controls.append(control)
-
             # read unit
-            read = self.read(memory_states=memories, knowledge_base=knowledge,
-                             ctrl_states=controls, kb_proj=kb_proj)
+            read = self.read(memory_state=memory, ctrl_state=control,
+                             knowledge_base=knowledge, kb_proj=kb_proj)
 
             # write unit
-            memory = self.write(memory_states=memories,
-                                read_vector=read, ctrl_states=controls)
+            if self.write.self_attention:
+                memory = self.write(memory_state=memory, read_vector=read, ctrl_state=control,
+                                    memory_history=memories.states(), ctrl_history=controls.states())
+                # save new control state
+                controls.append(control)
+            else:
+                memory = self.write(memory_state=memory, read_vector=read, ctrl_state=control)
 
             # apply variational dropout
             if self.training:
                 memory = memory * memory_mask
 
             # save new memory state
-            memories.append(memory)
+            if self.write.self_attention:
+                memories.append(memory)
 
             # store attention weights for visualization
             if app_state.visualize:
@@ -67,6 +67,8 @@ class MACNetwork(Model):
     Implementation of the entire ``MAC`` network.
     """
 
+    supports_unique_images = True
+
     def __init__(self, params, problem_default_values_={}):
         """
         Constructor for the ``MAC`` network.
@@ -89,6 +91,10 @@ class MACNetwork(Model):
         self.memory_gate = params['memory_gate']
         self.dropout = params['dropout']
 
+        # size of the LRU cache of the image encodings, used in inference mode (e.g. by the Tester).
+        params.add_default_params({'image_cache_size': 0})
+        self.image_cache_size = params['image_cache_size']
+
         try:
             self.nb_classes = problem_default_values_['nb_classes']
         except KeyError:
@@ -98,7 +104,7 @@ class MACNetwork(Model):
 
         # instantiate units
         self.input_unit = InputUnit(
-            dim=self.dim, embedded_dim=self.embed_hidden)
+            dim=self.dim, embedded_dim=self.embed_hidden, image_cache_size=self.image_cache_size)
 
         self.mac_unit = MACUnit(
             dim=self.dim,
@@ -109,6 +115,9 @@ class MACNetwork(Model):
 
         self.output_unit = OutputUnit(dim=self.dim, nb_classes=self.nb_classes)
 
+        # embed the questions when the problem emits word indices
+        self.create_embeddings(['questions'])
+
         self.data_definitions = {'images': {'size': [-1, 1024, 14, 14], 'type': [np.ndarray]},
                                  'questions': {'size': [-1, -1, -1], 'type': [torch.Tensor]},
                                  'questions_length': {'size': [-1], 'type': [list, int]},
@@ -139,12 +148,13 @@ class MACNetwork(Model):
 
         # unpack data_dict
         images = data_dict['images']
-        questions = data_dict['questions']
+        questions = self.embed(data_dict, 'questions')
         questions_length = data_dict['questions_length']
 
         # input unit
         img, kb_proj, lstm_out, h = self.input_unit(
-            questions, questions_length, images)
+            questions, questions_length, images, image_indices=data_dict.get('imgfiles'),
+            images_index=data_dict.get('images_index'))
 
         # recurrent MAC cells
         memory = self.mac_unit(lstm_out, h, img, kb_proj)
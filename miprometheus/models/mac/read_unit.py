@@ -77,50 +77,56 @@ class ReadUnit(Module):
         # linear layer to compute attention weights
         self.attn = linear(dim, 1, bias=True)
 
-    def forward(self, memory_states, knowledge_base, ctrl_states, kb_proj):
+    def forward(self, memory_state, ctrl_state, knowledge_base, kb_proj):
         """
         Forward pass of the ``ReadUnit``. Assuming 1 scalar attention weight per \
         knowledge base elements.
 
-        :param memory_states: list of all previous memory states, each of shape [batch_size x mem_dim]
-        :type memory_states: torch.tensor
+        .. note::
+
+            The attention is fused: as the ``concat_layer`` & ``attn`` layers are linear, the attention weights \
+            of the (r2) & (r3) equations are computed directly from ``kb_proj`` & ``knowledge_base``, without \
+            building the [batch_size x (H*W) x 2*dim] concatenation of the I & knowledge base elements.
+
+        :param memory_state: previous memory state, shape [batch_size x mem_dim]
+        :type memory_state: torch.tensor
+
+        :param ctrl_state: current control state, shape [batch_size x ctrl_dim].
+        :type ctrl_state: torch.tensor
 
         :param knowledge_base: image representation (output of CNN), shape [batch_size x nb_kernels x (feat_H * feat_W)]
         :type knowledge_base: torch.tensor
 
-        :param ctrl_states: All previous control state, each of shape [batch_size x ctrl_dim].
-        :type ctrl_states: list
-
+        :param kb_proj: linear projection of the knowledge base, shape [batch_size x dim x (feat_H * feat_W)]
+        :type kb_proj: torch.tensor
 
         :return: current read vector, shape [batch_size x read_dim]
 
         """
         # assume mem_dim = ctrl_dim = nb_kernels = dim
-
-        # retrieve the last memory & control state
-        memory_state = memory_states[-1]
-        ctrl_state = ctrl_states[-1]
+        dim = memory_state.shape[-1]
 
         # pass memory state through linear layer
-        memory_state = self.mem_proj_layer(memory_state).unsqueeze(2)
-        # memory_state: [batch_size x dim x 1]
+        memory_state = self.mem_proj_layer(memory_state)
+        # memory_state: [batch_size x dim]
+
+        # the attention weights are attn((W_I * I + W_kb * kb + b) * ctrl_state), with I = memory_state * kb_proj
+        # (r1 & r2 equations): fold the control state & attn layer into the weights of the concat_layer.
+        attn_ctrl = self.attn.weight * ctrl_state  # [batch_size x dim]
+        weights = torch.matmul(attn_ctrl, self.concat_layer.weight)  # [batch_size x 2*dim]
 
-        # compute I(i,h,w) elements (r1 equation)
-        # [batch_size x dim x 1] * [batch_size x dim x (H*W)] -> [batch_size x dim x (H*W)]
-        I_elements = memory_state * kb_proj
+        # [batch_size x 1 x dim] x [batch_size x dim x (H*W)] -> [batch_size x 1 x (H*W)]
+        rai = torch.bmm((memory_state * weights[:, :dim]).unsqueeze(1), kb_proj) + \
+            torch.bmm(weights[:, dim:].unsqueeze(1), knowledge_base)
 
-        # compute I' elements (r2 equation)
-        concat = self.concat_layer(
-            torch.cat([I_elements, knowledge_base],
-                      dim=1).permute(0, 2, 1))  # [batch_size x (H*W) x dim]
+        # add the biases (constant over (H*W))
+        rai = rai.squeeze(1) + (torch.matmul(attn_ctrl, self.concat_layer.bias) + self.attn.bias).unsqueeze(1)
+        # rai: [batch_size x (H*W)]
 
-        # compute attention weights
-        rai = self.attn(concat * ctrl_state.unsqueeze(1)
-                        ).squeeze(2)  # [batch_size x (H*W)]
         # This is for the time plot
         self.rvi = torch.nn.functional.softmax(rai, 1).unsqueeze(1)  # [batch_size x 1 x (H*W)]
 
         # apply attn weights on knowledge base elements & sum on (H*W)
-        read_vector = (self.rvi * knowledge_base).sum(2)  # [batch_size x dim]
+        read_vector = torch.bmm(self.rvi, knowledge_base.permute(0, 2, 1)).squeeze(1)  # [batch_size x dim]
 
         return read_vector
@@ -45,6 +45,7 @@ reference paper.
 """
 __author__ = "Vincent Marois"
 
+import torch
 from torch import nn
 
 
@@ -73,3 +74,71 @@ def linear(input_dim, output_dim, bias=True):
         linear_layer.bias.data.zero_()
 
     return linear_layer
+
+
+class StateHistory(object):
+    """
+    History of the (control or memory) states of the recurrence over the MAC cells, used by the self-attention \
+    of the ``WriteUnit``.
+
+    When the autograd is disabled (e.g. when testing), the states are written in place in a preallocated \
+    [batch_size x (max_step+1) x dim] buffer, and :py:func:`states` returns a view of this buffer.
+
+    When the autograd is enabled, in-place writes would invalidate the states saved for the backward pass: \
+    the states are kept in a list & stacked when needed.
+
+    """
+
+    def __init__(self, initial_state, max_step):
+        """
+        Constructor for the ``StateHistory``.
+
+        :param initial_state: initial state, shape [batch_size x dim]
+        :type initial_state: torch.tensor
+
+        :param max_step: maximal number of MAC cells.
+        :type max_step: int
+
+        """
+        self.in_place = not torch.is_grad_enabled()
+
+        if self.in_place:
+            batch_size, dim = initial_state.shape
+            self.buffer = initial_state.new_empty(batch_size, max_step + 1, dim)
+            self.buffer[:, 0] = initial_state
+        else:
+            self.list = [initial_state]
+
+        self.length = 1
+
+    def append(self, state):
+        """
+        Stores the next state.
+
+        :param state: next state, shape [batch_size x dim]
+        :type state: torch.tensor
+
+        """
+        if self.in_place:
+            self.buffer[:, self.length] = state
+        else:
+            self.list.append(state)
+
+        self.length += 1
+
+    def states(self, end=None):
+        """
+        Returns the stored states.
+
+        :param end: number of states to return (from the first one), all if ``None``.
+        :type end: int
+
+        :return: states, shape [batch_size x end x dim]
+
+        """
+        end = self.length if end is None else end
+
+        if self.in_place:
+            return self.buffer[:, :end]
+        else:
+            return torch.stack(self.list[:end], dim=1)
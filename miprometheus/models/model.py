@@ -22,6 +22,7 @@ model.py: contains base abstract model class. All models should subclass it.
 __author__ = "Tomasz Kornuta & Vincent Marois"
 
 import torch
+import pickle
 import logging
 import numpy as np
 from torch.nn import Module
@@ -43,6 +44,11 @@ class Model(Module):
 
     """
 
+    #: Whether the model accepts batches containing only the unique images (cf. the ``unique_images`` parameter of \
+    #: :py:class:`miprometheus.problems.ImageTextToClassProblem`), i.e. maps them on the samples with \
+    #: :py:func:`gather_images`. Checked by the workers when building the model.
+    supports_unique_images = False
+
     def __init__(self, params, problem_default_values_={}):
         """
         Initializes a Model object.
@@ -150,6 +156,9 @@ class Model(Module):
         self.best_loss = np.inf
         self.best_status = "Unknown"
 
+        # Embeddings of the word indices emitted by the problem (cf. create_embeddings()).
+        self.embeddings = torch.nn.ModuleDict()
+
     def handshake_definitions(self, problem_data_definitions_):
         """
         Proceeds to the handshake between what the Problem class provides (through a ``DataDict``) and what the model\
@@ -298,6 +307,71 @@ class Model(Module):
         """
         pass
 
+    def create_embeddings(self, keys):
+        """
+        Creates the embeddings of the word indices of the fields ``keys`` of the batches, when the problem emits \
+        word indices instead of embeddings (cf. the ``embed_in_model`` parameter of e.g. ``CLEVR``).
+
+        Each embedding is initialized with the weights pickled by the problem, whose path is given in \
+        ``params['<key>_embedding_file']`` (set through ``problem_default_values_``). The embeddings are frozen, \
+        unless the ``train_embeddings`` parameter is set.
+
+        :param keys: Keys of the fields to embed (e.g. ['questions']).
+        :type keys: list
+
+        """
+        self.params.add_default_params({'train_embeddings': False})
+
+        for key in keys:
+            filename = '{}_embedding_file'.format(key)
+            if filename not in self.params:
+                continue
+
+            self.logger.info('Embedding the {} with the weights from {}'.format(key, self.params[filename]))
+            with open(self.params[filename], 'rb') as f:
+                weights = pickle.load(f)
+            self.embeddings[key] = torch.nn.Embedding.from_pretrained(weights.float(),
+                                                                      freeze=not self.params['train_embeddings'])
+
+    def embed(self, data_dict, key):
+        """
+        Returns the field ``key`` of the batch, embedded if the problem emitted word indices.
+
+        :param data_dict: ``DataDict`` containing the batch.
+        :type data_dict: ``DataDict``
+
+        :param key: Key of the field (e.g. 'questions').
+        :type key: str
+
+        :return: [batch_size x seq_length x embedding_dim] tensor.
+
+        """
+        if key in self.embeddings:
+            return self.embeddings[key](data_dict[key])
+        return data_dict[key]
+
+    def gather_images(self, data_dict, encoded_images):
+        """
+        Maps the encodings of the images of the batch on the samples.
+
+        When the problem keeps only the unique images of the batch (cf. the ``unique_images`` parameter of \
+        :py:class:`miprometheus.problems.ImageTextToClassProblem`), ``data_dict['images_index']`` contains the \
+        index of the image of each sample: each image is encoded once & its encoding is shared by its questions.
+
+        :param data_dict: ``DataDict`` containing the batch.
+        :type data_dict: ``DataDict``
+
+        :param encoded_images: Encodings of the images of the batch [nb_images x ...].
+        :type encoded_images: ``torch.tensor``
+
+        :return: Encodings of the images of the samples [batch_size x ...].
+
+        """
+        images_index = data_dict.get('images_index')
+        if images_index is None:
+            return encoded_images
+        return encoded_images[images_index.to(encoded_images.device)]
+
     @abstractmethod
     def plot(self, data_dict, predictions, sample=0):
         """
@@ -23,9 +23,9 @@ __author__ = "Tomasz Kornuta & Vincent Marois"
 
 import os.path
 import logging
-import inspect
 
 from miprometheus import models
+from miprometheus.utils import registry
 
 
 class ModelFactory(object):
@@ -44,7 +44,9 @@ class ModelFactory(object):
 
         ..note::
 
-            ``params`` should contains the exact (case-sensitive) class name of the model to instantiate.
+            ``params`` should contains the exact (case-sensitive) class name of the model to instantiate: either \
+            the name of a model of the models package, of a model registered by another package (through an entry \
+            point of the ``miprometheus.models`` group), or its import path (cf. :py:mod:`miprometheus.utils.registry`).
 
         :param problem_default_values_: Default (hardcoded) values coming from a Problem class. Can be used to pass \
         values such as a number of classes, an embedding dimension etc.
@@ -65,21 +67,15 @@ class ModelFactory(object):
         # Get the class name.
         name = os.path.basename(params['name'])
 
-        # Verify that the specified class is in the models package.
-        if name not in dir(models):
-            logger.error("Could not find the specified class '{}' in the models package.".format(name))
+        # Get the actual class, importing only its module.
+        model_class = registry.resolve(name, models, registry.MODELS_GROUP)
+        if model_class is None:
+            logger.error("Could not find the specified class '{}' in the models package or in the registered "
+                         "models.".format(name))
             exit(-1)
 
-        # Get the actual class.
-        model_class = getattr(models, name)
-
         # Check if class is derived (even indirectly) from Model.
-        inherits = False
-        for c in inspect.getmro(model_class):
-            if c.__name__ == models.Model.__name__:
-                inherits = True
-                break
-        if not inherits:
+        if not (isinstance(model_class, type) and issubclass(model_class, models.Model)):
             logger.error("The specified class '{}' is not derived from the Model class".format(name))
             exit(-1)
 
@@ -1,6 +1,10 @@
-from .ntm_cell import NTMCellStateTuple, NTMCell
-from .ntm_interface import HeadStateTuple, InterfaceStateTuple, NTMInterface
-from .ntm_model import NTM
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['NTMCellStateTuple', 'NTMCell', 'HeadStateTuple',
-           'InterfaceStateTuple', 'NTMInterface', 'NTM']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'NTMCellStateTuple': '.ntm_cell',
+    'NTMCell': '.ntm_cell',
+    'HeadStateTuple': '.ntm_interface',
+    'InterfaceStateTuple': '.ntm_interface',
+    'NTMInterface': '.ntm_interface',
+    'NTM': '.ntm_model'
+})
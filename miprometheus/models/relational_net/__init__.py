@@ -1,6 +1,8 @@
-from .conv_input_model import ConvInputModel
-from .functions import PairwiseRelationNetwork, SumOfPairsAnalysisNetwork
-from .relational_network import RelationalNetwork
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['ConvInputModel', 'PairwiseRelationNetwork',
-           'SumOfPairsAnalysisNetwork', 'RelationalNetwork']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ConvInputModel': '.conv_input_model',
+    'PairwiseRelationNetwork': '.functions',
+    'SumOfPairsAnalysisNetwork': '.functions',
+    'RelationalNetwork': '.relational_network'
+})
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+benchmark.py: times the forward & backward passes of the :py:class:`RelationalNetwork` over the batch sizes of \
+the ``SortOfCLEVR`` problem, for the explicit & decomposed pairs (and blocks of pairs).
+
+Usage:
+
+    >>> python -m miprometheus.models.relational_net.benchmark --batch_sizes 16 32 64 --chunk_sizes 0 4
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import time
+import argparse
+import torch
+
+from miprometheus.utils.app_state import AppState
+from miprometheus.utils.param_interface import ParamInterface
+from miprometheus.utils.data_dict import DataDict
+from miprometheus.models.relational_net.relational_network import RelationalNetwork
+
+
+def benchmark(batch_size, img_size, decomposed_pairs, pairs_chunk_size, iterations):
+    """
+    Times the forward & backward passes of a :py:class:`RelationalNetwork` on random ``SortOfCLEVR`` batches.
+
+    :param batch_size: size of the batches.
+    :type batch_size: int
+
+    :param img_size: size of the (square) images.
+    :type img_size: int
+
+    :param decomposed_pairs: whether to use the decomposed pairs.
+    :type decomposed_pairs: bool
+
+    :param pairs_chunk_size: number of objects per block of pairs (0: all).
+    :type pairs_chunk_size: int
+
+    :param iterations: number of timed iterations (after 1 warm-up iteration).
+    :type iterations: int
+
+    :return: mean time of 1 iteration (in ms), peak memory on GPU (in MB, 0 on CPU).
+
+    """
+    app_state = AppState()
+    # default values of the SortOfCLEVR problem.
+    default_values = {'height': img_size, 'width': img_size, 'num_channels': 3,
+                      'num_classes': 10, 'question_size': 13}
+
+    params = ParamInterface()
+    params.add_config_params({'decomposed_pairs': decomposed_pairs, 'pairs_chunk_size': pairs_chunk_size})
+    model = RelationalNetwork(params, default_values)
+    if app_state.use_CUDA:
+        model.cuda()
+
+    data_dict = DataDict({'images': torch.rand(batch_size, 3, img_size, img_size).type(app_state.dtype),
+                          'questions': torch.rand(batch_size, 13).type(app_state.dtype),
+                          'targets': torch.randint(10, (batch_size,)).type(app_state.LongTensor)})
+
+    if app_state.use_CUDA:
+        torch.cuda.reset_peak_memory_stats()
+
+    for i in range(iterations + 1):
+        # do not time the warm-up iteration.
+        if i == 1:
+            if app_state.use_CUDA:
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+
+        logits = model(data_dict)
+        loss = torch.nn.functional.cross_entropy(logits, data_dict['targets'])
+        model.zero_grad()
+        loss.backward()
+
+    if app_state.use_CUDA:
+        torch.cuda.synchronize()
+    elapsed = (time.perf_counter() - start) / iterations * 1000
+
+    memory = torch.cuda.max_memory_allocated() / 2 ** 20 if app_state.use_CUDA else 0
+    return elapsed, memory
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the RelationalNetwork on SortOfCLEVR batches.')
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[16, 32, 64, 128],
+                        help='Batch sizes (DEFAULT: 16 32 64 128).')
+    parser.add_argument('--img_size', type=int, default=128, help='Size of the images (DEFAULT: 128).')
+    parser.add_argument('--chunk_sizes', type=int, nargs='+', default=[0],
+                        help='Sizes of the blocks of pairs of the decomposed pairs (DEFAULT: 0).')
+    parser.add_argument('--iterations', type=int, default=10, help='Number of timed iterations (DEFAULT: 10).')
+    parser.add_argument('--gpu', action='store_true', help='Run on GPU.')
+    args = parser.parse_args()
+
+    app_state = AppState()
+    if args.gpu:
+        app_state.convert_cuda_types()
+
+    modes = [('explicit', False, 0)] + [('decomposed/{}'.format(c), True, c) for c in args.chunk_sizes]
+
+    print('{:>10} {:>16} {:>12} {:>12}'.format('batch_size', 'pairs', 'time [ms]', 'memory [MB]'))
+    for batch_size in args.batch_sizes:
+        for name, decomposed_pairs, chunk_size in modes:
+            try:
+                elapsed, memory = benchmark(batch_size, args.img_size, decomposed_pairs, chunk_size, args.iterations)
+                print('{:>10} {:>16} {:>12.2f} {:>12.1f}'.format(batch_size, name, elapsed, memory))
+            except RuntimeError as e:
+                # most likely out of memory.
+                print('{:>10} {:>16} {:>12} {:>12}'.format(batch_size, name, 'failed', str(e).split('\n')[0][:12]))
@@ -69,6 +69,17 @@ class PairwiseRelationNetwork(Module):
         x = self.g_fc1(inputs)
         x = torch.nn.functional.relu(x)
 
+        return self.hidden_layers(x)
+
+    def hidden_layers(self, x):
+        """
+        Passes the (activated) outputs of the first layer through the remaining layers of the g_theta MLP.
+
+        :param x: tensor of shape [..., 256].
+
+        :return: tensor of shape [..., 256].
+
+        """
         x = self.g_fc2(x)
         x = torch.nn.functional.relu(x)
 
@@ -80,6 +91,53 @@ class PairwiseRelationNetwork(Module):
 
         return x
 
+    def sum_of_pairs(self, objects, questions, chunk_size=0):
+        """
+        Decomposed forward pass of the g_theta MLP, summed over all pairs of objects.
+
+        As the first layer is linear, its output for the pair (o_i, o_j) cat with the question q is \
+        W_1 o_i + W_2 o_j + W_q q + b: each object & the question are projected once, and the projections are \
+        combined by broadcast-add instead of concatenating repeated copies of the objects. \
+        The memory used is O(batch_size x d ** 4 x 256) instead of O(batch_size x d ** 4 x input_size), and can \
+        be reduced further by summing over blocks of ``chunk_size`` objects.
+
+        .. note::
+
+            The pairs (o_i, o_j) are ordered as in :py:func:`RelationalNetwork.forward` (i.e. the first object \
+            iterates over the last dimension) and the weights of ``g_fc1`` are shared with :py:func:`forward`.
+
+        :param objects: tensor of shape [batch_size, num_objects, object_size].
+
+        :param questions: tensor of shape [batch_size, question_size].
+
+        :param chunk_size: number of (second) objects per block of pairs, 0 to process all pairs at once.
+        :type chunk_size: int
+
+        :return: tensor of shape [batch_size, 256], sum of the outputs of g_theta over all pairs.
+
+        """
+        object_size = objects.shape[-1]
+        num_objects = objects.shape[1]
+
+        # split the weights of the first layer: [W_1 | W_2 | W_q].
+        w_1 = self.g_fc1.weight[:, :object_size]
+        w_2 = self.g_fc1.weight[:, object_size:2 * object_size]
+        w_q = self.g_fc1.weight[:, 2 * object_size:]
+
+        # project each object & the question once.
+        proj_i = torch.matmul(objects, w_1.t())  # [batch_size x num_objects x 256]
+        # [batch_size x num_objects x 256]
+        proj_j = torch.matmul(objects, w_2.t()) + (torch.matmul(questions, w_q.t()) + self.g_fc1.bias).unsqueeze(1)
+
+        chunk_size = chunk_size if chunk_size > 0 else num_objects
+        x_g = 0
+        for start in range(0, num_objects, chunk_size):
+            # [batch_size x chunk_size x num_objects x 256]
+            x = torch.nn.functional.relu(proj_j[:, start:start + chunk_size].unsqueeze(2) + proj_i.unsqueeze(1))
+            x_g = x_g + self.hidden_layers(x).sum(dim=(1, 2))
+
+        return x_g
+
 
 class SumOfPairsAnalysisNetwork(Module):
     """
@@ -151,3 +209,14 @@ if __name__ == '__main__':
 
     f_outputs = f_phi(g_outputs)
     print('f_outputs:', f_outputs.shape)
+
+    # compare the decomposed pass with the pairs built explicitly.
+    objects = torch.randn(batch_size, 16, 24 + 2).type(AppState().dtype)
+    questions = torch.randn(batch_size, 13).type(AppState().dtype)
+    x_i = objects.unsqueeze(1).repeat(1, 16, 1, 1)
+    x_j = torch.cat([objects, questions.unsqueeze(1).repeat(1, 16, 1)], dim=-1).unsqueeze(2).repeat(1, 1, 16, 1)
+    explicit = g_theta(torch.cat([x_i, x_j], dim=-1)).sum(dim=(1, 2))
+    for chunk_size in [0, 5]:
+        decomposed = g_theta.sum_of_pairs(objects, questions, chunk_size=chunk_size)
+        assert torch.allclose(explicit, decomposed, rtol=1e-4, atol=1e-3), 'Unit test failed!'
+    print('sum_of_pairs: OK')
@@ -54,6 +54,8 @@ class RelationalNetwork(Model):
 
     """
 
+    supports_unique_images = True
+
     def __init__(self, params, problem_default_values_={}):
         """
         Constructor.
@@ -72,6 +74,13 @@ class RelationalNetwork(Model):
 
         self.name = 'RelationalNetwork'
 
+        # decomposed: sum over the pairs by projecting the objects & question once (cf \
+        # PairwiseRelationNetwork.sum_of_pairs), pairs_chunk_size: number of objects per block of pairs (0: all).
+        self.params.add_default_params({'decomposed_pairs': True,
+                                        'pairs_chunk_size': 0})
+        self.decomposed_pairs = self.params['decomposed_pairs']
+        self.pairs_chunk_size = self.params['pairs_chunk_size']
+
         # instantiate conv input model for image encoding
         self.cnn_model = ConvInputModel()
 
@@ -96,40 +105,59 @@ class RelationalNetwork(Model):
         # instantiate network to analyse the sum of the pairs
         self.sum_network = SumOfPairsAnalysisNetwork(output_size=self.nb_classes)
 
+        # cache of the coordinate tensors, indexed by (batch_size, d, device, dtype).
+        self.coord_tensors = {}
+
         self.data_definitions = {'images': {'size': [-1, self.num_channels, self.height, self.width],
                                             'type': [torch.Tensor]},
                                  'questions': {'size': [-1, -1, -1], 'type': [torch.Tensor]},
                                  'targets': {'size': [-1, 1], 'type': [torch.Tensor]}
                                  }
 
-    def build_coord_tensor(self, batch_size, d):
+    def build_coord_tensor(self, batch_size, d, device=None, dtype=None):
         """
         Create the tensor containing the spatial relative coordinate of each \
         region (1 pixel) in the feature maps of the ``ConvInputModel``. These \
         spatial relative coordinates are used to 'tag' the regions.
 
+        The tensors are cached, indexed by (batch_size, d, device, dtype): the grid is only built once.
+
         :param batch_size: batch size
         :type batch_size: int
 
         :param d: size of 1 feature map
         :type d: int
 
-        :return: tensor of shape [batch_size x d x d x 2]
+        :param device: device of the tensor (DEFAULT: the one of ``self.app_state.dtype``).
+        :type device: torch.device
+
+        :param dtype: type of the tensor (DEFAULT: the one of ``self.app_state.dtype``).
+        :type dtype: torch.dtype
+
+        :return: tensor of shape [batch_size x 2 x d x d]
 
         """
-        coords = torch.linspace(-1 / 2., 1 / 2., d)
-        x = coords.unsqueeze(0).repeat(d, 1)
-        y = coords.unsqueeze(1).repeat(1, d)
-        ct = torch.stack((x, y)).type(self.app_state.dtype)  # [2 x d x d]
+        key = (batch_size, d, device, dtype)
+        if key not in self.coord_tensors:
+            coords = torch.linspace(-1 / 2., 1 / 2., d)
+            x = coords.unsqueeze(0).repeat(d, 1)
+            y = coords.unsqueeze(1).repeat(1, d)
+            ct = torch.stack((x, y))  # [2 x d x d]
+            if device is None or dtype is None:
+                ct = ct.type(self.app_state.dtype)
+            else:
+                ct = ct.to(device=device, dtype=dtype)
 
-        # broadcast to all batches
-        # [batch_size x 2 x d x d]
-        ct = ct.unsqueeze(0).repeat(batch_size, 1, 1, 1)
+            # broadcast to all batches (without copies)
+            # [batch_size x 2 x d x d]
+            ct = ct.unsqueeze(0).expand(batch_size, -1, -1, -1)
+
+            # indicate that we do not track gradient for this tensor
+            ct.requires_grad = False
 
-        # indicate that we do not track gradient for this tensor
-        ct.requires_grad = False
+            self.coord_tensors[key] = ct
 
-        return ct
+        return self.coord_tensors[key]
 
     def forward(self, data_dict):
         """
@@ -152,8 +180,8 @@ class RelationalNetwork(Model):
 
         question_size = questions.shape[-1]
 
-        # step 1 : encode images
-        feature_maps = self.cnn_model(images)
+        # step 1 : encode images (once per unique image of the batch)
+        feature_maps = self.gather_images(data_dict, self.cnn_model(images))
         batch_size = feature_maps.shape[0]
         # number of kernels in the final convolutional layer
         k = feature_maps.shape[1]
@@ -161,7 +189,8 @@ class RelationalNetwork(Model):
 
         # step 2: 'tag' all regions in feature_maps with their relative spatial
         # coordinates
-        ct = self.build_coord_tensor(batch_size, d)  # [batch_size x 2 x d x d]
+        # [batch_size x 2 x d x d]
+        ct = self.build_coord_tensor(batch_size, d, device=feature_maps.device, dtype=feature_maps.dtype)
         x_ct = torch.cat([feature_maps, ct], 1)  # [batch_size x (k+2) x d x d]
         # update number of channels
         k += 2
@@ -172,13 +201,20 @@ class RelationalNetwork(Model):
         x_ct = x_ct.view(batch_size, k, d**2)
         x_ct = x_ct.transpose(2, 1)  # [batch_size x (d ** 2) x k]
 
+        if self.decomposed_pairs:
+            # steps 4 & 5: sum g_theta over the pairs, without materializing them.
+            x_f = self.pair_network.sum_of_pairs(x_ct, questions, chunk_size=self.pairs_chunk_size)
+
+            # step 6: pass sum of pairs through sum_network
+            return self.sum_network(x_f)
+
         x_i = x_ct.unsqueeze(1)  # [batch_size x 1 x (d ** 2) x k]
         # [batch_size x (d ** 2) x (d ** 2) x k]
         x_i = x_i.repeat(1, (d**2), 1, 1)
 
         # step 4: add the question everywhere
-        questions = questions.unsqueeze(1).repeat(
-            1, d ** 2, 1)  # [batch_size, (d**2), question_size]
+        questions = questions.unsqueeze(1).expand(
+            -1, d ** 2, -1)  # [batch_size, (d**2), question_size]
         # [batch_size, (d**2), 1, question_size]
         questions = questions.unsqueeze(2)
 
@@ -1,7 +1,9 @@
-from .s_control_unit import ControlUnit
-from .s_mac_unit import MACUnit
-from .s_mac import sMacNetwork
-from .s_read_unit import ReadUnit
-from .s_write_unit import WriteUnit
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['ControlUnit', 'MACUnit', 'sMacNetwork', 'ReadUnit', 'WriteUnit']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ControlUnit': '.s_control_unit',
+    'MACUnit': '.s_mac_unit',
+    'sMacNetwork': '.s_mac',
+    'ReadUnit': '.s_read_unit',
+    'WriteUnit': '.s_write_unit'
+})
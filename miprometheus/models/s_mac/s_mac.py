@@ -88,6 +88,8 @@ class sMacNetwork(Model):
 
     """
 
+    supports_unique_images = True
+
     def __init__(self, params, problem_default_values_={}):
         """
         Constructor for the ``S-MAC`` network.
@@ -108,6 +110,10 @@ class sMacNetwork(Model):
         self.max_step = params['max_step']
         self.dropout = params['dropout']
 
+        # size of the LRU cache of the image encodings, used in inference mode (e.g. by the Tester).
+        params.add_default_params({'image_cache_size': 0})
+        self.image_cache_size = params['image_cache_size']
+
         try:
             self.nb_classes = problem_default_values_['nb_classes']
         except Exception as ex:
@@ -117,13 +123,17 @@ class sMacNetwork(Model):
         self.name = 'S-MAC'
 
         # instantiate units
-        self.input_unit = InputUnit(dim=self.dim, embedded_dim=self.embed_hidden)
+        self.input_unit = InputUnit(dim=self.dim, embedded_dim=self.embed_hidden,
+                                    image_cache_size=self.image_cache_size)
 
         self.mac_unit = MACUnit(dim=self.dim, max_step=self.max_step,
                                 dropout=self.dropout)
 
         self.output_unit = OutputUnit(dim=self.dim, nb_classes=self.nb_classes)
 
+        # embed the questions when the problem emits word indices
+        self.create_embeddings(['questions'])
+
         self.data_definitions = {'images': {'size': [-1, 1024, 14, 14], 'type': [np.ndarray]},
                                  'questions': {'size': [-1, -1, -1], 'type': [torch.Tensor]},
                                  'questions_length': {'size': [-1], 'type': [list, int]},
@@ -154,11 +164,13 @@ class sMacNetwork(Model):
 
         # unpack data_dict
         images = data_dict['images']
-        questions = data_dict['questions']
+        questions = self.embed(data_dict, 'questions')
         questions_length = data_dict['questions_length']
 
         # input unit: Ignore knowledge_base (feature maps) as not used at all.
-        _, kb_proj, lstm_out, h = self.input_unit(questions, questions_length, images)
+        _, kb_proj, lstm_out, h = self.input_unit(questions, questions_length, images,
+                                                  image_indices=data_dict.get('imgfiles'),
+                                                  images_index=data_dict.get('images_index'))
 
         # recurrent S-MAC cells
         memory = self.mac_unit(lstm_out, h, kb_proj)
@@ -99,6 +99,11 @@ class ReadUnit(Module):
         """
         Forward pass of the :py:class:`ReadUnit`. Assuming 1 scalar attention weight per knowledge base elements.
 
+        .. note::
+
+            The attention is fused: as the ``concat_layer`` & ``attn`` layers are linear, the attention weights \
+            are computed directly from ``kb_proj``, with a single batched product per step.
+
         :param memory_state: Memory state, shape `[batch_size x mem_dim]`.
         :type memory_state: :py:class:`torch.Tensor`
 
@@ -115,24 +120,22 @@ class ReadUnit(Module):
         """
         # assume mem_dim = ctrl_dim = nb_kernels = dim
 
-        memory_state = memory_state.unsqueeze(2)
-        # memory_state: [batch_size x dim x 1]
-
-        # compute I(i,h,w) elements (r1 equation)
-        # [batch_size x dim x 1] * [batch_size x dim x (H*W)] -> [batch_size x dim x (H*W)]
+        # the attention weights are attn((W * I + b + kb_proj) * ctrl_state), with I = memory_state * kb_proj
+        # (r1 & r2 equations): fold the control state & attn layer into the weights of the concat_layer, so that
+        # the [batch_size x (H*W) x dim] I & I' elements are never built.
+        attn_ctrl = self.attn.weight * ctrl_state  # [batch_size x dim]
+        weights = memory_state * torch.matmul(attn_ctrl, self.concat_layer.weight) + attn_ctrl  # [batch_size x dim]
 
-        I_elements = memory_state * kb_proj
-        # compute I' elements (r2 equation)
-        concat = self.concat_layer(I_elements.permute(0, 2, 1))  # [batch_size x (H*W) x dim]
-        concat = concat + kb_proj.permute(0, 2, 1)  # [batch_size x (H*W) x dim]
+        # [batch_size x 1 x dim] x [batch_size x dim x (H*W)] -> [batch_size x (H*W)]
+        rai = torch.bmm(weights.unsqueeze(1), kb_proj).squeeze(1)
 
-        # compute the attention weights
-        rai = self.attn(concat * ctrl_state.unsqueeze(1)).squeeze(2)  # [batch_size x (H*W)]
+        # add the bias (constant over (H*W))
+        rai = rai + torch.matmul(attn_ctrl, self.concat_layer.bias).unsqueeze(1)
 
         # This is for the time plot
         self.rvi = torch.nn.functional.softmax(rai, 1).unsqueeze(1)  # [batch_size x 1 x (H*W)]
 
         # apply attn weights on knowledge base elements & sum on (H*W)
-        read_vector = (self.rvi * kb_proj).sum(2)  # [batch_size x dim]
+        read_vector = torch.bmm(self.rvi, kb_proj.permute(0, 2, 1)).squeeze(1)  # [batch_size x dim]
 
         return read_vector
@@ -1,5 +1,7 @@
-from .alexnet_wrapper import AlexnetWrapper
-from .lenet5 import LeNet5
-from .simple_cnn import SimpleConvNet
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['AlexnetWrapper', 'LeNet5', 'SimpleConvNet']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'AlexnetWrapper': '.alexnet_wrapper',
+    'LeNet5': '.lenet5',
+    'SimpleConvNet': '.simple_cnn'
+})
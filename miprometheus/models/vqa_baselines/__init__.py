@@ -1,2 +1,7 @@
-from .cnn_lstm import *
-from .stacked_attention_networks import *
\ No newline at end of file
+from miprometheus.utils.lazy_import import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+}, subpackages=[
+    '.cnn_lstm',
+    '.stacked_attention_networks'
+])
@@ -1,3 +1,5 @@
-from .cnn_lstm import CNN_LSTM
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['CNN_LSTM']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'CNN_LSTM': '.cnn_lstm'
+})
@@ -71,6 +71,8 @@ class CNN_LSTM(Model):
 
     """
 
+    supports_unique_images = True
+
     def __init__(self, params, problem_default_values_={}):
         """
         Constructor of the ``CNN_LSTM`` model.
@@ -164,11 +166,11 @@ class CNN_LSTM(Model):
         """
         images = data_dict['images'].type(self.app_state.dtype)
         questions = data_dict['questions']
-        # get batch_size
-        batch_size = images.size(0)
+        # get batch_size (the images can be shared by several questions)
+        batch_size = questions.size(0)
 
         # 1. Encode the images
-        encoded_images = self.cnn(images)
+        encoded_images = self.gather_images(data_dict, self.cnn(images))
         # flatten images
         encoded_image_flattened = encoded_images.view(batch_size, -1)
 
@@ -221,7 +223,7 @@ class CNN_LSTM(Model):
         targets = data_dict['targets']
 
         # Get sample.
-        image = images[sample]
+        image = images[sample if data_dict.get('images_index') is None else data_dict['images_index'][sample]]
         target = targets[sample]
         prediction = np.argmax(predictions[sample].detach().numpy())
         question = questions[sample]
@@ -1,10 +1,9 @@
-from .stacked_attention_model import StackedAttentionNetwork
-from .stacked_attention_layer import StackedAttentionLayer, AttentionLayer
-from .image_encoding import PretrainedImageEncoding
-from .multi_hops_stacked_attention_model import MultiHopsStackedAttentionNetwork
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['StackedAttentionNetwork',
-           'StackedAttentionLayer',
-           'AttentionLayer',
-           'PretrainedImageEncoding',
-           'MultiHopsStackedAttentionNetwork']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'StackedAttentionNetwork': '.stacked_attention_model',
+    'StackedAttentionLayer': '.stacked_attention_layer',
+    'AttentionLayer': '.stacked_attention_layer',
+    'PretrainedImageEncoding': '.image_encoding',
+    'MultiHopsStackedAttentionNetwork': '.multi_hops_stacked_attention_model'
+})
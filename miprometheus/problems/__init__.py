@@ -1,9 +1,13 @@
-# Imports from the different domains.
-from .image_text_to_class import *
-from .image_to_class import *
-from .seq_to_seq import *
-from .video_to_class import *
+from miprometheus.utils.lazy_import import lazy_attributes
 
-# Other imports.
-from .problem import Problem
-from .problem_factory import ProblemFactory
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    # Other imports.
+    'Problem': '.problem',
+    'ProblemFactory': '.problem_factory'
+}, subpackages=[
+    # Imports from the different domains.
+    '.image_text_to_class',
+    '.image_to_class',
+    '.seq_to_seq',
+    '.video_to_class'
+])
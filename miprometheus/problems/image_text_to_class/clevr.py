@@ -54,6 +54,7 @@ import torch
 import numpy as np
 import os
 import csv
+import itertools
 import pickle
 from PIL import Image
 from torchvision import transforms
@@ -135,6 +136,20 @@ class CLEVR(ImageTextToClassProblem):
 
                     This is not verified in any way by this class.
 
+            - ``storage``: In the case of features extracted from the original images, how the feature maps are\
+            stored on disk: either "packed" (default: a single memory-mapped array of shape [num_images x C x H x W]\
+            & an image index map, read without copy) or "files" (one `.pt` file per image).
+            - ``half_precision``: In the case of "packed" storage, whether to store the feature maps as ``float16``\
+            (halves the size of the file). Default: ``False``.
+            - ``batch_size``: Number of images passed at once through ``cnn_model`` during the extraction.\
+            Default: 64.
+            - ``num_workers``: Number of DataLoader workers decoding & resizing the images during the extraction.\
+            Default: 4.
+            - ``shard_size``: In the case of "packed" storage, number of images per shard: an interrupted extraction\
+            is resumed from the last completed shard. Default: 1000.
+            - ``channels_last``: Whether to run ``cnn_model`` in the ``channels_last`` memory format. Default: ``False``.
+            - ``bfloat16``: Whether to run ``cnn_model`` in ``bfloat16`` when on CPU. Default: ``False``.
+
         - `questions`:
 
             - ``embedding_type``: string to indicate the pretrained embedding to use: either "random" to use\
@@ -180,6 +195,10 @@ class CLEVR(ImageTextToClassProblem):
                     `Should work for both the training & validation samples although only has been tested on validation \
                     samples so far`.
 
+            - ``embed_in_model``: Whether to emit the word indices of the questions (padded with 0) instead of their \
+            embeddings: the model then embeds them, using the weights of ``questions_embedding_file`` (set in \
+            ``default_values``). Only supported by a random ``embedding_type``. Default: ``False``.
+
 
     .. note::
 
@@ -225,6 +244,7 @@ class CLEVR(ImageTextToClassProblem):
                                  'index': {'size': [-1], 'type': [list, int]},
                                  'imgfiles': {'size': [-1, -1], 'type': [list, str]}
                                  }
+        self.add_images_index_definition()
 
         # to compute the accuracy per family
         self.categories = {
@@ -261,11 +281,25 @@ class CLEVR(ImageTextToClassProblem):
         # For the same self.set, this file is the same for CLEVR & CLEVR-Humans
         # It will be different for CLEVR-CoGenT
         if not params['images']['raw_images']:
-            if not os.path.isdir(os.path.join(self.data_folder, 'generated_files', self.cnn_model, self.set)):
+            if self.features_storage == 'packed':
+                if not os.path.isfile(self.features_filename):
+                    self.logger.warning('File {} not found on disk, extracting the features for each image and storing'
+                                        ' them in it.'.format(self.features_filename))
+                    self.generate_feature_maps_file()
+
+                # map the image numbers to the rows of the feature maps array.
+                image_indices = np.load(self.image_indices_filename)
+                self.feature_rows = np.full(image_indices.max() + 1, -1, dtype=np.int64)
+                self.feature_rows[image_indices] = np.arange(len(image_indices))
+
+            elif not os.path.isdir(os.path.join(self.data_folder, 'generated_files', self.cnn_model, self.set)):
                 self.logger.warning('Directory {} not found on disk, extracting the features for each image and storing'
                                     ' them here.'.format(os.path.join(self.data_folder, 'generated_files', self.cnn_model, self.set)))
                 self.generate_feature_maps_file()
 
+        # memory-mapped feature maps, opened lazily (i.e. once per DataLoader worker).
+        self.features = None
+
         # check if the file containing the tokenized questions (& answers, image filename, type etc.) exists or not
         questions_filename = os.path.join(self.data_folder, 'generated_files', '{}_{}_questions.pkl'.format(self.set, self.dataset))
         if os.path.isfile(questions_filename) and self.embedding_source == self.dataset:
@@ -345,22 +379,31 @@ class CLEVR(ImageTextToClassProblem):
         # create the objects for the specified embeddings
         if self.embedding_type == 'random':
             self.logger.info('Constructing random embeddings using a uniform distribution')
-            # instantiate nn.Embeddings look-up-table with specified embedding_dim
             self.n_vocab = len(self.word_dic)+1
-            self.embed_layer = torch.nn.Embedding(num_embeddings=self.n_vocab, embedding_dim=self.embedding_dim)
 
             # we have to make sure that the weights are the same during training and validation
             weights_filepath = os.path.join(self.data_folder, 'generated_files', '{}_embedding_weights.pkl'.format(self.embedding_source))
             if os.path.isfile(weights_filepath):
                 self.logger.info('Found random embedding weights on file ({}), using them.'.format(weights_filepath))
-                with open(weights_filepath, 'rb') as f:
-                    self.embed_layer.weight.data = pickle.load(f)
+                weights = None
             else:
                 self.logger.warning('No weights found on file for random embeddings. Initializing them from a Uniform '
                                     'distribution and saving to file in {}'.format(weights_filepath))
-                self.embed_layer.weight.data.uniform_(0, 1)
+                weights = torch.empty(self.n_vocab, self.embedding_dim).uniform_(0, 1)
                 with open(weights_filepath, 'wb') as f:
-                    pickle.dump(self.embed_layer.weight.data, f)
+                    pickle.dump(weights, f)
+
+            if self.embed_in_model:
+                # the model embeds the questions with the weights stored on file: no look-up-table here.
+                self.embed_layer = None
+                self.default_values['questions_embedding_file'] = weights_filepath
+            else:
+                # instantiate nn.Embeddings look-up-table with specified embedding_dim
+                self.embed_layer = torch.nn.Embedding(num_embeddings=self.n_vocab, embedding_dim=self.embedding_dim)
+                if weights is None:
+                    with open(weights_filepath, 'rb') as f:
+                        weights = pickle.load(f)
+                self.embed_layer.weight.data = weights
 
         else:
             self.logger.info('Constructing embeddings using {}'.format(self.embedding_type))
@@ -368,9 +411,43 @@ class CLEVR(ImageTextToClassProblem):
             self.language = Language('lang')
             self.questions = [q['string_question'] for q in self.data]
             # use the questions set to construct the embeddings vectors
-            self.language.build_pretrained_vocab(self.questions, vectors=self.embedding_type)
+            self.language.build_pretrained_vocab(self.questions, vectors=self.embedding_type,
+                                                 cache_folder=os.path.join(self.data_folder, 'generated_files'))
+
+        # store the questions as word indices in a flat array
+        self.pack_questions()
 
-        # Done! The actual question embedding is handled in __getitem__.
+        # emit the word indices of the questions: the model embeds them.
+        if self.embed_in_model:
+            self.data_definitions['questions'] = {'size': [-1, -1], 'type': [torch.Tensor]}
+
+        # Done! The actual question embedding is handled in collate_fn.
+
+    def pack_questions(self):
+        """
+        Stores the tokenized questions as a flat array of word indices (``self.questions_tokens``), along with \
+        the offsets of each question in it (``self.questions_offsets``), instead of one list of ints per \
+        question in ``self.data``.
+
+        Also sets the table used to embed these indices (``self.embedding_weights``): the weights of the random \
+        embedding layer, or the pretrained vectors of the vocab (``None`` if the questions are embedded by the model).
+
+        """
+        if self.embedding_type == 'random':
+            questions = [sample.pop('tokenized_question') for sample in self.data]
+            self.embedding_weights = None if self.embed_in_model else self.embed_layer.weight.data
+        else:
+            # re-tokenize the question strings with the vocab of the pretrained embedding.
+            questions = [self.language.tokenize_sentence(sample['string_question']) for sample in self.data]
+            for sample in self.data:
+                sample.pop('tokenized_question')
+            self.embedding_weights = self.language.vocab.vectors
+
+        lengths = np.array([len(question) for question in questions], dtype=np.int64)
+        self.questions_offsets = np.zeros(len(questions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.questions_offsets[1:])
+        self.questions_tokens = np.fromiter(itertools.chain.from_iterable(questions), dtype=np.int32,
+                                            count=int(self.questions_offsets[-1]))
 
     def parse_param_tree(self, params):
         """
@@ -393,7 +470,8 @@ class CLEVR(ImageTextToClassProblem):
                                    'images': {'raw_images': 'True'},
                                    'questions': {'embedding_type': 'random',
                                                  'embedding_dim': 300,
-                                                 'embedding_source': 'CLEVR'}
+                                                 'embedding_source': 'CLEVR',
+                                                 'embed_in_model': False}
                                    })
         # get the data_folder
         self.data_folder = os.path.expanduser(params['settings']['data_folder'])
@@ -442,6 +520,29 @@ class CLEVR(ImageTextToClassProblem):
             # this is too complex to check, not doing it.
             self.num_blocks = params['images']['feature_extractor']['num_blocks']
 
+            params['images']['feature_extractor'].add_default_params({'storage': 'packed',
+                                                                      'half_precision': False,
+                                                                      'batch_size': 64,
+                                                                      'num_workers': 4,
+                                                                      'shard_size': 1000,
+                                                                      'channels_last': False,
+                                                                      'bfloat16': False})
+            self.features_storage = params['images']['feature_extractor']['storage']
+            assert self.features_storage in ['packed', 'files'], "storage must be in ['packed', 'files'], " \
+                                                                 "got {}".format(self.features_storage)
+            self.features_half = params['images']['feature_extractor']['half_precision']
+            self.features_batch_size = params['images']['feature_extractor']['batch_size']
+            self.features_num_workers = params['images']['feature_extractor']['num_workers']
+            self.features_shard_size = params['images']['feature_extractor']['shard_size']
+            self.features_channels_last = params['images']['feature_extractor']['channels_last']
+            self.features_bfloat16 = params['images']['feature_extractor']['bfloat16']
+
+            # packed feature maps: single array (+ image index map) per set, next to the per-image files folder.
+            features_prefix = os.path.join(self.data_folder, 'generated_files', self.cnn_model, '{}_{}'.format(
+                'CLEVR-CoGenT' if self.dataset == 'CLEVR-CoGenT' else 'CLEVR', self.set))
+            self.features_filename = features_prefix + '_features{}.npy'.format('_fp16' if self.features_half else '')
+            self.image_indices_filename = features_prefix + '_image_indices.npy'
+
         # get the questions parameters:
         self.embedding_type = params['questions']['embedding_type']
         embedding_types = ["random", "charngram.100d", "fasttext.en.300d", "fasttext.simple.300d", "glove.42B.300d",
@@ -472,6 +573,13 @@ class CLEVR(ImageTextToClassProblem):
         else:
             self.embedding_dim = int(self.embedding_type[:-4])
 
+        # whether the questions are embedded by the model (the problem emits the word indices)
+        self.embed_in_model = params['questions']['embed_in_model']
+        if self.embed_in_model and self.embedding_type != 'random':
+            # the pretrained vocab is built from the questions of each set: the indices are not shared.
+            self.logger.warning("'embed_in_model' is only supported by random embeddings, disabling it.")
+            self.embed_in_model = False
+
     def generate_questions_dics(self, set, word_dic=None, answer_dic=None, save_to_file=True):
         """
         Loads the questions from the .json file, tokenize them, creates vocab dics and save that to files.
@@ -603,7 +711,12 @@ class CLEVR(ImageTextToClassProblem):
                                       transform=transforms.Compose([transforms.Resize([224, 224]), transforms.ToTensor(),
                                                                     transforms.Normalize(mean=[0.485, 0.456, 0.406],
                                                                                          std=[0.229, 0.224, 0.225])]),
-                                      filename_template='CLEVR_{}_{}.png'.format(self.set, '{}'))
+                                      filename_template='CLEVR_{}_{}.png'.format(self.set, '{}'),
+                                      channels_last=self.features_channels_last, bfloat16=self.features_bfloat16)
+        if self.features_storage == 'packed':
+            self.generate_packed_feature_maps(dataset)
+            return
+
         dataloader = DataLoader(dataset, batch_size=1, shuffle=False)
 
         size = len(dataloader)
@@ -627,6 +740,156 @@ class CLEVR(ImageTextToClassProblem):
 
         self.logger.warning('Features successfully extracted and stored in {}.'.format(dir))
 
+    def generate_packed_feature_maps(self, dataset):
+        """
+        Extracts the feature maps of all images by batches and writes them into a single memory-mapped array \
+        (``self.features_filename``), along with the image index map (``self.image_indices_filename``), which \
+        contains the image number corresponding to each row of the array.
+
+        The images are decoded & resized by parallel DataLoader workers, and the feature maps are written into \
+        the array by a separate thread, while the CNN model processes the next batch.
+
+        The array is split into shards of ``shard_size`` images: the completed shards are recorded in a progress \
+        file, so that an interrupted extraction is resumed by skipping them.
+
+        :param dataset: Images dataset, holding the pretrained CNN model.
+        :type dataset: :py:class:`miprometheus.utils.problems_utils.generate_feature_maps.GenerateFeatureMaps`
+
+        """
+        import tqdm
+        import queue
+        import threading
+
+        os.makedirs(os.path.dirname(self.features_filename), exist_ok=True)
+
+        # the array is written under a temporary name, so that a partial file is never used.
+        tmp_filename = self.features_filename + '.tmp'
+        progress_filename = self.features_filename + '.progress'
+
+        # get the shape of the feature maps from the first image.
+        shape = (len(dataset),) + tuple(dataset.extract(dataset[0].unsqueeze(0)).shape[1:])
+        dtype = np.float16 if self.features_half else np.float32
+
+        completed = set()
+        if os.path.isfile(tmp_filename) and os.path.isfile(progress_filename):
+            features = np.lib.format.open_memmap(tmp_filename, mode='r+')
+
+            if features.shape == shape and features.dtype == dtype:
+                with open(progress_filename, 'r') as f:
+                    completed = set(int(line) for line in f.read().split())
+                self.logger.info('Resuming the extraction: {} shards already completed.'.format(len(completed)))
+            else:
+                del features
+
+        if not completed:
+            features = np.lib.format.open_memmap(tmp_filename, mode='w+', dtype=dtype, shape=shape)
+            open(progress_filename, 'w').close()
+
+        # list the images of the shards to process.
+        num_shards = (len(dataset) + self.features_shard_size - 1) // self.features_shard_size
+        remaining = {shard: min(self.features_shard_size, len(dataset) - shard * self.features_shard_size)
+                     for shard in range(num_shards) if shard not in completed}
+        indices = [i for shard in sorted(remaining.keys())
+                   for i in range(shard * self.features_shard_size, shard * self.features_shard_size + remaining[shard])]
+
+        pbar = tqdm.tqdm(total=len(dataset), initial=len(dataset) - len(indices), unit="images")
+
+        # writer thread: copies the feature maps into the array & records the completed shards.
+        batches = queue.Queue(maxsize=4)
+        errors = []
+
+        def write():
+            try:
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+
+                    rows, output = batch
+                    # a batch may span several non-adjacent shards when resuming.
+                    if rows[-1] - rows[0] + 1 == len(rows):
+                        features[rows[0]:rows[-1] + 1] = output
+                    else:
+                        features[rows] = output
+
+                    for shard in set(row // self.features_shard_size for row in rows):
+                        remaining[shard] -= sum(1 for row in rows if row // self.features_shard_size == shard)
+
+                        if remaining[shard] == 0:
+                            features.flush()
+                            with open(progress_filename, 'a') as f:
+                                f.write('{}\n'.format(shard))
+            except Exception as e:
+                errors.append(e)
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+
+        try:
+            for rows, output in dataset.batches(indices, batch_size=self.features_batch_size,
+                                                num_workers=self.features_num_workers):
+                if errors:
+                    break
+                batches.put((rows, output))
+                pbar.update(len(rows))
+        finally:
+            batches.put(None)
+            writer.join()
+            pbar.close()
+
+        if errors:
+            raise errors[0]
+
+        features.flush()
+        del features
+
+        # GenerateFeatureMaps reads the images in the order of their number.
+        np.save(self.image_indices_filename, np.arange(len(dataset), dtype=np.int32))
+        os.replace(tmp_filename, self.features_filename)
+        os.remove(progress_filename)
+
+        self.logger.warning('Features successfully extracted and stored in {}.'.format(self.features_filename))
+
+    def open_feature_maps(self):
+        """
+        Memory-maps the packed feature maps (copy-on-write mode, so that the rows can be wrapped into tensors \
+        without copy).
+
+        """
+        self.features = np.load(self.features_filename, mmap_mode='c')
+
+    def __getstate__(self):
+        """
+        Excludes the memory-mapped feature maps from pickling (e.g. when the DataLoader workers are spawned): \
+        they are mapped again by each worker.
+
+        """
+        state = self.__dict__.copy()
+        state['features'] = None
+        return state
+
+    def load_image_file(self, index):
+        """
+        Loads the original image or the feature maps (stored as one `.pt` file per image) of the given image.
+
+        :param index: image number, filled up on 6 characters.
+        :type index: str
+
+        :return: image or feature maps as a tensor.
+
+        """
+        extension = '.png' if self.raw_image else '.pt'
+        with open(os.path.join(self.image_source, '{}_{}_{}{}'.format('CLEVR-CoGenT' if self.dataset=='CLEVR-CoGenT' else 'CLEVR',
+                                                                      self.set, index, extension)), 'rb') as f:
+            try:
+                img = torch.load(f)  # for feature maps
+                img = torch.from_numpy(img).type(torch.FloatTensor).squeeze()
+            except Exception:
+                img = Image.open(f).convert('RGB')  # for the original images
+                img = transforms.ToTensor()(img).type(torch.FloatTensor).squeeze()
+
+        return img
+
     def __getitem__(self, index):
         """
         Getter method to access the dataset and return a sample.
@@ -638,7 +901,7 @@ class CLEVR(ImageTextToClassProblem):
         'targets_string', 'index','imgfiles'}), with:
 
             - images: extracted feature maps from the raw image
-            - questions: tensor of word indexes
+            - questions: tensor of word indices
             - questions_length: len(question)
             - questions_string: original question string
             - questions_type: category of the question (query, count...)
@@ -648,34 +911,32 @@ class CLEVR(ImageTextToClassProblem):
             - imgfiles: image filename
 
         """
-        # load tokenized_question, answer, string_question, image_filename from self.data
-        question, answer, question_string, imgfile, question_type = self.data[index].values()
+        # load answer, string_question, image_filename & question type from self.data
+        sample = self.data[index]
+        answer, question_string = sample['answer'], sample['string_question']
+        imgfile, question_type = sample['imgfile'], sample['question_type']
+
+        # word indices of the question, embedded in collate_fn()
+        start, end = self.questions_offsets[index], self.questions_offsets[index + 1]
+        question = torch.from_numpy(self.questions_tokens[start:end].astype(np.int64))
 
         # create the image index to retrieve the feature maps or the original image
         index = str(imgfile.rsplit('_', 1)[1][:-4]).zfill(6)
-        extension = '.png' if self.raw_image else '.pt'
-        with open(os.path.join(self.image_source, '{}_{}_{}{}'.format('CLEVR-CoGenT' if self.dataset=='CLEVR-CoGenT' else 'CLEVR',
-                                                                      self.set, index, extension)), 'rb') as f:
-            try:
-                img = torch.load(f)  # for feature maps
-                img = torch.from_numpy(img).type(torch.FloatTensor).squeeze()
-            except Exception:
-                img = Image.open(f).convert('RGB')  # for the original images
-                img = transforms.ToTensor()(img).type(torch.FloatTensor).squeeze()
 
-        # embed question
-        if self.embedding_type == 'random':
-            # embed question:
-            question = self.embed_layer(torch.LongTensor(question)).type(torch.FloatTensor)
+        if not self.raw_image and self.features_storage == 'packed':
+            if self.features is None:
+                self.open_feature_maps()
+
+            # view on the memory-mapped row: converted to float in collate_fn.
+            img = torch.from_numpy(self.features[self.feature_rows[int(index)]])
 
         else:
-            # embed question
-            question = self.language.embed_sentence(question_string)
+            img = self.load_image_file(index)
 
         question_length = question.shape[0]
 
         # return everything
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
 
         data_dict['images'] = img
         data_dict['questions'] = question
@@ -687,8 +948,21 @@ class CLEVR(ImageTextToClassProblem):
         data_dict['index'] = index
         data_dict['imgfiles'] = imgfile
 
+        # image identifier, turned into the index of the unique image of the batch in collate_fn().
+        if self.unique_images:
+            data_dict['images_index'] = int(index)
+
         return data_dict
 
+    def get_image_ids(self):
+        """
+        Returns the number of the image of each question (e.g. 123 for 'CLEVR_val_000123.png').
+
+        :return: ``np.array`` of image numbers.
+
+        """
+        return np.array([int(sample['imgfile'].rsplit('_', 1)[1][:-4]) for sample in self.data])
+
     def collate_fn(self, batch):
         """
         Combines a list of DataDict (retrieved with :py:func:`__getitem__`) into a batch.
@@ -709,31 +983,35 @@ class CLEVR(ImageTextToClassProblem):
         'targets_string', 'index','imgfiles'})
 
         """
-        batch_size = len(batch)
-
-        # get max question length, create tensor of shape [batch_size x maxQuestionLength] & sort questions by
-        # decreasing length
-        max_len = max(map(lambda x: x['questions_length'], batch))
-        sort_by_len = sorted(batch, key=lambda x: x['questions_length'], reverse=True)
-
-        # create tensor containing the embedded questions
-        questions = torch.zeros(batch_size, max_len, self.embedding_dim).type(torch.FloatTensor)
+        # sort questions by decreasing length (required by pack_padded_sequence)
+        lengths, order = torch.tensor([elt['questions_length'] for elt in batch]).sort(descending=True)
+        sort_by_len = [batch[i] for i in order.tolist()]
 
         # construct the DataDict and fill it with the batch
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
 
         data_dict['images'] = torch.stack([elt['images'] for elt in sort_by_len]).type(torch.FloatTensor)
-        data_dict['questions_length'] = [elt['questions_length'] for elt in sort_by_len]
+        data_dict['questions_length'] = lengths.tolist()
         data_dict['targets'] = torch.tensor([elt['targets'] for elt in sort_by_len]).type(torch.LongTensor)
         data_dict['questions_string'] = [elt['questions_string'] for elt in sort_by_len]
         data_dict['index'] = [elt['index'] for elt in sort_by_len]
         data_dict['imgfiles'] = [elt['imgfiles'] for elt in sort_by_len]
         data_dict['questions_type'] = [elt['questions_type'] for elt in sort_by_len]
 
-        for i, length in enumerate(data_dict['questions_length']):  # only way to do this?
-            questions[i, :length, :] = sort_by_len[i]['questions']
-
-        data_dict['questions'] = questions
+        if self.embed_in_model:
+            # pad the word indices of the questions: embedded by the model.
+            data_dict['questions'] = torch.nn.utils.rnn.pad_sequence([elt['questions'] for elt in sort_by_len],
+                                                                     batch_first=True)
+        else:
+            # embed all the words of the batch at once, then pad the questions to the longest one with zeros.
+            words = torch.cat([elt['questions'] for elt in sort_by_len])
+            questions = torch.nn.functional.embedding(words, self.embedding_weights).split(data_dict['questions_length'])
+            data_dict['questions'] = torch.nn.utils.rnn.pad_sequence(questions, batch_first=True)
+
+        # keep the unique images of the batch.
+        if self.unique_images:
+            data_dict['images_index'] = [elt['images_index'] for elt in sort_by_len]
+            self.deduplicate_images(data_dict)
 
         return data_dict
 
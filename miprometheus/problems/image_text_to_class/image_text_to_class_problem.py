@@ -20,8 +20,10 @@ __author__ = "Tomasz Kornuta & Vincent Marois"
 
 
 import torch
+import numpy as np
 import torch.nn as nn
 from miprometheus.problems.problem import Problem
+from miprometheus.utils.batch_samplers import ImageGroupedBatchSampler
 
 
 class ObjectRepresentation(object):
@@ -88,6 +90,76 @@ class ImageTextToClassProblem(Problem):
         # "Default" problem name.
         self.name = 'ImageTextToClassProblem'
 
+        # group_by_image: gather the questions about the same image in the same batches,
+        # unique_images: each batch carries its unique images & the question -> image index map ('images_index').
+        params.add_default_params({'group_by_image': False,
+                                   'unique_images': False})
+        self.group_by_image = params['group_by_image']
+        self.unique_images = params['unique_images']
+
+    def get_image_ids(self):
+        """
+        Returns the identifier of the image of each sample, used to group the questions by image.
+
+        .. note::
+
+            To be redefined in subclasses: this base method returns ``None`` (grouping not supported).
+
+        :return: ``np.array`` of image identifiers or ``None``.
+
+        """
+        return None
+
+    def get_batch_sampler(self, shuffle=True):
+        """
+        Returns a :py:class:`miprometheus.utils.ImageGroupedBatchSampler` gathering the questions about the same \
+        image in the same batches if ``group_by_image`` is set.
+
+        :param shuffle: Whether to shuffle the images & questions at every epoch (DEFAULT: ``True``).
+        :type shuffle: bool
+
+        :return: ``ImageGroupedBatchSampler`` or ``None``.
+
+        """
+        if not self.group_by_image:
+            return None
+
+        image_ids = self.get_image_ids()
+        if image_ids is None:
+            self.logger.warning('Images of the samples are unknown, grouping the questions by image disabled.')
+            return None
+
+        self.logger.info('Grouping the questions by image in batches of {}'.format(self.params['batch_size']))
+        return ImageGroupedBatchSampler(image_ids, self.params['batch_size'], shuffle)
+
+    def add_images_index_definition(self):
+        """
+        Adds the ``images_index`` key (index of the image of each question in ``images``) to \
+        ``self.data_definitions`` if the batches carry unique images.
+
+        """
+        if self.unique_images:
+            self.data_definitions['images_index'] = {'size': [-1], 'type': [torch.Tensor]}
+
+    def deduplicate_images(self, data_dict):
+        """
+        Keeps the unique images of a batch: ``images`` then contains each image once & ``images_index`` \
+        maps each question to its image.
+
+        :param data_dict: batch, whose ``images_index`` contains the identifier of the image of each question.
+        :type data_dict: :py:class:`miprometheus.utils.DataDict`
+
+        :return: ``data_dict``, modified in place.
+
+        """
+        image_ids = np.asarray(data_dict['images_index'])
+        _, first, inverse = np.unique(image_ids, return_index=True, return_inverse=True)
+
+        data_dict['images'] = data_dict['images'][torch.from_numpy(first)]
+        data_dict['images_index'] = torch.from_numpy(inverse.reshape(-1))
+
+        return data_dict
+
     def calculate_accuracy(self, data_dict, logits):
         """
         Calculates the accuracy as the mean number of correct answers in a given batch.
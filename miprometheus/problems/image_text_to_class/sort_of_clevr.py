@@ -22,8 +22,11 @@ sort_of_clevr.py: ``Sort-of-CLEVR`` is a simplified version of the ``CLEVR`` dat
 __author__ = "Tomasz Kornuta & Vincent Marois"
 
 import os
+import zlib
+import shutil
 import h5py
 import numpy as np
+import multiprocessing
 from PIL import Image, ImageDraw
 import tqdm
 
@@ -59,6 +62,26 @@ class SortOfCLEVR(ImageTextToClassProblem):
     :param regenerate: Whether to regenerate the dataset
     :type regenerate: Bool
 
+    :param layout: On-disk layout of the HDF5 file: ``chunked`` (contiguous chunked datasets for images, questions \
+    and answers) or ``groups`` (legacy layout, one group per sample).
+    :type layout: str
+
+    :param compression: Compression filter of the images in the ``chunked`` layout (``None``, ``lzf``, ``gzip``).
+    :type compression: str
+
+    :param generation_workers: Number of processes generating the shards of the ``chunked`` layout.
+    :type generation_workers: int
+
+    :param processes: If set, overrides ``generation_workers`` (e.g. ``--processes`` of the ``ProblemInitializer``).
+    :type processes: int
+
+    :param generation_seed: Seed of the generation (-1: random). Each shard is generated with its own seed, \
+    derived from this one, the split and the shard index.
+    :type generation_seed: int
+
+    :param shard_size: Number of samples per shard.
+    :type shard_size: int
+
     .. note::
 
         When generating the dataset, this class:
@@ -66,13 +89,17 @@ class SortOfCLEVR(ImageTextToClassProblem):
             - First verifies if a file with a matching filename already exists in the ``data_folder``.
               The filename follows the following template:
 
-                >>> filename = '<split>_<size>_<img_size>.hy'
+                >>> filename = '<split>_<size>_<img_size>_chunked.hy'  # '<split>_<size>_<img_size>.hy' for 'groups'
 
 
             - If such a file exists, it is loaded and used as the dataset. If not, it is created and then used.
             - If ``regenerate`` is ``True``, the file is recreated regardless if one with the matching filename\
               already exists or not.
 
+        In the ``chunked`` layout, the dataset is generated in shards (saved in ``<filename>_shards``) by a pool \
+        of processes, which are then merged into the HDF5 file. If the generation is interrupted, the shards \
+        already generated are reused when it is restarted.
+
 
     .. note::
 
@@ -82,7 +109,13 @@ class SortOfCLEVR(ImageTextToClassProblem):
         >>>           'split': 'train',
         >>>           'regenerate': False,
         >>>           'size': 10000,
-        >>>           'img_size': 128}
+        >>>           'img_size': 128,
+        >>>           'layout': 'chunked',
+        >>>           'compression': None,
+        >>>           'generation_workers': 1,
+        >>>           'processes': None,
+        >>>           'generation_seed': -1,
+        >>>           'shard_size': 10000}
 
 
     """
@@ -107,12 +140,31 @@ class SortOfCLEVR(ImageTextToClassProblem):
                                         'split': 'train',
                                         'regenerate': False,
                                         'size': 10000,
-                                        'img_size': 128})
+                                        'img_size': 128,
+                                        'layout': 'chunked',
+                                        'compression': None,
+                                        'generation_workers': 1,
+                                        'processes': None,
+                                        'generation_seed': -1,
+                                        'shard_size': 10000})
 
         # parse params
         self.img_size = params["img_size"]
         self.dataset_size = params["size"]
         self.regenerate = params.get("regenerate", False)
+        self.layout = params['layout']
+        self.compression = params['compression']
+        self.generation_workers = params['generation_workers'] if params['processes'] is None \
+            else params['processes']
+        self.generation_seed = params['generation_seed']
+        self.shard_size = params['shard_size']
+        self.split = params['split']
+
+        if self.layout not in ['chunked', 'groups']:
+            raise ValueError("The layout must be either 'chunked' or 'groups', got '{}'".format(self.layout))
+
+        # HDF5 file handle: opened lazily, once per DataLoader worker (see worker_init_fn()).
+        self.h5file = None
 
         # Set general color properties.
         self.BG_COLOR = (180, 180, 150)
@@ -148,7 +200,9 @@ class SortOfCLEVR(ImageTextToClassProblem):
         # set: either 'train', 'test' or 'val'
         # dataset size
         # image size
-        data_filename = '{}_{}_{}.hy'.format(params['split'], str(self.dataset_size), str(self.img_size))
+        # layout (the legacy 'groups' layout keeps its original filename)
+        data_filename = '{}_{}_{}{}.hy'.format(params['split'], str(self.dataset_size), str(self.img_size),
+                                               '' if self.layout == 'groups' else '_chunked')
 
         # define the default_values dict: holds parameters values that a model may need.
         self.default_values = {'height': self.img_size,
@@ -165,6 +219,13 @@ class SortOfCLEVR(ImageTextToClassProblem):
                                  'scenes_description': {'size': [-1, -1], 'type': [list, str]},
                                  }
 
+        # the legacy 'groups' layout does not store the image of each question.
+        if self.layout == 'groups' and (self.group_by_image or self.unique_images):
+            self.logger.warning("The 'groups' layout does not index the images: group_by_image & unique_images "
+                                "disabled.")
+            self.group_by_image = self.unique_images = False
+        self.add_images_index_definition()
+
         # Load or generate the dataset.
         self.load_dataset(data_folder, data_filename)
 
@@ -188,6 +249,9 @@ class SortOfCLEVR(ImageTextToClassProblem):
         if self.regenerate:
             self.logger.warning('Regenerate is set to true: regenerating the dataset from scratch, '
                                 'without looking for an existing one.')
+            # discard the shards of a previous (interrupted) generation.
+            if os.path.isdir(self.filename + '_shards'):
+                shutil.rmtree(self.filename + '_shards')
             self.generate_h5py_dataset(self.filename)
 
         else:  # regenerate is false, looking if the file already exists
@@ -201,7 +265,120 @@ class SortOfCLEVR(ImageTextToClassProblem):
     def generate_h5py_dataset(self, filename):
         """
         Generates a whole new ``Sort-of-CLEVR`` dataset and saves it in the form of\
-        a HDF5 file.
+        a HDF5 file, using the selected layout.
+
+        :param filename: name of the file containing the samples.
+        :type filename: str
+
+        """
+        if self.layout == 'groups':
+            self.generate_h5py_groups_dataset(filename)
+            return
+
+        # shards are stored next to the file, so that an interrupted generation can be resumed.
+        shards_folder = filename + '_shards'
+        os.makedirs(shards_folder, exist_ok=True)
+
+        # the seed is stored with the shards: a resumed generation uses the same one.
+        seed_file = os.path.join(shards_folder, 'seed.txt')
+        if os.path.isfile(seed_file):
+            with open(seed_file, 'r') as f:
+                seed = int(f.read())
+        else:
+            seed = self.generation_seed if self.generation_seed >= 0 else np.random.randint(0, 2 ** 31)
+            with open(seed_file, 'w') as f:
+                f.write(str(seed))
+
+        # list the shards: (index, number of samples, filename).
+        num_shards = (self.dataset_size + self.shard_size - 1) // self.shard_size
+        shards = [(i, min(self.shard_size, self.dataset_size - i * self.shard_size),
+                   os.path.join(shards_folder, 'shard_{:05d}.npz'.format(i))) for i in range(num_shards)]
+        tasks = [(i, num_samples, shard_filename, seed) for i, num_samples, shard_filename in shards
+                 if not os.path.isfile(shard_filename)]
+
+        # progress bar
+        t = tqdm.tqdm(total=self.dataset_size, unit=" samples", unit_scale=True, unit_divisor=1000)  # Initialise
+        t.set_postfix(file=self.filename, refresh=False)
+        t.update(self.dataset_size - sum(task[1] for task in tasks))
+        if len(tasks) < num_shards:
+            self.logger.info('Resuming the generation: {} out of {} shards already generated'.format(
+                num_shards - len(tasks), num_shards))
+
+        # generate the missing shards, in parallel if required.
+        if self.generation_workers > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(processes=min(self.generation_workers, len(tasks))) as pool:
+                for num_samples in pool.imap_unordered(self.generate_shard, tasks):
+                    t.update(num_samples)
+        else:
+            for task in tasks:
+                t.update(self.generate_shard(task))
+        t.close()
+
+        # merge the shards into the HDF5 file (written under a temporary name, so that a partial file is never used).
+        self.logger.info('Merging {} shards into {}'.format(num_shards, filename))
+        with h5py.File(filename + '.tmp', 'w') as file:
+            for i, _, shard_filename in shards:
+                with np.load(shard_filename) as shard:
+                    if i == 0:
+                        self.create_h5py_datasets(file, shard['images'].shape[1:], shard['questions'].shape[1:],
+                                                  shard['answers'].shape[1:])
+                    self.write_scenes(file, shard['images'], shard['descriptions'].tolist(), shard['questions'],
+                                      shard['answers'], shard['image_indices'])
+        os.replace(filename + '.tmp', filename)
+        shutil.rmtree(shards_folder)
+
+        self.logger.info('Generated dataset with {} samples and saved to {}'.format(self.dataset_size, self.filename))
+
+    def generate_shard(self, task):
+        """
+        Generates a shard of the dataset (run by the processes of the pool) and saves it to a ``.npz`` file.
+
+        The random generator is seeded with (seed, split, shard index), so that each shard is independent and \
+        reproducible.
+
+        :param task: tuple (shard index, number of samples, shard filename, seed).
+        :type task: tuple
+
+        :return: Number of generated samples.
+
+        """
+        index, num_samples, shard_filename, seed = task
+        np.random.seed([seed, zlib.crc32(self.split.encode('utf-8')), index])
+
+        images, descriptions, questions, answers, image_indices = [], [], [], [], []
+        count = 0
+
+        while count < num_samples:
+
+            # Generate the scene.
+            objects = self.generate_scene_representation()
+
+            # Keep only the questions required to reach the shard size.
+            num_questions = min(len(objects) * self.NUM_QUESTIONS, num_samples - count)
+
+            # Generate corresponding image, questions and answers.
+            images.append(self.generate_image(objects))
+            descriptions.append(self.scene2str(objects))
+            questions.append(self.generate_question_matrix(objects)[:num_questions])
+            answers.append(self.generate_answer_matrix(objects)[:num_questions])
+            image_indices.append(np.full(num_questions, len(images) - 1, dtype=np.int32))
+
+            count += num_questions
+
+        # write under a temporary name first: a shard file exists only once complete.
+        with open(shard_filename + '.tmp', 'wb') as f:
+            np.savez(f, images=np.stack(images), descriptions=np.array(descriptions),
+                     questions=np.concatenate(questions).astype(np.uint8),
+                     answers=np.concatenate(answers).astype(np.uint8),
+                     image_indices=np.concatenate(image_indices))
+        os.replace(shard_filename + '.tmp', shard_filename)
+
+        return num_samples
+
+    def generate_h5py_groups_dataset(self, filename):
+        """
+        Generates a whole new ``Sort-of-CLEVR`` dataset and saves it in the form of\
+        a HDF5 file, using the legacy ``groups`` layout (one group per sample).
 
         :param filename: name of the file containing the samples.
         :type filename: str
@@ -250,41 +427,238 @@ class SortOfCLEVR(ImageTextToClassProblem):
         file.close()
         self.logger.info('Generated dataset with {} samples and saved to {}'.format(self.dataset_size, self.filename))
 
+    def create_h5py_datasets(self, file, image_shape, question_shape, answer_shape):
+        """
+        Creates the (empty, resizable) datasets of the ``chunked`` layout:
+
+            - ``images``: one image per scene, ``uint8``, chunked per image,
+            - ``scenes_description``: one string per scene,
+            - ``questions``, ``answers``: one row per sample, ``uint8``, chunked over blocks of samples,
+            - ``image_indices``: index of the scene (image) of each sample.
+
+        :param file: HDF5 file opened for writing.
+        :type file: h5py.File
+
+        :param image_shape: Shape of an image.
+        :param question_shape: Shape of an encoded question.
+        :param answer_shape: Shape of an encoded answer.
+
+        """
+        samples_chunk = min(self.dataset_size, 1024)
+
+        file.create_dataset('images', shape=(0,) + tuple(image_shape), maxshape=(None,) + tuple(image_shape),
+                            dtype=np.uint8, chunks=(1,) + tuple(image_shape), compression=self.compression)
+        file.create_dataset('scenes_description', shape=(0,), maxshape=(None,),
+                            dtype=h5py.special_dtype(vlen=str), chunks=(samples_chunk,))
+        file.create_dataset('questions', shape=(0,) + tuple(question_shape), maxshape=(None,) + tuple(question_shape),
+                            dtype=np.uint8, chunks=(samples_chunk,) + tuple(question_shape))
+        file.create_dataset('answers', shape=(0,) + tuple(answer_shape), maxshape=(None,) + tuple(answer_shape),
+                            dtype=np.uint8, chunks=(samples_chunk,) + tuple(answer_shape))
+        file.create_dataset('image_indices', shape=(0,), maxshape=(None,), dtype=np.int32, chunks=(samples_chunk,))
+
+    def write_scenes(self, file, images, descriptions, questions, answers, image_indices):
+        """
+        Appends a block of scenes and their samples at the end of the datasets of the ``chunked`` layout.
+
+        :param file: HDF5 file opened for writing, containing the datasets created by ``create_h5py_datasets()``.
+        :type file: h5py.File
+
+        :param images: Images of the scenes [num_scenes x img_size x img_size x 3].
+        :param descriptions: Descriptions of the scenes (list of str).
+        :param questions: Encoded questions of the samples [num_samples x ...].
+        :param answers: Encoded answers of the samples [num_samples x ...].
+        :param image_indices: Index of the scene of each sample, relative to the first scene of the block.
+
+        """
+        first_scene = file['images'].shape[0]
+
+        for name, data in (('images', images),
+                           ('scenes_description', descriptions),
+                           ('questions', np.asarray(questions, dtype=np.uint8)),
+                           ('answers', np.asarray(answers, dtype=np.uint8)),
+                           ('image_indices', np.asarray(image_indices, dtype=np.int32) + first_scene)):
+            dataset = file[name]
+            start = dataset.shape[0]
+            dataset.resize(start + len(data), axis=0)
+            dataset[start:start + len(data)] = data
+
+    def open_h5py_file(self):
+        """
+        Opens the (persistent, read-only) handle to the HDF5 file.
+
+        """
+        self.h5file = h5py.File(self.filename, 'r')
+
+    def worker_init_fn(self, worker_id):
+        """
+        Calls the base ``worker_init_fn`` and opens one HDF5 file handle per DataLoader worker.
+
+        .. note::
+
+            HDF5 handles cannot be shared between processes, so any handle inherited from the main process \
+            is discarded.
+
+        :param worker_id: the worker id (in [0, :py:class:`torch.utils.data.DataLoader`.num_workers - 1])
+        :type worker_id: int
+
+        """
+        super(SortOfCLEVR, self).worker_init_fn(worker_id)
+
+        self.h5file = None
+        self.open_h5py_file()
+
+    def __getstate__(self):
+        """
+        Excludes the HDF5 file handle from pickling (e.g. when the DataLoader workers are spawned).
+
+        """
+        state = self.__dict__.copy()
+        state['h5file'] = None
+        return state
+
     def __getitem__(self, index):
         """
         Getter method to access the dataset and return a sample.
 
-        .. warning::
-
-            **HDF5 does not support multi threaded data access with num_workers > 1 on the data loading.**
-            A way around this is to move every call for opening the HDF5 file to this ``__getitem__`` method.
+        .. note::
 
-            See https://discuss.pytorch.org/t/hdf5-multi-threaded-alternative/6189/9 for more info.
+            The HDF5 file is opened once per process (in ``worker_init_fn()`` for the DataLoader workers, lazily \
+            otherwise) and the handle is then reused.
 
         :param index: index of the sample to return.
 
-        :return: DataDict({'images','questions', 'targets', 'targets_index', 'scenes_description'}), with:
+        :return: DataDict({'images','questions', 'targets_classes', 'targets', 'scenes_description'}), with:
 
             - images: images (``self.img_size``)
             - questions: encoded questions
-            - targets: one-hot encoded answers
-            - targets_index: index of the answers
+            - targets_classes: one-hot encoded answers
+            - targets: index of the answers
             - scenes_description: Scene description.
 
         """
-        # load the file
-        data = h5py.File(self.filename, 'r')
-        sample = data[str(index)]
+        # get the file handle
+        if self.h5file is None:
+            self.open_h5py_file()
+
+        data_dict = self.create_data_dict()
+
+        if self.layout == 'groups':
+            sample = self.h5file[str(index)]
+
+            data_dict['images'] = (sample['image'][()] / 255).transpose(2, 1, 0)
+            data_dict['questions'] = sample['question'][()].astype(np.float32)
+            data_dict['targets_classes'] = sample['answer'][()].astype(np.float32)
+            data_dict['targets'] = np.argmax(data_dict['targets_classes'])
+            data_dict['scenes_description'] = self.decode_string(sample['scene_description'][()])
+
+        else:
+            image_index = self.h5file['image_indices'][index]
+
+            data_dict['images'] = (self.h5file['images'][image_index] / 255).transpose(2, 1, 0)
+            data_dict['questions'] = self.h5file['questions'][index].astype(np.float32)
+            data_dict['targets_classes'] = self.h5file['answers'][index].astype(np.float32)
+            data_dict['targets'] = np.argmax(data_dict['targets_classes'])
+            data_dict['scenes_description'] = self.decode_string(self.h5file['scenes_description'][image_index])
+
+            # image identifier, turned into the index of the unique image of the batch in collate_fn().
+            if self.unique_images:
+                data_dict['images_index'] = int(image_index)
+
+        return data_dict
+
+    def get_image_ids(self):
+        """
+        Returns the index of the image of each question (``chunked`` layout only).
+
+        :return: ``np.array`` of image indices or ``None``.
+
+        """
+        if self.layout == 'groups':
+            return None
 
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
-        data_dict['images'] = (sample['image'].value / 255).transpose(2, 1, 0)
-        data_dict['questions'] = sample['question'].value.astype(np.float32)
-        data_dict['targets_classes'] = sample['answer'].value.astype(np.float32)
-        data_dict['targets'] = np.argmax(data_dict['targets_classes'])
-        data_dict['scenes_description'] = sample['scene_description'].value
+        # read with a temporary handle: the persistent ones are opened by the DataLoader workers.
+        with h5py.File(self.filename, 'r') as h5file:
+            return h5file['image_indices'][()]
+
+    def __getitems__(self, indices):
+        """
+        Batched getter, called by :py:class:`torch.utils.data.DataLoader` (if supported) with the indices of a \
+        whole batch: reads the samples of the batch with one call per dataset of the ``chunked`` layout.
+
+        :param indices: indices of the samples of the batch.
+        :type indices: list
+
+        :return: ``DataDict({'images','questions', 'targets_classes', 'targets', 'scenes_description'})`` containing \
+        the batch (``collate_fn()`` returns it unchanged), or list of samples for the ``groups`` layout.
+
+        """
+        if self.layout == 'groups':
+            return [self[index] for index in indices]
+
+        # get the file handle
+        if self.h5file is None:
+            self.open_h5py_file()
+
+        # h5py requires increasing indices: read the unique sorted ones & restore the order afterwards.
+        sorted_indices, inverse = np.unique(np.asarray(indices), return_inverse=True)
+
+        questions = self.read_rows(self.h5file['questions'], sorted_indices)[inverse]
+        answers = self.read_rows(self.h5file['answers'], sorted_indices)[inverse]
+        image_indices = self.read_rows(self.h5file['image_indices'], sorted_indices)[inverse]
+
+        # each image is read once, even if several questions of the batch are about it.
+        sorted_images, images_inverse = np.unique(image_indices, return_inverse=True)
+        images = self.read_rows(self.h5file['images'], sorted_images)
+        descriptions = self.h5file['scenes_description'][sorted_images.tolist()]
+
+        data_dict = self.create_data_dict()
+        if self.unique_images:
+            # keep the unique images & map each question to its image.
+            data_dict['images_index'] = torch.from_numpy(images_inverse)
+        else:
+            images = images[images_inverse]
+        data_dict['images'] = torch.from_numpy(np.ascontiguousarray((images / 255).transpose(0, 3, 2, 1)))
+        data_dict['questions'] = torch.from_numpy(questions.astype(np.float32))
+        data_dict['targets_classes'] = torch.from_numpy(answers.astype(np.float32))
+        data_dict['targets'] = torch.from_numpy(np.argmax(answers, axis=1))
+        data_dict['scenes_description'] = [self.decode_string(descriptions[i]) for i in images_inverse]
 
         return data_dict
 
+    @staticmethod
+    def read_rows(dataset, sorted_indices):
+        """
+        Reads the rows of a HDF5 dataset indicated by (unique, increasing) indices, using a single contiguous \
+        read when the rows are close to each other.
+
+        :param dataset: HDF5 dataset.
+        :type dataset: h5py.Dataset
+
+        :param sorted_indices: Unique, increasing indices of the rows to read.
+        :type sorted_indices: np.array
+
+        :return: ``np.array`` containing the rows.
+
+        """
+        first, last = int(sorted_indices[0]), int(sorted_indices[-1]) + 1
+
+        if last - first <= 4 * len(sorted_indices):
+            return dataset[first:last][sorted_indices - first]
+        else:
+            return dataset[sorted_indices.tolist()]
+
+    @staticmethod
+    def decode_string(value):
+        """
+        Decodes a string read from a HDF5 file (returned as ``bytes`` by recent versions of h5py).
+
+        :param value: str or bytes.
+
+        :return: str
+
+        """
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
     def collate_fn(self, batch):
         """
         Combines a list of ``DataDict`` (retrieved with ``__getitem__`` ) into a batch.
@@ -296,12 +670,21 @@ class SortOfCLEVR(ImageTextToClassProblem):
 
         :param batch: list of individual ``DataDict`` samples to combine.
 
-        :return: ``DataDict({'images','questions', 'targets', 'targets_index', 'scenes_description'})`` containing the batch.
+        :return: ``DataDict({'images','questions', 'targets_classes', 'targets', 'scenes_description'})`` containing the batch.
 
         """
+        # batch already assembled by __getitems__().
+        if isinstance(batch, DataDict):
+            return batch
+
+        data_dict = self.create_data_dict({key: value for key, value in zip(self.data_definitions.keys(),
+                                                                           super(SortOfCLEVR, self).collate_fn(batch).values())})
+
+        # keep the unique images of the batch.
+        if self.unique_images:
+            self.deduplicate_images(data_dict)
 
-        return DataDict({key: value for key, value in zip(self.data_definitions.keys(),
-                                                          super(SortOfCLEVR, self).collate_fn(batch).values())})
+        return data_dict
 
     def color2str(self, color_index):
         """
@@ -540,48 +923,43 @@ class SortOfCLEVR(ImageTextToClassProblem):
         A = np.zeros((len(objects) * self.NUM_QUESTIONS,
                       self.NUM_COLORS + 4), dtype=np.bool)
 
-        for i, obj in enumerate(objects):
-            # Q1: circle or rectangle?
-            if obj.shape:
-                A[i * self.NUM_QUESTIONS, self.NUM_COLORS + 1] = True
-            else:
-                A[i * self.NUM_QUESTIONS, self.NUM_COLORS] = True
+        # Gather the objects properties.
+        x = np.array([obj.x for obj in objects])
+        y = np.array([obj.y for obj in objects])
+        shapes = np.array([obj.shape for obj in objects], dtype=int)
+        colors = np.array([obj.color for obj in objects], dtype=int)
 
-            # Q2: bottom?
-            if obj.y > int(self.img_size / 2):
-                A[i * self.NUM_QUESTIONS + 1, self.NUM_COLORS + 2] = True
-            else:
-                A[i * self.NUM_QUESTIONS + 1, self.NUM_COLORS + 3] = True
+        # Index of the first question about each object.
+        rows = np.arange(len(objects)) * self.NUM_QUESTIONS
 
-            # Q3: left?
-            if obj.x < int(self.img_size / 2):
-                A[i * self.NUM_QUESTIONS + 2, self.NUM_COLORS + 2] = True
-            else:
-                A[i * self.NUM_QUESTIONS + 2, self.NUM_COLORS + 3] = True
+        # Q1: circle or rectangle?
+        A[rows, self.NUM_COLORS + shapes] = True
+
+        # Q2: bottom?
+        A[rows + 1, np.where(y > int(self.img_size / 2), self.NUM_COLORS + 2, self.NUM_COLORS + 3)] = True
+
+        # Q3: left?
+        A[rows + 2, np.where(x < int(self.img_size / 2), self.NUM_COLORS + 2, self.NUM_COLORS + 3)] = True
 
-            # Calculate distances.
-            distances = np.array(
-                [((obj.x - other_obj.x) ** 2 + (obj.y - other_obj.y) ** 2)
-                 for other_obj in objects])
-            idx = distances.argsort()
+        # Calculate distances between all pairs of objects.
+        distances = (x[:, np.newaxis] - x[np.newaxis, :]) ** 2 + (y[:, np.newaxis] - y[np.newaxis, :]) ** 2
+        idx = distances.argsort(axis=1)
 
-            # Ids of closest and most distant objects.
-            min_idx = idx[1]
-            max_idx = idx[-1]
+        # Ids of closest and most distant objects (the closest one being the object itself).
+        min_idx = idx[:, 1]
+        max_idx = idx[:, -1]
 
-            # Q4: the shape of the nearest object
-            A[i * self.NUM_QUESTIONS + 3,
-              self.NUM_COLORS + objects[min_idx].shape] = True
+        # Q4: the shape of the nearest object
+        A[rows + 3, self.NUM_COLORS + shapes[min_idx]] = True
 
-            # Q5: the shape of the farthest object
-            A[i * self.NUM_QUESTIONS + 4,
-              self.NUM_COLORS + objects[max_idx].shape] = True
+        # Q5: the shape of the farthest object
+        A[rows + 4, self.NUM_COLORS + shapes[max_idx]] = True
 
-            # Q6: the color of the nearest object
-            A[i * self.NUM_QUESTIONS + 5, objects[min_idx].color] = True
+        # Q6: the color of the nearest object
+        A[rows + 5, colors[min_idx]] = True
 
-            # Q7: the color of the farthest object
-            A[i * self.NUM_QUESTIONS + 6, objects[max_idx].color] = True
+        # Q7: the color of the farthest object
+        A[rows + 6, colors[max_idx]] = True
 
         return A
 
@@ -590,7 +968,7 @@ class SortOfCLEVR(ImageTextToClassProblem):
 
         Show a sample of the current DataDict.
 
-        :param data_dict: DataDict({'images','questions', 'targets', 'targets_index', 'scenes_description'})
+        :param data_dict: DataDict({'images','questions', 'targets_classes', 'targets', 'scenes_description'})
         :type data_dict: DataDict
 
         :param sample: sample index to visualize.
@@ -598,13 +976,17 @@ class SortOfCLEVR(ImageTextToClassProblem):
         """
         import matplotlib.pyplot as plt
 
-        # Unpack data_dict.
-        images, questions, targets, targets_index, scenes_description = data_dict.values()
+        # Unpack data_dict (which may also contain 'images_index').
+        images = data_dict['images']
+        questions = data_dict['questions']
+        targets = data_dict['targets']
+        scenes_description = data_dict['scenes_description']
 
-        # Get sample.
-        image = images[sample].numpy().transpose(2, 1, 0)
+        # Get sample: with unique_images, the image of the sample is indicated by 'images_index'.
+        image = images[sample if data_dict.get('images_index') is None else data_dict['images_index'][sample]]
+        image = image.numpy().transpose(2, 1, 0)
         question = questions[sample].numpy()
-        answer = targets_index[sample].numpy()
+        answer = targets[sample].numpy()
 
         # Print scene description.
         self.logger.info("Scene description :\n {}".format(scenes_description[sample]))
@@ -625,7 +1007,7 @@ class SortOfCLEVR(ImageTextToClassProblem):
         visualization during training or inference. To be redefined in
         inheriting classes.
 
-        :param data_dict: DataDict({'images','questions', 'targets', 'targets_index', 'scenes_description'})
+        :param data_dict: DataDict({'images','questions', 'targets_classes', 'targets', 'scenes_description'})
 
         :param logits: Predictions of the model.
         :type logits: Tensor
@@ -636,14 +1018,15 @@ class SortOfCLEVR(ImageTextToClassProblem):
         # move DataDict to cpu and detach it from the graph
         data_dict = data_dict.cpu().detach().numpy()
 
-        # Unpack data_dict.
-        images, questions, targets, targets_index, scenes_description = data_dict.values()
+        # Unpack data_dict (which may also contain 'images_index': the images are mapped on the samples by the model).
+        questions = data_dict['questions']
+        targets = data_dict['targets']
         batch_size = targets.shape[0]
 
         logits = logits.cpu().detach().numpy()
 
         # Convert to string
-        answers_string = [self.answer2str(targets_index[batch_num]) for batch_num in range(batch_size)]
+        answers_string = [self.answer2str(targets[batch_num]) for batch_num in range(batch_size)]
         questions_string = [self.question2str(questions[batch_num]) for batch_num in range(batch_size)]
         prediction = [self.answer2str(np.argmax(logits[batch_num])) for batch_num in range(batch_size)]
 
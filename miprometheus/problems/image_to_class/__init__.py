@@ -1,5 +1,7 @@
-from .cifar10 import CIFAR10
-from .image_to_class_problem import ImageToClassProblem
-from .mnist import MNIST
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['CIFAR10', 'ImageToClassProblem', 'MNIST']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'CIFAR10': '.cifar10',
+    'ImageToClassProblem': '.image_to_class_problem',
+    'MNIST': '.mnist'
+})
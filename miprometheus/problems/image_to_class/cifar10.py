@@ -80,7 +80,8 @@ class CIFAR10(ImageToClassProblem):
             The following is set by default:
 
             >>> params = {'data_folder': '~/data/cifar10',
-            >>>           'use_train_data': True}
+            >>>           'use_train_data': True,
+            >>>           'in_memory': True}
 
 
         :param params: Dictionary of parameters (read from configuration ``.yaml`` file).
@@ -93,7 +94,8 @@ class CIFAR10(ImageToClassProblem):
         
         # Set default parameters.
         params.add_default_params({'data_folder': '~/data/cifar10',
-                                   'use_train_data': True})
+                                   'use_train_data': True,
+                                   'in_memory': True})
 
         # Get absolute path.
         data_folder = os.path.expanduser(params['data_folder'])
@@ -145,6 +147,12 @@ class CIFAR10(ImageToClassProblem):
         # type(self.train_dataset) = <class 'torchvision.datasets.cifar.CIFAR10'>
         # -> inherits from torch.utils.data.Dataset
 
+        # load the whole split as a uint8 tensor, pre-resized once if required.
+        if params['in_memory']:
+            self.load_in_memory(self.dataset, os.path.join(data_folder, 'resized_{}_{}x{}.pt'.format(
+                'train' if self.use_train_data else 'test', self.height, self.width)) if 'resize' in self.params else None)
+
+
         self.length = len(self.dataset)
         # Class names.
         self.labels = 'Airplane Automobile Bird Cat Deer Dog Frog Horse Shipe Truck'.split(' ')
@@ -165,12 +173,21 @@ class CIFAR10(ImageToClassProblem):
 
         """
 
+        # Get image and target from the in-memory tensors.
+        if self.in_memory:
+            batch = self.__getitems__([index])
+            data_dict = self.create_data_dict()
+            data_dict['images'] = batch['images'][0]
+            data_dict['targets'] = batch['targets'][0]
+            data_dict['targets_label'] = batch['targets_label'][0]
+            return data_dict
+
         img, target = self.dataset.__getitem__(index)
         target = torch.tensor(target)
 
         label = self.labels[target.data]
 
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['images'] = img
         data_dict['targets'] = target
         data_dict['targets_label'] = label
@@ -194,9 +211,12 @@ class CIFAR10(ImageToClassProblem):
         :return: ``DataDict({'images','targets', 'targets_label'})`` containing the batch.
 
         """
+        # batch already assembled by __getitems__().
+        if isinstance(batch, DataDict):
+            return batch
 
-        return DataDict({key: value for key, value in zip(self.data_definitions.keys(),
-                                                          super(CIFAR10, self).collate_fn(batch).values())})
+        return self.create_data_dict({key: value for key, value in zip(self.data_definitions.keys(),
+                                                                      super(CIFAR10, self).collate_fn(batch).values())})
 
 
 if __name__ == "__main__":
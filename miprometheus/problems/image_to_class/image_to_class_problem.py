@@ -17,6 +17,7 @@
 
 """image_to_class_problem.py: contains base class for image classification problems."""
 __author__ = "Younes Bouhadjar & Vincent Marois"
+import os
 import torch
 import numpy as np
 import torch.nn as nn
@@ -64,6 +65,77 @@ class ImageToClassProblem(Problem):
                                  'targets_label': {'size': [-1, 1], 'type': [list, str]}
                                  }
 
+        # whole split held in memory as tensors (cf load_in_memory()).
+        self.in_memory = False
+        self.images = None
+        self.targets = None
+
+    def load_in_memory(self, dataset, cache_filename=None):
+        """
+        Loads the whole split of a ``torchvision`` dataset once, as a contiguous ``uint8`` tensor of images of shape \
+        [N x C x H x W] & a tensor of targets, so that the batches are served by index slicing \
+        (cf :py:func:`__getitems__`).
+
+        If the images do not match ``[self.height, self.width]``, they are resized once (bilinear interpolation) \
+        and the result is cached in ``cache_filename``.
+
+        :param dataset: ``torchvision`` dataset (e.g. ``datasets.MNIST``), exposing ``data`` & ``targets``.
+
+        :param cache_filename: file caching the resized images & targets (optional).
+        :type cache_filename: str
+
+        """
+        self.in_memory = True
+
+        if cache_filename is not None and os.path.isfile(cache_filename):
+            self.logger.info('Loading the resized images from {}'.format(cache_filename))
+            self.images, self.targets = torch.load(cache_filename)
+            return
+
+        images = torch.as_tensor(np.asarray(dataset.data))
+
+        # [N x H x W] (grayscale) or [N x H x W x C] -> [N x C x H x W]
+        images = images.unsqueeze(1) if images.dim() == 3 else images.permute(0, 3, 1, 2)
+
+        if tuple(images.shape[2:]) != (self.height, self.width):
+            self.logger.info('Resizing the images to [{}, {}]'.format(self.height, self.width))
+
+            # resize by chunks to limit the memory footprint of the float conversion.
+            images = torch.cat([torch.nn.functional.interpolate(chunk.float(), size=(self.height, self.width),
+                                                                mode='bilinear', align_corners=False
+                                                                ).round_().clamp_(0, 255).byte()
+                                for chunk in images.split(10000)])
+
+        self.images = images.contiguous()
+        self.targets = torch.as_tensor(np.asarray(dataset.targets), dtype=torch.long)
+
+        if cache_filename is not None:
+            torch.save((self.images, self.targets), cache_filename)
+
+    def __getitems__(self, indices):
+        """
+        Batched getter, called by :py:class:`torch.utils.data.DataLoader` (if supported) with the indices of a \
+        whole batch: when the split is held in memory, slices the images & targets of the batch at once.
+
+        :param indices: indices of the samples of the batch.
+        :type indices: list
+
+        :return: ``DataDict({'images','targets', 'targets_label'})`` containing the batch (``collate_fn()`` returns \
+        it unchanged), or list of samples if the split is not held in memory.
+
+        """
+        if not self.in_memory:
+            return [self[index] for index in indices]
+
+        indices = torch.as_tensor(indices, dtype=torch.long)
+
+        data_dict = self.create_data_dict()
+        data_dict['images'] = self.images[indices].float().div_(255)
+        data_dict['targets'] = self.targets[indices]
+        data_dict['targets_label'] = [self.labels[target] for target in data_dict['targets'].tolist()]
+
+        return data_dict
+
     def calculate_accuracy(self, data_dict, logits):
         """
         Calculates accuracy equal to mean number of correct classification in a given batch.
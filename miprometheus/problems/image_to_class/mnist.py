@@ -78,7 +78,8 @@ class MNIST(ImageToClassProblem):
             The following is set by default:
 
             >>> self.params.add_default_params({'data_folder': '~/data/mnist',
-            >>>           'use_train_data': True})
+            >>>           'use_train_data': True,
+            >>>           'in_memory': True})
 
         :param params_: Dictionary of parameters (read from configuration ``.yaml`` file).
 
@@ -89,7 +90,8 @@ class MNIST(ImageToClassProblem):
 
         # Set default parameters.
         self.params.add_default_params({'data_folder': '~/data/mnist',
-                                        'use_train_data': True
+                                        'use_train_data': True,
+                                        'in_memory': True
                                         })
 
         # Get absolute path.
@@ -139,6 +141,11 @@ class MNIST(ImageToClassProblem):
         self.dataset = datasets.MNIST(root=data_folder, train=self.use_train_data, download=True,
                                       transform=transform)
 
+        # load the whole split as a uint8 tensor, pre-resized once if required.
+        if self.params['in_memory']:
+            self.load_in_memory(self.dataset, os.path.join(data_folder, 'resized_{}_{}x{}.pt'.format(
+                'train' if self.use_train_data else 'test', self.height, self.width)) if 'resize' in self.params else None)
+
         # Set length.
         self.length = len(self.dataset)
 
@@ -160,6 +167,15 @@ class MNIST(ImageToClassProblem):
 
 
         """
+        # Get image and target from the in-memory tensors.
+        if self.in_memory:
+            batch = self.__getitems__([index])
+            data_dict = self.create_data_dict()
+            data_dict['images'] = batch['images'][0]
+            data_dict['targets'] = batch['targets'][0]
+            data_dict['targets_label'] = batch['targets_label'][0]
+            return data_dict
+
         # Get image and target.
         img, target = self.dataset.__getitem__(index)
   
@@ -189,9 +205,12 @@ class MNIST(ImageToClassProblem):
         :return: ``DataDict({'images','targets', 'targets_label'})`` containing the batch.
 
         """
+        # batch already assembled by __getitems__().
+        if isinstance(batch, DataDict):
+            return batch
 
-        return DataDict({key: value for key, value in zip(self.data_definitions.keys(),
-                                                          super(MNIST, self).collate_fn(batch).values())})
+        return self.create_data_dict({key: value for key, value in zip(self.data_definitions.keys(),
+                                                                      super(MNIST, self).collate_fn(batch).values())})
 
 
 if __name__ == "__main__":
@@ -29,7 +29,7 @@ import numpy as np
 from torch.utils.data import Dataset
 
 from miprometheus.utils.app_state import AppState
-from miprometheus.utils.data_dict import DataDict
+from miprometheus.utils.data_dict import DataDict, compile_data_dict
 
 
 class Problem(Dataset):
@@ -141,15 +141,25 @@ class Problem(Dataset):
         # Get access to AppState: for dtype, visualization flag etc.
         self.app_state = AppState()
 
-    def create_data_dict(self):
+        # Transforms applied to the whole batch, after collation (cf transform_batch()).
+        self.batch_transforms = []
+
+    def create_data_dict(self, values=None):
         """
         Returns a :py:class:`miprometheus.utils.DataDict` object with keys created on the \
         problem data_definitions and empty values (None).
 
+        The DataDict class is compiled from the keys of the data_definitions (cf \
+        :py:func:`miprometheus.utils.data_dict.compile_data_dict`), storing them in ``__slots__``.
+
+        :param values: Optional values of (some of) the keys.
+        :type values: dict
+
         :return: new :py:class:`miprometheus.utils.DataDict` object.
 
         """
-        return DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict_class = compile_data_dict(self.data_definitions.keys())
+        return data_dict_class(values) if values is not None else data_dict_class()
 
     def __len__(self):
         """
@@ -194,6 +204,58 @@ class Problem(Dataset):
         """
         return torch.utils.data.dataloader.default_collate(batch)
 
+    def add_batch_transform(self, transform):
+        """
+        Appends a transform to the batch-transform stage (cf :py:func:`transform_batch`).
+
+        :param transform: Callable taking a :py:class:`miprometheus.utils.DataDict` (batch) and returning it \
+        transformed, e.g. one of :py:mod:`miprometheus.utils.batch_transforms`.
+
+        """
+        self.batch_transforms.append(transform)
+
+    def transform_batch(self, data_dict):
+        """
+        Batch-transform stage: applies the registered transforms (in order) to the whole batch.
+
+        .. note::
+
+            This is called by the worker after collation and after moving the batch to the training device \
+            (when there is one), so that transforms like permutations, resizing, normalization or reshaping \
+            into sequences run once per batch instead of once per sample.
+
+        :param data_dict: batch of samples.
+        :type data_dict: :py:class:`miprometheus.utils.DataDict`
+
+        :return: transformed ``DataDict``.
+
+        """
+        for transform in self.batch_transforms:
+            data_dict = transform(data_dict)
+
+        return data_dict
+
+    def get_batch_sampler(self, shuffle=True):
+        """
+        Returns the batch sampler that will be passed to :py:class:`torch.utils.data.DataLoader` as \
+        ``batch_sampler``, i.e. that will yield the indices of the samples of each batch.
+
+        .. note::
+
+            This base method returns ``None``: the ``DataLoader`` will then create batches of fixed size, \
+            equal to ``batch_size``.
+
+            Problems generating batches of variable size (e.g. packed under a tokens budget) should override it.
+
+
+        :param shuffle: Whether to shuffle the samples at every epoch (DEFAULT: ``True``).
+        :type shuffle: bool
+
+        :return: ``None`` by default.
+
+        """
+        return None
+
     def __getitem__(self, index):
         """
         Getter that returns an individual sample from the problem's associated dataset (that can be generated \
@@ -215,7 +277,7 @@ class Problem(Dataset):
 
             e.g.:
 
-                >>> data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+                >>> data_dict = self.create_data_dict()
                 >>> # you can now access each value by its key and assign the corresponding object (e.g. `torch.tensor` etc)
                 >>> ...
                 >>> return data_dict
@@ -241,7 +303,7 @@ class Problem(Dataset):
         :return: Empty ``DataDict``, having the same key as ``self.data_definitions``.
 
         """
-        return DataDict({key: None for key in self.data_definitions.keys()})
+        return self.create_data_dict()
 
     def worker_init_fn(self, worker_id):
         """
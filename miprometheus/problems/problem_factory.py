@@ -23,9 +23,9 @@ __author__ = "Tomasz Kornuta & Vincent Marois"
 
 import os.path
 import logging
-import inspect
 
 from miprometheus import problems
+from miprometheus.utils import registry
 
 
 class ProblemFactory(object):
@@ -44,7 +44,10 @@ class ProblemFactory(object):
 
         ..note::
 
-            ``params`` should contains the exact (case-sensitive) class name of the Problem to instantiate.
+            ``params`` should contains the exact (case-sensitive) class name of the Problem to instantiate: either \
+            the name of a problem of the problems package, of a problem registered by another package (through an \
+            entry point of the ``miprometheus.problems`` group), or its import path \
+            (cf. :py:mod:`miprometheus.utils.registry`).
 
 
         :return: Instance of a given problem.
@@ -61,16 +64,15 @@ class ProblemFactory(object):
         # Get the class name.
         name = os.path.basename(params['name'])
 
-        # Get the actual class.
-        problem_class = getattr(problems, name)
+        # Get the actual class, importing only its module.
+        problem_class = registry.resolve(name, problems, registry.PROBLEMS_GROUP)
+        if problem_class is None:
+            logger.error("Could not find the specified class '{}' in the problems package or in the registered "
+                         "problems.".format(name))
+            exit(-1)
 
         # Check if class is derived (even indirectly) from Problem.
-        inherits = False
-        for c in inspect.getmro(problem_class):
-            if c.__name__ == problems.Problem.__name__:
-                inherits = True
-                break
-        if not inherits:
+        if not (isinstance(problem_class, type) and issubclass(problem_class, problems.Problem)):
             logger.error("The specified class '{}' is not derived from the Problem class".format(name))
             exit(-1)
 
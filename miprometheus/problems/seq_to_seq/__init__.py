@@ -1,5 +1,9 @@
-from .algorithmic import *
-from .text2text import *
-from .vqa import *
+from miprometheus.utils.lazy_import import lazy_attributes
 
-from .seq_to_seq_problem import SeqToSeqProblem
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'SeqToSeqProblem': '.seq_to_seq_problem'
+}, subpackages=[
+    '.algorithmic',
+    '.text2text',
+    '.vqa'
+])
@@ -1,9 +1,12 @@
-from .dual_comparison import *
-from .dual_distraction import *
-from .dual_ignore import *
-from .manipulation_spatial import *
-from .manipulation_temporal import *
-from .recall import *
+from miprometheus.utils.lazy_import import lazy_attributes
 
-
-from .algorithmic_seq_to_seq_problem import AlgorithmicSeqToSeqProblem
\ No newline at end of file
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'AlgorithmicSeqToSeqProblem': '.algorithmic_seq_to_seq_problem'
+}, subpackages=[
+    '.dual_comparison',
+    '.dual_distraction',
+    '.dual_ignore',
+    '.manipulation_spatial',
+    '.manipulation_temporal',
+    '.recall'
+])
@@ -1,9 +1,7 @@
-from .distraction_carry import DistractionCarry
-from .distraction_forget import DistractionForget
-from .distraction_ignore import DistractionIgnore
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'DistractionCarry',
-    'DistractionForget',
-    'DistractionIgnore'
-    ]
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'DistractionCarry': '.distraction_carry',
+    'DistractionForget': '.distraction_forget',
+    'DistractionIgnore': '.distraction_ignore'
+})
@@ -1,9 +1,7 @@
-from .interruption_not import InterruptionNot
-from .interruption_reverse_recall import InterruptionReverseRecall
-from .interruption_swap_recall import InterruptionSwapRecall
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'InterruptionNot',
-    'InterruptionReverseRecall',
-    'InterruptionSwapRecall'
-    ]
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'InterruptionNot': '.interruption_not',
+    'InterruptionReverseRecall': '.interruption_reverse_recall',
+    'InterruptionSwapRecall': '.interruption_swap_recall'
+})
@@ -1,7 +1,6 @@
-from .manipulation_spatial_not import ManipulationSpatialNot
-from .manipulation_spatial_rotation import ManipulationSpatialRotation
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'ManipulationSpatialNot',
-    'ManipulationSpatialRotation'
-    ]
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ManipulationSpatialNot': '.manipulation_spatial_not',
+    'ManipulationSpatialRotation': '.manipulation_spatial_rotation'
+})
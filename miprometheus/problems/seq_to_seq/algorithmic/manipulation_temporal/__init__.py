@@ -1,7 +1,6 @@
-from .manipulation_temporal_swap import ManipulationTemporalSwap
-from .skip_recall_cl import SkipRecallCommandLines
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = [
-    'ManipulationTemporalSwap',
-    'SkipRecallCommandLines'
-    ]
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ManipulationTemporalSwap': '.manipulation_temporal_swap',
+    'SkipRecallCommandLines': '.skip_recall_cl'
+})
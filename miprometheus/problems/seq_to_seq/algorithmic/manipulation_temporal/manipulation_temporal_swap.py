@@ -145,7 +145,7 @@ class ManipulationTemporalSwap(AlgorithmicSeqToSeqProblem):
         pttargets = torch.from_numpy(targets).type(self.app_state.dtype)
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = ptinputs
         data_dict['sequences_length'] = seq_length
         data_dict['targets'] = pttargets
@@ -247,7 +247,7 @@ class ManipulationTemporalSwap(AlgorithmicSeqToSeqProblem):
         pttargets = torch.from_numpy(targets).type(self.app_state.dtype)
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = ptinputs
         data_dict['sequences_length'] = seq_length
         data_dict['targets'] = pttargets
@@ -212,7 +212,7 @@ class OperationSpan(AlgorithmicSeqToSeqProblem):
         target_with_dummies[mask[0], :] = target
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = inputs
         data_dict['sequences_length'] = max(seq_lengths_a)
         data_dict['targets'] = target_with_dummies
@@ -220,7 +220,7 @@ class OperationSpan(AlgorithmicSeqToSeqProblem):
         data_dict['num_subsequences'] = nb_sub_seq_a + nb_sub_seq_b
         '''
 
-        return DataDict({key: None for key in self.data_definitions.keys()}) #data_dict
+        return self.create_data_dict() #data_dict
 
     def collate_fn(self, batch):
         """
@@ -347,7 +347,7 @@ class OperationSpan(AlgorithmicSeqToSeqProblem):
         target_with_dummies[:, mask[0], :] = target
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = inputs
         data_dict['sequences_length'] = max(seq_lengths_a)
         data_dict['targets'] = target_with_dummies
@@ -134,7 +134,7 @@ class ReadingSpan(AlgorithmicSeqToSeqProblem):
         inputs[mask[0], 0:self.control_bits] = 0
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = inputs
         data_dict['sequences_length'] = max(seq_length)
         data_dict['targets'] = targets
@@ -142,7 +142,7 @@ class ReadingSpan(AlgorithmicSeqToSeqProblem):
         data_dict['num_subsequences'] = num_sub_seq
         '''
 
-        return DataDict({key: None for key in self.data_definitions.keys()}) #data_dict
+        return self.create_data_dict() #data_dict
 
     def collate_fn(self, batch):
         """
@@ -232,7 +232,7 @@ class ReadingSpan(AlgorithmicSeqToSeqProblem):
         inputs[:, mask[0], 0:self.control_bits] = 0
 
         # Return data_dict.
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['sequences'] = inputs
         data_dict['sequences_length'] = max(seq_length)
         data_dict['targets'] = targets
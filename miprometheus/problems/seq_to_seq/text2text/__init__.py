@@ -1,4 +1,7 @@
-from .text_to_text_problem import TextToTextProblem, Lang
-from .translation_anki import TranslationAnki
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['TextToTextProblem', 'Lang', 'TranslationAnki']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'TextToTextProblem': '.text_to_text_problem',
+    'Lang': '.text_to_text_problem',
+    'TranslationAnki': '.translation_anki'
+})
@@ -48,9 +48,14 @@ __author__ = "Vincent Marois"
 
 import unicodedata
 import re
+import itertools
+import numpy as np
 import torch
 import torch.nn as nn
 from miprometheus.problems.seq_to_seq.seq_to_seq_problem import SeqToSeqProblem
+from miprometheus.utils.batch_samplers import TokenBudgetBatchSampler
+from miprometheus.utils.problems_utils.bleu import bleu_statistics, sentence_bleu_scores, corpus_bleu_score, \
+    sequences_length
 
 # global tokens
 PAD_token = 0
@@ -88,6 +93,7 @@ class TextToTextProblem(SeqToSeqProblem):
                                  'inputs_text': {'size': [-1, 1], 'type': [list, str]},
                                  'targets': {'size': [-1, -1, -1], 'type': [torch.Tensor]},
                                  'targets_length': {'size': [-1, 1], 'type': [list, int]},
+                                 'targets_indices': {'size': [-1, -1], 'type': [torch.Tensor]},
                                  'outputs_text': {'size': [-1, 1], 'type': [list, str]},
                                  }
 
@@ -101,6 +107,62 @@ class TextToTextProblem(SeqToSeqProblem):
         self.input_lang = None
         self.output_lang = None
 
+        # Dynamic batching: if positive, pack as many pairs as fit under this budget of (padded) tokens in a
+        # batch, instead of using a fixed batch_size (DEFAULT: -1, i.e. disabled).
+        params.add_default_params({'max_tokens': -1})
+        self.max_tokens = params['max_tokens']
+
+        # Number of tokens of each pair of sentences (filled in by the subclasses when preparing the data).
+        self.sample_lengths = None
+
+        # BLEU score: maximum order of the n-grams & whether to use the (slow) NLTK reference implementation
+        # instead of the vectorized one.
+        params.add_default_params({'bleu_max_order': 4, 'use_nltk_bleu': False})
+        self.bleu_max_order = params['bleu_max_order']
+        self.use_nltk_bleu = params['use_nltk_bleu']
+
+    def get_batch_sampler(self, shuffle=True):
+        """
+        Returns a :py:class:`miprometheus.utils.TokenBudgetBatchSampler` packing the pairs of sentences \
+        under ``max_tokens`` (padded) tokens per batch if dynamic batching is enabled.
+
+        :param shuffle: Whether to shuffle the samples & batches at every epoch (DEFAULT: ``True``).
+        :type shuffle: bool
+
+        :return: ``TokenBudgetBatchSampler`` or ``None`` if dynamic batching is disabled.
+
+        """
+        if self.max_tokens <= 0:
+            return None
+
+        if self.sample_lengths is None:
+            self.logger.warning('Lengths of the samples are unknown, dynamic batching disabled.')
+            return None
+
+        self.logger.info('Using dynamic batching with at most {} tokens per batch'.format(self.max_tokens))
+        return TokenBudgetBatchSampler(self.sample_lengths, self.max_tokens, shuffle)
+
+    def compute_BLEU_statistics(self, data_dict, logits):
+        """
+        Computes the statistics required by the BLEU score (clipped n-gram matches, number of n-grams & lengths) \
+        directly on the tensors of indexes, using :py:func:`miprometheus.utils.problems_utils.bleu.bleu_statistics`.
+
+        The predicted & target sentences are truncated at their first EOS (or PAD) token.
+
+        :param data_dict: DataDict({'inputs', 'inputs_length', 'inputs_text', 'targets', 'targets_length', \
+        'targets_indices', 'outputs_text'}).
+
+        :param logits: Predictions of the model.
+
+        :return: tuple (matches, ngrams, candidates_length, references_length).
+
+        """
+        # get most probable words indexes for the batch
+        _, top_indexes = logits.topk(k=1, dim=-1)
+
+        return bleu_statistics(top_indexes.squeeze(-1), data_dict['targets_indices'].to(top_indexes.device),
+                               max_order=self.bleu_max_order, eos_token=EOS_token, pad_token=PAD_token)
+
     def compute_BLEU_score(self, data_dict, logits):
         """
         Compute the BLEU score in order to evaluate the translation quality
@@ -110,6 +172,33 @@ class TextToTextProblem(SeqToSeqProblem):
 
             Reference paper: http://www.aclweb.org/anthology/P02-1040.pdf
 
+            To handle all samples within a batch, we compute the individual BLEU score for each pair\
+             of sentences (vectorized over the batch) and average over the batch size.
+
+            Uses the NLTK reference implementation (``compute_BLEU_score_nltk()``) if ``use_nltk_bleu`` is set.
+
+
+        :param data_dict: DataDict({'inputs', 'inputs_length', 'inputs_text', 'targets', 'targets_length', \
+        'targets_indices', 'outputs_text'}).
+
+        :param logits: Predictions of the model.
+
+        :return: Average BLEU Score for the batch ( 0 < BLEU < 1).
+
+        """
+        if self.use_nltk_bleu:
+            return self.compute_BLEU_score_nltk(data_dict, logits)
+
+        scores = sentence_bleu_scores(*self.compute_BLEU_statistics(data_dict, logits))
+
+        return round(scores.mean().item(), 4)
+
+    def compute_BLEU_score_nltk(self, data_dict, logits):
+        """
+        Compute the BLEU score using NLTK (reference implementation, used to verify the vectorized one).
+
+        .. note::
+
             Implementation inspired from https://machinelearningmastery.com/calculate-bleu-score-for-text-python/
 
 
@@ -126,7 +215,7 @@ class TextToTextProblem(SeqToSeqProblem):
         """
         # get most probable words indexes for the batch
         _, top_indexes = logits.topk(k=1, dim=-1)
-        logits = top_indexes.squeeze()
+        logits = top_indexes.squeeze(-1)
         batch_size = logits.shape[0]
 
         from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
@@ -137,17 +226,20 @@ class TextToTextProblem(SeqToSeqProblem):
             targets_text.append(sentence.split())
 
         # retrieve text sentences from the logits (which should be tensors of
-        # indexes)
+        # indexes), truncated at the first EOS token
         logits_text = []
-        for logit in logits:
+        for logit, length in zip(logits, sequences_length(logits, EOS_token, PAD_token)):
             logits_text.append(
-                [self.output_lang.index2word[index.item()] for index in logit])
+                [self.output_lang.index2word[index.item()] for index in logit[:length]])
+
+        weights = tuple([1. / self.bleu_max_order] * self.bleu_max_order)
 
         bleu_score = 0
         for i in range(batch_size):
             # compute bleu score and use a smoothing function
             bleu_score += sentence_bleu([targets_text[i]],
                                         logits_text[i],
+                                        weights=weights,
                                         smoothing_function=SmoothingFunction().method1)
 
         return round(bleu_score / batch_size, 4)
@@ -184,10 +276,19 @@ class TextToTextProblem(SeqToSeqProblem):
 
         """
         stat_col.add_statistic('bleu_score', '{:4.5f}')
+        stat_col.add_statistic('batch_size', '{:06d}')
+
+        # statistics accumulated over batches to compute the corpus-level BLEU score.
+        for n in range(1, self.bleu_max_order + 1):
+            stat_col.add_statistic('bleu_matches_{}'.format(n), '{:d}')
+            stat_col.add_statistic('bleu_ngrams_{}'.format(n), '{:d}')
+        stat_col.add_statistic('bleu_candidates_length', '{:d}')
+        stat_col.add_statistic('bleu_references_length', '{:d}')
 
     def collect_statistics(self, stat_col, data_dict, logits):
         """
-        Collects BLEU score.
+        Collects BLEU score, batch size (which varies when using dynamic batching) and the n-gram statistics \
+        used to compute the corpus-level BLEU score.
 
         :param stat_col: ``StatisticsCollector``
 
@@ -197,7 +298,63 @@ class TextToTextProblem(SeqToSeqProblem):
 
         """
 
-        stat_col['bleu_score'] = self.compute_BLEU_score(data_dict, logits)
+        matches, ngrams, candidates_length, references_length = self.compute_BLEU_statistics(data_dict, logits)
+
+        if self.use_nltk_bleu:
+            stat_col['bleu_score'] = self.compute_BLEU_score_nltk(data_dict, logits)
+        else:
+            stat_col['bleu_score'] = round(sentence_bleu_scores(
+                matches, ngrams, candidates_length, references_length).mean().item(), 4)
+        stat_col['batch_size'] = logits.shape[0]  # Batch major.
+
+        matches = matches.sum(dim=0).tolist()
+        ngrams = ngrams.sum(dim=0).tolist()
+        for n in range(1, self.bleu_max_order + 1):
+            stat_col['bleu_matches_{}'.format(n)] = int(matches[n - 1])
+            stat_col['bleu_ngrams_{}'.format(n)] = int(ngrams[n - 1])
+        stat_col['bleu_candidates_length'] = int(candidates_length.sum().item())
+        stat_col['bleu_references_length'] = int(references_length.sum().item())
+
+    def add_aggregators(self, stat_agg):
+        """
+        Adds problem-dependent statistical aggregators to ``StatisticsAggregator``.
+
+        :param stat_agg: ``StatisticsAggregator``.
+
+        """
+        stat_agg.add_aggregator('bleu_score', '{:4.5f}')  # represents the average BLEU score
+        stat_agg.add_aggregator('bleu_score_min', '{:4.5f}')
+        stat_agg.add_aggregator('bleu_score_max', '{:4.5f}')
+        stat_agg.add_aggregator('corpus_bleu_score', '{:4.5f}')
+        stat_agg.add_aggregator('samples_aggregated', '{:006d}')
+
+    def aggregate_statistics(self, stat_col, stat_agg):
+        """
+        Aggregates the statistics collected by ``StatisticsCollector`` and adds the results to ``StatisticsAggregator``.
+
+        .. note::
+
+            The average BLEU score is weighted by the batch sizes, as those vary when using dynamic batching.
+
+            The corpus-level BLEU score is computed from the n-gram statistics accumulated over all batches.
+
+        :param stat_col: ``StatisticsCollector``.
+
+        :param stat_agg: ``StatisticsAggregator``.
+
+        """
+        bleu_scores = torch.tensor(stat_col['bleu_score'], dtype=torch.float)
+        batch_sizes = torch.tensor(stat_col['batch_size'], dtype=torch.float)
+
+        stat_agg['bleu_score_min'] = min(stat_col['bleu_score'])
+        stat_agg['bleu_score_max'] = max(stat_col['bleu_score'])
+        stat_agg['bleu_score'] = torch.sum(bleu_scores * batch_sizes) / torch.sum(batch_sizes)
+        stat_agg['samples_aggregated'] = sum(stat_col['batch_size'])
+
+        stat_agg['corpus_bleu_score'] = corpus_bleu_score(
+            [sum(stat_col['bleu_matches_{}'.format(n)]) for n in range(1, self.bleu_max_order + 1)],
+            [sum(stat_col['bleu_ngrams_{}'.format(n)]) for n in range(1, self.bleu_max_order + 1)],
+            sum(stat_col['bleu_candidates_length']), sum(stat_col['bleu_references_length']))
 
     def show_sample(self, data_dict, sample=0):
         """
@@ -326,6 +483,30 @@ class TextToTextProblem(SeqToSeqProblem):
         """
         return [self.tensors_from_pair(pair, input_lang, output_lang) for pair in pairs]
 
+    def tokens_from_sentences(self, lang, sentences):
+        """
+        Tokenizes a list of sentences into one flat array of indexes (each sentence being terminated by the EOS \
+        token) and an array of offsets, so that the sentence ``i`` is ``tokens[offsets[i]:offsets[i+1]]``.
+
+        :param lang: instance of the ``Lang`` class, having a ``word2index`` dict.
+        :type lang: Lang
+
+        :param sentences: list of strings to convert word for word to indexes.
+        :type sentences: list
+
+        :return: tuple (tokens, offsets): ``np.int32`` array of indexes & ``np.int64`` array of offsets \
+        (of size ``len(sentences) + 1``).
+
+        """
+        indexes = [self.indexes_from_sentence(lang, sentence) for sentence in sentences]
+
+        offsets = np.zeros(len(indexes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(seq) for seq in indexes])
+
+        tokens = np.fromiter(itertools.chain.from_iterable(indexes), dtype=np.int32, count=offsets[-1])
+
+        return tokens, offsets
+
 
 class Lang(object):
     """
@@ -48,7 +48,9 @@ __author__ = "Vincent Marois"
 import os
 import random
 import pickle
+import hashlib
 
+import numpy as np
 import torch
 import errno
 
@@ -105,7 +107,10 @@ class TranslationAnki(TextToTextProblem):
         self.input_lang = None  # will be a Lang instance
         self.output_lang = None  # will be a Lang instance
         self.pairs = []  # will contain original string sentences
-        self.tensor_pairs = []  # will contain the tensors of indexes
+
+        # pre-tokenized sentences: flat arrays of indexes & offsets (one pair of arrays per side)
+        self.inputs_tokens, self.inputs_offsets = None, None
+        self.targets_tokens, self.targets_offsets = None, None
 
         # for datasets storage & handling
         self.root = os.path.expanduser(params['data_folder'])
@@ -123,15 +128,27 @@ class TranslationAnki(TextToTextProblem):
         self.input_lang = Lang('eng')
         self.output_lang = Lang(self.output_lang_name)
 
+        # whether to use the cached, pre-tokenized dataset (memory-mapped arrays stored in the processed folder)
+        params.add_default_params({'use_cache': True})
+        self.use_cache = params['use_cache']
+
         # preprocess source data
         self.download()
-        self.input_lang, self.output_lang, self.pairs = self.prepare_data()
 
-        # create tensors of indexes from string pairs
-        self.tensor_pairs = self.tensors_from_pairs(self.pairs, self.input_lang, self.output_lang)
+        if not (self.use_cache and self.load_cache()):
+            self.input_lang, self.output_lang, self.pairs = self.prepare_data()
+
+            # create flat arrays of indexes from string pairs
+            self.inputs_tokens, self.inputs_offsets = self.tokens_from_sentences(
+                self.input_lang, [pair[0] for pair in self.pairs])
+            self.targets_tokens, self.targets_offsets = self.tokens_from_sentences(
+                self.output_lang, [pair[1] for pair in self.pairs])
+
+            if self.use_cache:
+                self.save_cache()
 
         # get the dataset size
-        self.length = len(self.tensor_pairs)
+        self.length = len(self.pairs)
 
         # create the nn.Embedding layer for the input vocabulary set
         self.logger.info('Constructing random embeddings for the input vocabulary set')
@@ -184,6 +201,7 @@ class TranslationAnki(TextToTextProblem):
                                  'inputs_text': {'size': [-1, -1], 'type': [list, str]},
                                  'targets': {'size': [-1, -1, self.embedding_dim], 'type': [torch.Tensor]},
                                  'targets_length': {'size': [-1, 1], 'type': [list, int]},
+                                 'targets_indices': {'size': [-1, -1], 'type': [torch.Tensor]},
                                  'targets_text': {'size': [-1, -1], 'type': [list, str]}
                                  }
 
@@ -236,6 +254,9 @@ class TranslationAnki(TextToTextProblem):
 
         self.logger.info("Trimmed to {} sentence pairs".format(len(self.pairs)))
 
+        # compute the number of tokens of each pair once (+1 for the EOS token), used by dynamic batching.
+        self.sample_lengths = [max(len(p[0].split(' ')), len(p[1].split(' '))) + 1 for p in self.pairs]
+
         # fill in Lang() objects with some info
         for pair in self.pairs:
             self.input_lang.add_sentence(pair[0])
@@ -246,6 +267,77 @@ class TranslationAnki(TextToTextProblem):
 
         return self.input_lang, self.output_lang, self.pairs
 
+    def get_cache_prefix(self):
+        """
+        Returns the path prefix of the files of the cached, pre-tokenized dataset.
+
+        The cache is keyed on the language, the size filters, the reversal setting and the source file, so that \
+        changing any of them creates a new cache instead of using an invalid one.
+
+        :return: path prefix (in the processed folder).
+
+        """
+        source_file = os.path.join(self.root, self.processed_folder,
+                                   self.training_file if self.use_train_data else self.test_file)
+        source_stat = os.stat(source_file)
+
+        eng_prefixes = list(self.eng_prefixes) if self.eng_prefixes is not None else None
+        key = repr((self.output_lang_name, self.training_size, self.use_train_data, self.max_sequence_length,
+                    eng_prefixes, self.reverse, source_stat.st_size, source_stat.st_mtime))
+
+        return os.path.join(self.root, self.processed_folder, 'eng-{}_{}_{}'.format(
+            self.output_lang_name, 'training' if self.use_train_data else 'test',
+            hashlib.md5(key.encode('utf-8')).hexdigest()[:12]))
+
+    def save_cache(self):
+        """
+        Saves the pre-tokenized dataset to the processed folder: one flat ``int32`` array of indexes plus one \
+        array of offsets per side, and the ``Lang`` instances & sentences pairs.
+
+        """
+        prefix = self.get_cache_prefix()
+        self.logger.info('Saving the pre-tokenized dataset to {}_*'.format(prefix))
+
+        np.save(prefix + '_inputs_tokens.npy', self.inputs_tokens)
+        np.save(prefix + '_inputs_offsets.npy', self.inputs_offsets)
+        np.save(prefix + '_targets_tokens.npy', self.targets_tokens)
+        np.save(prefix + '_targets_offsets.npy', self.targets_offsets)
+
+        # the meta file is written last: its presence indicates a complete cache.
+        with open(prefix + '_meta.pkl', 'wb') as f:
+            pickle.dump({'input_lang': self.input_lang,
+                         'output_lang': self.output_lang,
+                         'pairs': self.pairs,
+                         'sample_lengths': self.sample_lengths}, f)
+
+    def load_cache(self):
+        """
+        Loads the pre-tokenized dataset from the processed folder, memory-mapping the arrays of indexes.
+
+        :return: True if the cache was found & loaded, else False.
+
+        """
+        prefix = self.get_cache_prefix()
+        if not os.path.isfile(prefix + '_meta.pkl'):
+            self.logger.info('Pre-tokenized dataset not found, preparing the data')
+            return False
+
+        self.logger.info('Loading the pre-tokenized dataset from {}_*'.format(prefix))
+        with open(prefix + '_meta.pkl', 'rb') as f:
+            meta = pickle.load(f)
+
+        self.input_lang = meta['input_lang']
+        self.output_lang = meta['output_lang']
+        self.pairs = meta['pairs']
+        self.sample_lengths = meta['sample_lengths']
+
+        self.inputs_tokens = np.load(prefix + '_inputs_tokens.npy', mmap_mode='r')
+        self.inputs_offsets = np.load(prefix + '_inputs_offsets.npy')
+        self.targets_tokens = np.load(prefix + '_targets_tokens.npy', mmap_mode='r')
+        self.targets_offsets = np.load(prefix + '_targets_offsets.npy')
+
+        return True
+
     def _check_exists(self):
         """
         :return: True if the training & inference datasets (of the specified training\
@@ -384,33 +476,41 @@ class TranslationAnki(TextToTextProblem):
 
     def __getitem__(self, index):
         """
-        Retrieves a sample from ``self.tensor_pairs`` and get the associated strings from ``self.pairs``.
+        Slices a sample from the pre-tokenized arrays and get the associated strings from ``self.pairs``.
 
 
         :param index: index of the sample to return.
         :type index: int
 
-        :return: DataDict({'inputs', 'inputs_length', 'inputs_text' 'targets', 'targets_length', 'targets_text'}).
+        :return: DataDict({'inputs', 'inputs_length', 'inputs_text' 'targets', 'targets_length', 'targets_indices', \
+        'targets_text'}).
 
         """
         # get tensors and strings
-        input_tensor, target_tensor = self.tensor_pairs[index]
+        input_tensor = torch.from_numpy(
+            self.inputs_tokens[self.inputs_offsets[index]:self.inputs_offsets[index + 1]].astype(np.int64))
+        target_tensor = torch.from_numpy(
+            self.targets_tokens[self.targets_offsets[index]:self.targets_offsets[index + 1]].astype(np.int64))
         input_text, target_text = self.pairs[index]
 
+        # keep the indexes of the output sentence (used to compute the BLEU score)
+        target_indices = target_tensor
+
         # embed the input sentence:
-        input_tensor = self.input_embed_layer(torch.LongTensor(input_tensor)).type(torch.FloatTensor)
+        input_tensor = self.input_embed_layer(input_tensor).type(torch.FloatTensor)
 
         # embed the output sentence:
-        target_tensor = self.output_embed_layer(torch.LongTensor(target_tensor)).type(torch.FloatTensor)
+        target_tensor = self.output_embed_layer(target_tensor).type(torch.FloatTensor)
 
         # return data_dict
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
         data_dict['inputs'] = input_tensor
         data_dict['inputs_length'] = len(input_tensor)
         data_dict['inputs_text'] = input_text
 
         data_dict['targets'] = target_tensor
         data_dict['targets_length'] = len(target_tensor)
+        data_dict['targets_indices'] = target_indices
         data_dict['targets_text'] = target_text
 
         return data_dict
@@ -433,40 +533,29 @@ class TranslationAnki(TextToTextProblem):
         :param batch: Individual samples to combine
         :type batch: list
 
-        :return: ``DataDict({'inputs', 'inputs_length', 'inputs_text' 'targets', 'targets_length', 'targets_text'})``\
+        :return: ``DataDict({'inputs', 'inputs_length', 'inputs_text' 'targets', 'targets_length', 'targets_indices', \
+        'targets_text'})``\
         containing the batch.
 
         """
-        batch_size = len(batch)
-
-        # get max input sentence length, create tensor of shape [batch_size x max_input_length] & sort inputs by
-        # decreasing length
-        max_input_len = max(map(lambda x: x['inputs_length'], batch))
-        sort_by_len = sorted(batch, key=lambda x: x['inputs_length'], reverse=True)
-
-        # create tensor containing the embedded input sentences
-        inputs = torch.zeros(batch_size, max_input_len, self.embedding_dim).type(torch.FloatTensor)
-
-        # get max output sentence length
-        max_output_len = max(map(lambda x: x['targets_length'], batch))
-        # create tensor containing the embedded output sentences
-        outputs = torch.zeros(batch_size, max_output_len, self.embedding_dim).type(torch.FloatTensor)
+        # sort the samples by decreasing input sentence length
+        lengths, order = torch.tensor([elt['inputs_length'] for elt in batch]).sort(descending=True)
+        sort_by_len = [batch[i] for i in order.tolist()]
 
         # construct the DataDict and fill it with the batch
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
+        data_dict = self.create_data_dict()
 
-        data_dict['inputs_length'] = [elt['inputs_length'] for elt in sort_by_len]
+        data_dict['inputs_length'] = lengths.tolist()
         data_dict['inputs_text'] = [elt['inputs_text'] for elt in sort_by_len]
 
         data_dict['targets_length'] = [elt['targets_length'] for elt in sort_by_len]
         data_dict['targets_text'] = [elt['targets_text'] for elt in sort_by_len]
 
-        for i, length in enumerate(data_dict['inputs_length']):  # only way to do this?
-            inputs[i, :length, :] = sort_by_len[i]['inputs']
-            outputs[i, :data_dict['targets_length'][i], :] = sort_by_len[i]['targets']
-
-        data_dict['inputs'] = inputs
-        data_dict['targets'] = outputs
+        # pad the (embedded) sentences to the longest one, with zeros (i.e. PAD_token for the indexes)
+        pad = torch.nn.utils.rnn.pad_sequence
+        data_dict['inputs'] = pad([elt['inputs'] for elt in sort_by_len], batch_first=True)
+        data_dict['targets'] = pad([elt['targets'] for elt in sort_by_len], batch_first=True)
+        data_dict['targets_indices'] = pad([elt['targets_indices'] for elt in sort_by_len], batch_first=True)
 
         return data_dict
 
@@ -530,6 +619,7 @@ if __name__ == "__main__":
                                'eng_prefixes': eng_prefixes,
                                'use_train_data': True,
                                'data_folder': '~/data/language',
+                               'use_cache': True,
                                'reverse': False})
 
     batch_size = 64
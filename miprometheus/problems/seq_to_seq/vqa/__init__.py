@@ -1,2 +1,7 @@
-from .vqa_problem import VQAProblem
-from .cog import *
\ No newline at end of file
+from miprometheus.utils.lazy_import import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'VQAProblem': '.vqa_problem'
+}, subpackages=[
+    '.cog'
+])
@@ -1,3 +1,5 @@
-from .cog import COG
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['COG']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'COG': '.cog'
+})
@@ -37,7 +37,9 @@ import torch
 import gzip
 import json
 import os
+import re
 import tarfile
+import multiprocessing
 import numpy as np
 
 from miprometheus.problems.seq_to_seq.vqa.vqa_problem import VQAProblem
@@ -70,7 +72,12 @@ class COG(VQAProblem):
 				Only the selected tasks will be used.
 				- ``self.dataset_type`` (`string`) : Which dataset to use, 'canonical', 'hard', or \
 				'generated'. If 'generated', please specify 'examples_per_task', 'sequence_length', \
-				'memory_length', and 'max_distractors' under 'generation'. Can also specify 'nr_processors' for generation.
+				'memory_length', and 'max_distractors' under 'generation'. Can also specify 'nr_processors' for generation \
+				(all the splits are generated in parallel, straight into the indexed shard format) and its 'seed'.
+				- ``self.image_mode`` (`string`) : 'render' to render the frames on the fly in __getitem__, or 'cache' \
+				to pre-render them once (in parallel over 'cache_processes' processes) into memory-mapped arrays.
+				- ``self.cache_processes`` (`int`) : 'cache_processes', or 'processes' if set. 'processes' also \
+				overrides 'nr_processors' of 'generation', so that all the preprocessing uses the same number of processes.
 
 			- Adds the following as default params:
 
@@ -78,6 +85,9 @@ class COG(VQAProblem):
 				>>>  'set': 'train',
 				>>>  'tasks': 'class',
 				>>>  'dataset_type': 'canonical',
+				>>>  'image_mode': 'render',
+				>>>  'cache_processes': 1,
+				>>>  'processes': None,
 				>>>  'initialization_only': False}
 
 			- Sets:
@@ -103,6 +113,9 @@ class COG(VQAProblem):
 		self.params.add_default_params({'data_folder': os.path.expanduser('~/data/cog'), 'set': 'train',
 										'tasks': 'class',
 										'dataset_type': 'canonical',
+										'image_mode': 'render',
+										'cache_processes': 1,
+										'processes': None,
 										'initialization_only': False})
 
 		# Retrieve parameters from the dictionary
@@ -117,6 +130,10 @@ class COG(VQAProblem):
 		self.dataset_type = params['dataset_type']
 		assert self.dataset_type in ['canonical', 'hard', 'generated'], "dataset in configuration file must be one of " \
 																		"'canonical', 'hard', or 'generated', got {}".format(self.dataset_type)
+		self.image_mode = params['image_mode']
+		assert self.image_mode in ['render', 'cache'], "image_mode in configuration file must be one of 'render' or " \
+													   "'cache', got {}".format(self.image_mode)
+		self.cache_processes = params['cache_processes'] if params['processes'] is None else params['processes']
 
 		# Parse task and dataset_type
 		self.parse_tasks_and_dataset_type(params)
@@ -144,39 +161,21 @@ class COG(VQAProblem):
 		# Check if dataset exists, download or generate if necessary.
 		self.source_dataset()
 
+		# Index the examples of the shards (decompressing them once), so that they can be read one by one.
+		self.build_index()
+
+		# Pre-render the frames of the examples of the shards, if required.
+		if self.image_mode == 'cache':
+			self.build_image_cache()
+
 		if not params['initialization_only']:
 
-			# Load all the .jsons, but image generation is done in __getitem__
-			self.dataset = {}
-			for task in self.tasks:
-				self.dataset[task] = []
-			self.length = 0
-	
-			self.logger.info("Loading dataset as json into memory.")
-			# Val and Test are not shuffled
-			if self.set == 'val' or self.set == 'test':
-				for tasklist in os.listdir(self.data_folder_child):
-					if tasklist[4:-8] in self.tasks:
-						with gzip.open(os.path.join(self.data_folder_child,tasklist)) as f:
-							fulltask = f.read().decode('utf-8').split('\n')
-							for datapoint in fulltask:
-								self.dataset[tasklist[4:-8]].append(json.loads(datapoint))
-						self.length = self.length + len(self.dataset[tasklist[4:-8]])
-						self.logger.info("{} task examples loaded.".format(tasklist[4:-8]))
-					else:
-						self.logger.info("Skipped loading {} task.".format(tasklist[4:-8]))
-		
-			# Training set is shuffled
-			elif self.set == 'train':
-				for zipfile in os.listdir(self.data_folder_child):
-					with gzip.open(os.path.join(self.data_folder_child,zipfile)) as f:
-						fullzip = f.read().decode('utf-8').split('\n')
-						for datapoint in fullzip:
-							task = json.loads(datapoint)
-							if task['family'] in self.tasks:
-								self.dataset[task['family']].append(task)
-								self.length = self.length + 1
-					self.logger.info("Zip file {} loaded.".format(zipfile))
+			# Load the index of all the examples, but decoding & image generation are done in __getitem__
+			self.load_index()
+
+			# Shards files & pre-rendered frames, opened lazily (i.e. once per DataLoader worker).
+			self.shard_files = {}
+			self.shard_frames = {}
 
 		else:
 			self.logger.info("COG initialization complete.")
@@ -203,6 +202,9 @@ class COG(VQAProblem):
 		i = index % len(self.tasks)
 		j = int(index / len(self.tasks))
 
+		# Seek & decode the requested example only.
+		example = self.read_example(self.tasks[i], j)
+
 		# This returns:
 		# All variables are numpy array of float32
 		# in_imgs: (n_epoch*batch_size, img_size, img_size, 3)
@@ -214,14 +216,18 @@ class COG(VQAProblem):
 		# mask_pnt: (n_epoch*batch_size)
 		# mask_word: (n_epoch*batch_size)
 
-		output = jti.json_to_feeds([self.dataset[self.tasks[i]][j]])[0]
-		images = ((torch.from_numpy(output)).permute(1, 0, 4, 2, 3)).squeeze()
+		if self.image_mode == 'cache':
+			# Read the pre-rendered frames: [sequence_length, img_size, img_size, 3], converted to float in collate_fn.
+			images = torch.from_numpy(self.read_frames(self.tasks[i], j)).permute(0, 3, 1, 2)
+		else:
+			output = jti.json_to_feeds([example])[0]
+			images = ((torch.from_numpy(output)).permute(1, 0, 4, 2, 3)).squeeze()
 				
 		data_dict = self.create_data_dict()
 		data_dict['images'] = images
 		data_dict['tasks'] = [self.tasks[i]]
-		data_dict['questions'] = [self.dataset[self.tasks[i]][j]['question']]
-		answers = self.dataset[self.tasks[i]][j]['answers']
+		data_dict['questions'] = [example['question']]
+		answers = example['answers']
 
 		if self.tasks[i] in self.classification_tasks:
 			data_dict['targets_reg'] = torch.FloatTensor([0, 0]).expand(self.sequence_length,2)
@@ -232,6 +238,249 @@ class COG(VQAProblem):
 
 		return data_dict
 
+	def shards_to_index(self):
+		"""
+		Lists the (compressed) shards of the selected set containing examples of the selected tasks.
+
+		:return: list of shards filenames.
+
+		"""
+		# Only the finished shards: skip the temporary files of an ongoing (or interrupted) generation.
+		shards = sorted(shard for shard in os.listdir(self.data_folder_child)
+						if shard.endswith('.json.gz') or shard.endswith('.json'))
+
+		# Val and Test have a shard per task (cog_<task>.json[.gz]): skip the unselected ones.
+		if self.set == 'val' or self.set == 'test':
+			shards = [shard for shard in shards if shard.split('.')[0][len('cog_'):] in self.tasks]
+
+		return shards
+
+	def build_index(self):
+		"""
+		Builds the index of the examples of each shard which has not been indexed yet.
+
+		Each shard is decompressed once into ``self.data_folder_index``, and a sidecar index file \
+		(``<shard>.index.npz``) stores the byte offsets (``starts``, ``ends``) & the task family of each example.
+
+		"""
+		os.makedirs(self.data_folder_index, exist_ok=True)
+
+		family_pattern = re.compile(rb'"family": "(\w+)"')
+
+		for shard in self.shards_to_index():
+			name = shard[:-3] if shard.endswith('.gz') else shard
+			index_filename = os.path.join(self.data_folder_index, name + '.index.npz')
+
+			# The index file is written last: if it exists, the shard is complete.
+			if os.path.isfile(index_filename):
+				continue
+
+			open_fn = gzip.open if shard.endswith('.gz') else open
+			with open_fn(os.path.join(self.data_folder_child, shard), 'rb') as f:
+				data = f.read()
+
+			# Write the decompressed shard under a temporary name first.
+			with open(os.path.join(self.data_folder_index, name + '.tmp'), 'wb') as f:
+				f.write(data)
+			os.replace(os.path.join(self.data_folder_index, name + '.tmp'), os.path.join(self.data_folder_index, name))
+
+			# Byte offsets of the lines, skipping the empty ones.
+			newlines = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))
+			starts = np.concatenate(([0], newlines + 1)).astype(np.int64)
+			ends = np.concatenate((newlines, [len(data)])).astype(np.int64)
+			starts, ends = starts[ends > starts], ends[ends > starts]
+
+			# Family of each example: read from the raw line, without decoding it entirely.
+			families = []
+			for start, end in zip(starts, ends):
+				match = family_pattern.search(data, start, end)
+				families.append(match.group(1).decode('utf-8') if match else json.loads(data[start:end])['family'])
+
+			with open(index_filename + '.tmp', 'wb') as f:
+				np.savez(f, starts=starts, ends=ends, families=np.array(families))
+			os.replace(index_filename + '.tmp', index_filename)
+
+			self.logger.info("Shard {} indexed ({} examples).".format(shard, len(starts)))
+
+	def load_index(self):
+		"""
+		Loads the sidecar indexes of the shards and gathers, for each selected task, the shard & byte offsets of \
+		its examples in ``self.index``.
+
+		"""
+		self.shards = []
+		index = {task: ([], [], [], []) for task in self.tasks}
+
+		for shard in self.shards_to_index():
+			name = shard[:-3] if shard.endswith('.gz') else shard
+			with np.load(os.path.join(self.data_folder_index, name + '.index.npz')) as shard_index:
+				starts, ends, families = shard_index['starts'], shard_index['ends'], shard_index['families']
+
+			for task in self.tasks:
+				mask = families == task
+				if mask.any():
+					index[task][0].append(np.full(mask.sum(), len(self.shards), dtype=np.int32))
+					index[task][1].append(starts[mask])
+					index[task][2].append(ends[mask])
+					index[task][3].append(np.flatnonzero(mask))
+
+			self.shards.append(os.path.join(self.data_folder_index, name))
+
+		# Concatenate the offsets of each task: (shards, starts, ends, rows in the shard).
+		self.index = {}
+		for task, arrays in index.items():
+			self.index[task] = tuple(np.concatenate(a) if a else np.zeros(0, dtype=np.int64) for a in arrays)
+			self.logger.info("{} task: {} examples indexed.".format(task, len(self.index[task][0])))
+
+		self.length = sum(len(arrays[0]) for arrays in self.index.values())
+
+	def read_example(self, task, j):
+		"""
+		Reads & decodes the j-th example of the given task from its shard.
+
+		:param task: task family.
+		:type task: str
+
+		:param j: index of the example among the examples of this task.
+		:type j: int
+
+		:return: example as a dict.
+
+		"""
+		shards, starts, ends, _ = self.index[task]
+		shard = int(shards[j])
+
+		if shard not in self.shard_files:
+			self.shard_files[shard] = open(self.shards[shard], 'rb')
+
+		f = self.shard_files[shard]
+		f.seek(int(starts[j]))
+
+		return json.loads(f.read(int(ends[j] - starts[j])).decode('utf-8'))
+
+	def __getstate__(self):
+		"""
+		Excludes the open shards files from pickling (e.g. when the DataLoader workers are spawned).
+
+		"""
+		state = self.__dict__.copy()
+		state['shard_files'] = {}
+		state['shard_frames'] = {}
+		return state
+
+	def worker_init_fn(self, worker_id):
+		"""
+		Calls the base ``worker_init_fn`` and discards the shards files & frames inherited from the main process.
+
+		.. note::
+
+			A file inherited through fork shares its offset with the other processes: the concurrent seek() & read() \
+			would return the bytes of other examples. Each DataLoader worker thus opens its own files.
+
+		:param worker_id: the worker id (in [0, :py:class:`torch.utils.data.DataLoader`.num_workers - 1])
+		:type worker_id: int
+
+		"""
+		super(COG, self).worker_init_fn(worker_id)
+
+		self.shard_files = {}
+		self.shard_frames = {}
+
+	def build_image_cache(self):
+		"""
+		Pre-renders the frames of all the examples of each indexed shard which does not have them yet, in parallel \
+		over ``self.cache_processes`` processes (i.e. over the tasks for Val and Test).
+
+		The frames of a shard are stored as a ``uint8`` memory-mapped array (``<shard>.frames.npy``) of shape \
+		[num_examples x sequence_length x img_size x img_size x 3], in the order of the examples in the shard.
+
+		"""
+		tasks = []
+		for shard in self.shards_to_index():
+			name = shard[:-3] if shard.endswith('.gz') else shard
+			frames_filename = os.path.join(self.data_folder_index, name + '.frames.npy')
+
+			if not os.path.isfile(frames_filename):
+				tasks.append((os.path.join(self.data_folder_index, name), frames_filename, self.img_size))
+
+		if not tasks:
+			return
+
+		self.logger.info("Pre-rendering the frames of {} shards.".format(len(tasks)))
+		if self.cache_processes > 1 and len(tasks) > 1:
+			with multiprocessing.Pool(processes=min(self.cache_processes, len(tasks))) as pool:
+				for frames_filename in pool.imap_unordered(COG.render_shard, tasks):
+					self.logger.info("Frames stored in {}.".format(frames_filename))
+		else:
+			for task in tasks:
+				self.logger.info("Frames stored in {}.".format(COG.render_shard(task)))
+
+	@staticmethod
+	def render_shard(task, batch_size=100):
+		"""
+		Renders the frames of all the examples of a decompressed shard, by batches, and writes them into a \
+		``uint8`` memory-mapped array (run by the processes of the pool).
+
+		:param task: tuple (shard filename, frames filename, image size).
+		:type task: tuple
+
+		:param batch_size: number of examples rendered at once.
+		:type batch_size: int
+
+		:return: the frames filename.
+
+		"""
+		shard_filename, frames_filename, img_size = task
+
+		with np.load(shard_filename + '.index.npz') as shard_index:
+			starts, ends = shard_index['starts'], shard_index['ends']
+
+		frames = None
+		with open(shard_filename, 'rb') as f:
+			data = f.read()
+
+		for first in range(0, len(starts), batch_size):
+			examples = [json.loads(data[start:end].decode('utf-8'))
+						for start, end in zip(starts[first:first + batch_size], ends[first:first + batch_size])]
+
+			# [sequence_length, batch_size, img_size, img_size, 3] -> batch major.
+			output = np.swapaxes(jti.json_to_feeds(examples)[0], 0, 1)
+
+			# Written under a temporary name, so that a partial file is never used.
+			if frames is None:
+				frames = np.lib.format.open_memmap(frames_filename + '.tmp', mode='w+', dtype=np.uint8,
+												   shape=(len(starts),) + output.shape[1:])
+
+			frames[first:first + len(examples)] = output
+
+		frames.flush()
+		del frames
+		os.replace(frames_filename + '.tmp', frames_filename)
+
+		return frames_filename
+
+	def read_frames(self, task, j):
+		"""
+		Reads the pre-rendered frames of the j-th example of the given task.
+
+		:param task: task family.
+		:type task: str
+
+		:param j: index of the example among the examples of this task.
+		:type j: int
+
+		:return: ``np.ndarray`` of shape [sequence_length x img_size x img_size x 3] (``uint8``).
+
+		"""
+		shards, _, _, rows = self.index[task]
+		shard = int(shards[j])
+
+		if shard not in self.shard_frames:
+			# Copy-on-write mode, so that the frames can be wrapped into tensors without copy.
+			self.shard_frames[shard] = np.load(self.shards[shard] + '.frames.npy', mmap_mode='c')
+
+		return self.shard_frames[shard][int(rows[j])]
+
 	def collate_fn(self, batch):
 		"""
 		Combines a list of :py:class:`miprometheus.utils.DataDict` (retrieved with :py:func:`__getitem__`) into a batch.
@@ -294,13 +543,15 @@ class COG(VQAProblem):
 			self.memory_length = 7
 			self.max_distractors = 10
 		elif self.dataset_type == 'generated':
-			self.params.add_default_params({'generation':{'nr_processors':1}})
+			self.params.add_default_params({'generation':{'nr_processors':1, 'seed':0}})
 			try:
 				self.examples_per_task = int(params['generation']['examples_per_task'])
 				self.sequence_length = int(params['generation']['sequence_length'])
 				self.memory_length = int(params['generation']['memory_length'])
 				self.max_distractors = int(params['generation']['max_distractors'])
-				self.nr_processors = int(params['generation']['nr_processors'])
+				self.nr_processors = int(params['generation']['nr_processors'] if params['processes'] is None
+										 else params['processes'])
+				self.generation_seed = int(params['generation']['seed'])
 			except KeyError:
 				self.logger.info("Please specify examples per task, sequence length, memory length and maximum distractors "
 					  "for a generated dataset under 'dataset_type'.")
@@ -313,6 +564,8 @@ class COG(VQAProblem):
 		self.dataset_name = str(self.sequence_length)+'_'+str(self.memory_length)+'_'+str(self.max_distractors)
 		self.data_folder_parent = os.path.join(self.data_folder_main,'data_'+self.dataset_name) 
 		self.data_folder_child = os.path.join(self.data_folder_parent,self.set+'_'+self.dataset_name)
+		# Decompressed shards & their sidecar indexes
+		self.data_folder_index = os.path.join(self.data_folder_parent,'index_'+self.set+'_'+self.dataset_name)
 		
 	def source_dataset(self):
 		"""
@@ -336,15 +589,17 @@ class COG(VQAProblem):
 			self.logger.info('\nClean-up complete! Dataset ready.')
 
 		else:
-			self.download = self.check_and_download(self.data_folder_child)
-			if self.download:			
-				from miprometheus.problems.seq_to_seq.vqa.cog.cog_utils import generate_dataset
+			from miprometheus.problems.seq_to_seq.vqa.cog.cog_utils import generate_dataset
+			# The marker is written once all the shards are: otherwise resume the generation (finished shards are skipped).
+			self.download = not os.path.isfile(generate_dataset.completion_marker(self.data_folder_parent, self.dataset_name))
+			if self.download:
 				generate_dataset.main(self.data_folder_parent,
 															self.examples_per_task, 
 															self.sequence_length, 
 															self.memory_length, 
 															self.max_distractors,
-															self.nr_processors)
+															self.nr_processors,
+															seed=self.generation_seed)
 				self.logger.info('\nDataset generation complete for {}!'.format(self.dataset_name))
 
 	def add_statistics(self, stat_col):
@@ -495,24 +750,33 @@ if __name__ == "__main__":
 																										  batch_size,
 																										  postbatch-prebatch))
 	
-		# Test pregeneration and loading
+		# Test loading the pre-rendered frames.
+		params = ParamInterface()
+		params.add_config_params({
+			'data_folder': '~/data/cog/',
+			'set': 'val',
+			'dataset_type': 'canonical',
+			'tasks': 'all',
+			'image_mode': 'cache',
+			'cache_processes': 8})
+
+		precache = time.time()
+		cached_cog_canonical = COG(params)
+		postcache = time.time()
+
+		dataloader = DataLoader(dataset=cached_cog_canonical, collate_fn=cached_cog_canonical.collate_fn,
+								batch_size=batch_size, shuffle=True, num_workers=8)
+
+		preload = time.time()
 		for i, batch in enumerate(dataloader):
 			if i == testbatches:
-				print('Finished saving {} batches'.format(testbatches))
 				break
-			if not os.path.exists(os.path.expanduser('~/data/cogtest')):
-				os.makedirs(os.path.expanduser('~/data/cogtest'))
-			np.save(os.path.expanduser('~/data/cogtest/'+str(i)),batch['images'])
-
-		preload = time.time()
-		for i in range(testbatches):
-			mockload = np.fromfile(os.path.expanduser('~/data/cogtest/'+str(i)+'.npy'))
 		postload = time.time()
-		print('Generation time for {} batches: {}, Load time for {} batches: {}'.format(testbatches, postbatch-prebatch, 
+
+		print('Time taken to pre-render the frames (if not already cached): {}s'.format(postcache - precache))
+		print('Generation time for {} batches: {}, Load time for {} batches: {}'.format(testbatches, postbatch-prebatch,
 												testbatches, postload-preload))
 
-		print('Timing test completed, removing files.')
-		for i in range(testbatches):
-			os.remove(os.path.expanduser('~/data/cogtest/'+str(i)+'.npy'))
-	
+		print('Timing test completed.')
+
 	print('Done!')
@@ -21,7 +21,8 @@ import json
 import multiprocessing
 import os
 import random
-import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
@@ -71,57 +72,6 @@ def generate_example(memory_length, max_distractors, task_family, epochs):
   return example, objset, task
 
 
-class FileWriter(object):
-  """Writes per_file examples in a file. Then, picks a new file."""
-  def __init__(self, base_name, per_file=100, start_index=0, compress=True):
-    self.per_file = per_file
-    self.base_name = base_name
-    self.compress = compress
-    self.cur_file_index = start_index - 1
-    self.cur_file = None
-    self.written = 0
-    self.file_names = []
-
-    self._new_file()
-
-  def _file_name(self):
-    return '%s_%d.json' % (self.base_name, self.cur_file_index)
-
-  def _new_file(self):
-    if self.cur_file:
-      self.close()
-
-    self.written = 0
-    self.cur_file_index += 1
-    # 'b' is needed because we want to seek from the end. Text files
-    # don't allow seeking from the end (because width of one char is
-    # not fixed)
-    self.cur_file = open(self._file_name(), 'wb')
-    self.file_names.append(self._file_name())
-
-  def write(self, data):
-    if self.written >= self.per_file:
-      self._new_file()
-    self.cur_file.write(data)
-    self.cur_file.write(b'\n')
-    self.written += 1
-
-  def close(self):
-    self.cur_file.seek(-1, os.SEEK_END)
-    # Remove last new line
-    self.cur_file.truncate()
-    self.cur_file.close()
-
-    if self.compress:
-      # Compress the file and delete the original. We can write to compressed
-      # file immediately because truncate() does not work on compressed files.
-      with open(self._file_name(), 'rb') as f_in, \
-          gzip.open(self._file_name() + '.gz', 'wb') as f_out:
-        shutil.copyfileobj(f_in, f_out)
-
-      os.remove(self._file_name())
-
-
 def mkdir(path):
   try:
     os.makedirs(path)
@@ -132,103 +82,151 @@ def mkdir(path):
       raise
 
 
-def generate_dataset(epochs, max_distractors, memory_length,
-                     examples_per_task, output_dir,
-                     random_families, start_index=0,
-                     per_file=10000, compress=True):
-  print("Generating dataset into %s:\n  examples per family=%d\n  epochs=%d"
-        "\n  start_index=%d\n  per_file=%d"
-        % (output_dir, examples_per_task, epochs, start_index, per_file))
-  if not os.path.exists(output_dir):
+def write_indexed_shard(output_dir, index_dir, name, dumps, families):
+  """Writes a shard in the indexed format read by the COG problem.
+
+  The shard is written both compressed (output_dir/name.gz) and decompressed
+  (index_dir/name), along with its sidecar index (index_dir/name.index.npz),
+  which contains the byte offsets & the family of each example. The index is
+  written last: a shard is complete only if its index exists.
+
+  Args:
+    output_dir: str, folder of the compressed shards.
+    index_dir: str, folder of the decompressed shards & indexes.
+    name: str, filename of the shard, e.g. cog_0.json.
+    dumps: list of bytes, json dumps of the examples.
+    families: list of str, family of each example.
+  """
+  data = b'\n'.join(dumps)
+
+  lengths = np.array([len(d) for d in dumps], dtype=np.int64)
+  starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+  ends = starts + lengths
+
+  # Files are written under temporary names, so that a partial file is never used.
+  with gzip.open(os.path.join(output_dir, name + '.gz.tmp'), 'wb') as f:
+    f.write(data)
+  os.replace(os.path.join(output_dir, name + '.gz.tmp'), os.path.join(output_dir, name + '.gz'))
+
+  with open(os.path.join(index_dir, name + '.tmp'), 'wb') as f:
+    f.write(data)
+  os.replace(os.path.join(index_dir, name + '.tmp'), os.path.join(index_dir, name))
+
+  index_filename = os.path.join(index_dir, name + '.index.npz')
+  with open(index_filename + '.tmp', 'wb') as f:
+    np.savez(f, starts=starts, ends=ends, families=np.array(families))
+  os.replace(index_filename + '.tmp', index_filename)
+
+
+def generate_shard(job):
+  """Generates the examples of a shard (run by the processes of the pool).
+
+  Args:
+    job: tuple (output_dir, index_dir, name, families, memory_length,
+      max_distractors, epochs, seed). families is the list of the families
+      of the examples to generate, in order.
+
+  Returns:
+    (output_dir, index_dir, name, dumps, families): the arguments of
+      write_indexed_shard.
+  """
+  output_dir, index_dir, name, families, memory_length, max_distractors, epochs, seed = job
+
+  # Both generators are used by the task bank.
+  random.seed(seed)
+  np.random.seed(seed % 2 ** 32)
+
+  dumps = []
+  for family in families:
+    example, _, _ = generate_example(memory_length, max_distractors, family, epochs)
+    dump_str = json.dumps(example, sort_keys=True, separators=(',', ': '))
+    assert '\n' not in dump_str, 'dumps_str has new line %s' % (dump_str,)
+    dumps.append(dump_str.encode())
+
+  return output_dir, index_dir, name, dumps, families
+
+
+def shard_seed(seed, data_type, index):
+  """Returns the deterministic seed of a shard, from the base seed, the split
+  and the index of the shard in the split."""
+  return zlib.crc32(('%d_%s_%d' % (seed, data_type, index)).encode())
+
+
+def completion_marker(path, cog_variant):
+  """Returns the path of the file written by main once all the shards of a
+  dataset are written."""
+  return os.path.join(path, 'complete_%s' % cog_variant)
+
+
+def main(path, examples_per_task, sequence_length, memory_length, max_distractors, nr_processors,
+         per_file=10000, seed=0, nr_writers=2):
+  """Generates the train, val & test splits of a COG dataset in parallel.
+
+  The splits are cut into shards (per_file random families for train, one
+  family for val & test), generated by nr_processors processes with a
+  deterministic seed per shard. The shards are compressed and written by a
+  separate pool of nr_writers threads, straight into the indexed shard format.
+  Shards already written (e.g. by an interrupted run) are skipped. Once all
+  the shards are written, the completion marker is created.
+
+  Args:
+    path: str, parent folder of the splits.
+    examples_per_task: int, number of training examples per family.
+    sequence_length: int, number of epochs.
+    memory_length: int, maximum memory duration.
+    max_distractors: int, maximum number of distractors.
+    nr_processors: int, number of generating processes.
+    per_file: int, number of examples per training shard.
+    seed: int, base seed.
+    nr_writers: int, number of writing threads.
+  """
+  cog_variant = '%d_%d_%d' % (sequence_length, memory_length, max_distractors)
+  families = list(task_bank.task_family_dict.keys())
+
+  jobs = []
+  for data_type in ['train', 'val', 'test']:
+    output_dir = os.path.join(path, '%s_%s' % (data_type, cog_variant))
+    index_dir = os.path.join(path, 'index_%s_%s' % (data_type, cog_variant))
     mkdir(output_dir)
+    mkdir(index_dir)
+
+    if data_type == 'train':
+      # Shards of examples from random families.
+      rng = np.random.RandomState(shard_seed(seed, data_type, -1))
+      p = rng.permutation(len(families) * examples_per_task) % len(families)
+      shards = [('cog_%d.json' % i, [families[f] for f in p[start:start + per_file]])
+                for i, start in enumerate(range(0, len(p), per_file))]
+    else:
+      # One shard per family, 20x smaller than training.
+      shards = [('cog_%s.json' % family, [family] * max(examples_per_task // 20, 50)) for family in families]
+
+    for i, (name, shard_families) in enumerate(shards):
+      if os.path.isfile(os.path.join(index_dir, name + '.index.npz')):
+        continue
+      jobs.append((output_dir, index_dir, name, shard_families, memory_length, max_distractors,
+                   sequence_length, shard_seed(seed, data_type, i)))
+
+  print("Generating %d shards of dataset %s into %s with %d processes" % (len(jobs), cog_variant, path,
+                                                                       nr_processors))
+
+  with ThreadPoolExecutor(max_workers=nr_writers) as writers:
+    writes = []
+
+    if nr_processors > 1:
+      with multiprocessing.Pool(processes=nr_processors) as pool:
+        for result in pool.imap_unordered(generate_shard, jobs):
+          writes.append(writers.submit(write_indexed_shard, *result))
+          print("Generated shard %s (%d / %d)" % (result[2], len(writes), len(jobs)))
+    else:
+      for job in jobs:
+        writes.append(writers.submit(write_indexed_shard, *generate_shard(job)))
+        print("Generated shard %s (%d / %d)" % (job[2], len(writes), len(jobs)))
 
-  families = list(task_bank.task_family_dict.keys())
-  n_families = len(families)
-  total_examples = n_families * examples_per_task
-
-  base_fname = os.path.join(output_dir, 'cog')
-
-  if random_families:
-    # Write tasks from random families to files.
-    f = FileWriter(base_name=base_fname, per_file=per_file,
-                   start_index=start_index, compress=compress)
-    p = np.random.permutation(total_examples)
-    for i, task_ind in enumerate(p):
-      if i % 10000 == 0 and i > 0:
-        print("Generated ", i, " examples")
-      task_family = families[task_ind % n_families]
-      example, _, _ = generate_example(memory_length, max_distractors,
-                                       task_family, epochs)
-      # Write the example to file
-      dump_str = json.dumps(example, sort_keys=True, separators=(',', ': '))
-      assert '\n' not in dump_str, 'dumps_str has new line %s' % (dump_str,)
-      f.write(dump_str.encode())
-    f.close()
-    file_names = f.file_names
-  else:
-    # Write tasks for each task family into a separate file.
-    file_names = []
-    for family in families:
-      fname = base_fname + '_' + family + '.json' + ('.gz' if compress else '')
-      file_names.append(fname)
-      open_fn = gzip.open if compress else open
-      with open_fn(fname, 'wb') as f:
-        for i in range_fn(examples_per_task):
-          if i % 10000 == 0 and i > 0:
-            print("Generated ", i, " examples")
-          example, _, _ = generate_example(memory_length, max_distractors,
-                                           family, epochs)
-          # Write the example to file
-          dump_str = json.dumps(example, sort_keys=True, separators=(',', ': '))
-          assert '\n' not in dump_str, 'dumps_str has new line %s' % (dump_str,)
-          f.write(dump_str.encode())
-          if i != examples_per_task - 1:
-            f.write(b'\n')
-
-  print("Wrote dataset into:", file_names)
-
-
-def generate_train(path,examples_per_task,sequence_length,memory_length,max_distractors,cog_variant,start_index=0,per_file=10000):
-
-  output_dir = os.path.join(path, 'train_' + cog_variant)
-  generate_dataset(sequence_length, max_distractors, memory_length,
-                   examples_per_task, output_dir, random_families=True,
-                   start_index=start_index, per_file=per_file,
-                   compress=True)
-
-def generate_val_or_test(path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors,data_type, cog_variant):
-  # 20x smaller than training.
-  output_dir = os.path.join(path, '%s_%s' % (data_type, cog_variant))
-	
-  generate_dataset(sequence_length, max_distractors, memory_length,
-                   max(examples_per_task // 20, 50),
-                   output_dir, random_families=False,
-                   compress=True)
-
-
-def main(path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors):
-  cog_variant = '%d_%d_%d' % (sequence_length, memory_length, max_distractors)
+    # Propagate the writing errors.
+    for write in writes:
+      write.result()
 
-  if nr_processors > 2:
-    train_parallel = nr_processors - 2
-    assert (examples_per_task % (2 * train_parallel)) == 0, (
-      "examples_per_task must be a multiple of 2*(nr_processors - 2)")
-    examples_per_task_per_job = examples_per_task // train_parallel
-
-    pool = multiprocessing.Pool(processes=nr_processors)
-    jobs = []
-    n_tasks = len(task_bank.task_family_dict)
-    for i in range_fn(train_parallel):
-      jobs.append(pool.apply_async(generate_train, (
-        path, examples_per_task_per_job, sequence_length,memory_length,max_distractors, cog_variant,
-        2 * i, n_tasks * examples_per_task_per_job // 2)))
-    jobs.append(pool.apply_async(generate_val_or_test, (path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors,'val', cog_variant)))
-    jobs.append(pool.apply_async(generate_val_or_test, (path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors,'test', cog_variant)))
-
-    # wait for all jobs to complete
-    [j.get() for j in jobs]
-  else:
-    generate_train(path,examples_per_task,sequence_length,memory_length,max_distractors,cog_variant)
-    generate_val_or_test(path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors,'val', cog_variant)
-    generate_val_or_test(path,examples_per_task,sequence_length,memory_length,max_distractors,nr_processors,'test', cog_variant)
+  with open(completion_marker(path, cog_variant), 'w'):
+    pass
 
+  print("Wrote dataset into:", path)
@@ -115,7 +115,8 @@ def generate_batch(tasks,
                    img_size=224,
                    objsets=None,
                    n_distractor=1,
-                   average_memory_span=2):
+                   average_memory_span=2,
+                   renderer='numpy'):
   """Generate a batch of trials.
 
   Return numpy arrays to feed the tensorflow placeholders.
@@ -128,6 +129,7 @@ def generate_batch(tasks,
     n_distractor: int, number of distractors to add
     average_memory_span: int, the average number of epochs by which an object
       need to be held in working memory, if needed at all
+    renderer: 'numpy' or 'pil', see stim_generator.render
 
   Returns:
     All variables are numpy array of float32
@@ -156,7 +158,7 @@ def generate_batch(tasks,
   max_objset_epoch = max([objset.n_epoch for objset in objsets])
   assert max_objset_epoch == n_epoch, '%d != %d' % (max_objset_epoch, n_epoch)
 
-  in_imgs = sg.render(objsets, img_size)
+  in_imgs = sg.render(objsets, img_size, renderer=renderer)
   # The rendered images are batch major
   in_imgs = np.reshape(in_imgs, [batch_size, n_epoch, img_size, img_size, 3])
   # Swap to time major
@@ -204,7 +206,7 @@ def static_objsets_from_examples(examples):
   return static_objsets
 
 
-def json_to_feeds(json_examples):
+def json_to_feeds(json_examples, renderer='numpy'):
   if isinstance(json_examples, string_types):
     json_examples = [json_examples]
 
@@ -225,8 +227,29 @@ def json_to_feeds(json_examples):
                         # not used when objsets are given
                         n_distractor=0,
                         # not used when objsets are given
-                        average_memory_span=0)
+                        average_memory_span=0,
+                        renderer=renderer)
 
   values = values + (families,)
   return values
 
+
+if __name__ == '__main__':
+  # Check that the NumPy renderer matches the PIL one on random examples.
+  import time
+  from miprometheus.problems.seq_to_seq.vqa.cog.cog_utils import generate_dataset
+  from miprometheus.problems.seq_to_seq.vqa.cog.cog_utils import task_bank
+
+  examples = [generate_dataset.generate_example(3, 10, family, 4)[0]
+              for family in task_bank.task_family_dict.keys() for _ in range(10)]
+
+  start = time.time()
+  imgs_pil = json_to_feeds(examples, renderer='pil')[0]
+  time_pil = time.time() - start
+
+  start = time.time()
+  imgs_numpy = json_to_feeds(examples, renderer='numpy')[0]
+  time_numpy = time.time() - start
+
+  assert np.array_equal(imgs_pil, imgs_numpy), 'NumPy & PIL renderers differ.'
+  print('Rendered %d examples: PIL %.3fs, NumPy %.3fs' % (len(examples), time_pil, time_numpy))
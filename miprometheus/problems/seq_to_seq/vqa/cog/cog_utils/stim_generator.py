@@ -621,27 +621,19 @@ class ObjectSet(object):
     return subset
 
 
-def render_static_obj(canvas, obj, img_size):
-  """Render a single object.
+def _draw_obj(draw, center, color, shape, img_size):
+  """Draw a single object with PIL.
 
   Args:
-    canvas: numpy array of type int8 (img_size, img_size, 3). Modified in place.
-        Converted to PIL from OpenCV. Font is different from original COG
-    obj: StaticObject instance
+    draw: PIL ImageDraw instance.
+    center: 2-tuple of ints, (x, y) position of the object in pixels.
+    color: 3-tuple of ints, RGB color.
+    shape: str, shape of the object.
     img_size: int, image size.
   """
   # Fixed specifications
   radius = int(0.05 * img_size)
 
-	# Convert to PIL image.
-  image = Image.fromarray(np.uint8(canvas),'RGB')
-  draw = ImageDraw.Draw(image)
-
-  # Note that OpenCV color is (Blue, Green, Red)
-	# Converted to PIL, so there is array rearrangements.
-  color = const.WORD2COLOR[obj.color]
-  shape = obj.shape
-  center = (int(obj.loc[0] * img_size), int(obj.loc[1] * img_size))
   if shape == 'circle':
     draw.ellipse((center[0]-radius,center[1]-radius,center[0]+radius,center[1]+radius),fill=color)
     #cv2.circle(canvas, center, radius, color, -1)
@@ -688,6 +680,26 @@ def render_static_obj(canvas, obj, img_size):
   else:
     raise NotImplementedError('Unknown shape ' + str(shape))
 
+
+def render_static_obj(canvas, obj, img_size):
+  """Render a single object.
+
+  Args:
+    canvas: numpy array of type int8 (img_size, img_size, 3). Modified in place.
+        Converted to PIL from OpenCV. Font is different from original COG
+    obj: StaticObject instance
+    img_size: int, image size.
+  """
+  # Convert to PIL image.
+  image = Image.fromarray(np.uint8(canvas),'RGB')
+  draw = ImageDraw.Draw(image)
+
+  # Note that OpenCV color is (Blue, Green, Red)
+  # Converted to PIL, so there is array rearrangements.
+  color = const.WORD2COLOR[obj.color]
+  center = (int(obj.loc[0] * img_size), int(obj.loc[1] * img_size))
+  _draw_obj(draw, center, color, obj.shape, img_size)
+
   canvas[:] = np.array(np.float32(image)) 
 
 def render_obj(canvas, obj, img_size):
@@ -706,13 +718,85 @@ def render_obj(canvas, obj, img_size):
     render_static_obj(canvas, obj.to_static()[0], img_size)
 
 
-def render_static(objlists, img_size=224, save_name=None):
+# Pixels covered by each shape, per image size: {(shape, img_size): (dy, dx)}
+_SHAPE_MASKS = {}
+
+
+def shape_mask(shape, img_size):
+  """Return the pixels covered by a shape, relative to its center.
+
+  The mask is drawn once per shape and image size with PIL, so that the NumPy
+  and PIL renderers produce identical frames.
+
+  Args:
+    shape: str, shape of the object.
+    img_size: int, image size.
+
+  Returns:
+    dy, dx: numpy arrays of int64, offsets of the covered pixels.
+  """
+  key = (shape, img_size)
+  if key not in _SHAPE_MASKS:
+    # Large enough for the shapes & the characters.
+    half = max(int(0.1 * img_size), 32)
+    image = Image.new('RGB', (2 * half + 1, 2 * half + 1))
+    _draw_obj(ImageDraw.Draw(image), (half, half), (255, 255, 255), shape, img_size)
+
+    dy, dx = np.nonzero(np.array(image)[..., 0])
+    _SHAPE_MASKS[key] = (dy - half, dx - half)
+
+  return _SHAPE_MASKS[key]
+
+
+def stamp_objects(movie, objects_by_frame):
+  """Render objects into a movie by stamping precomputed shape masks.
+
+  All the pixels of all the objects are written at once. When objects
+  overlap, the last one of a frame is drawn on top, as with PIL.
+
+  Args:
+    movie: numpy array (n_time, img_size, img_size, 3). Modified in place.
+    objects_by_frame: list of lists of StaticObject instances, one list per
+      frame, in drawing order.
+  """
+  img_size = movie.shape[1]
+
+  pixels = []
+  obj_ids = []
+  colors = []
+  for i_frame, objects in enumerate(objects_by_frame):
+    for obj in objects:
+      dy, dx = shape_mask(obj.shape, img_size)
+      x = int(obj.loc[0] * img_size) + dx
+      y = int(obj.loc[1] * img_size) + dy
+      inside = (x >= 0) & (x < img_size) & (y >= 0) & (y < img_size)
+
+      pixels.append((i_frame * img_size + y[inside]) * img_size + x[inside])
+      obj_ids.append(np.full(inside.sum(), len(colors), dtype=np.int64))
+      colors.append(const.WORD2COLOR[obj.color])
+
+  if not colors:
+    return
+
+  pixels = np.concatenate(pixels)
+  obj_ids = np.concatenate(obj_ids)
+
+  # Keep the last object drawn on each pixel (occlusion).
+  _, last = np.unique(pixels[::-1], return_index=True)
+  last = len(pixels) - 1 - last
+
+  movie.reshape(-1, 3)[pixels[last]] = np.array(colors, dtype=movie.dtype)[obj_ids[last]]
+
+
+def render_static(objlists, img_size=224, save_name=None, renderer='numpy'):
   """Render a movie by epoch.
 
   Args:
     objlists: a list of lists of StaticObject instances
     img_size: int, size of image (both x and y)
     save_name: if not None, save movie at save_name
+    renderer: 'numpy' to stamp precomputed masks, 'pil' to draw each object
+      with PIL (e.g. for parity checks)
 
   Returns:
     movie: numpy array (n_time, img_size, img_size, 3)
@@ -742,16 +826,19 @@ def render_static(objlists, img_size=224, save_name=None):
   movie = np.zeros((len(objlists) * n_epoch_max, img_size, img_size, 3),
       np.float32)
 
-  i_frame = 0
-  for objects in by_epoch:
-    for epoch_objs in objects:
-      canvas = movie[i_frame:i_frame + 1, ...]  # return a view
-      canvas = np.squeeze(canvas, axis=0)
-      for obj in epoch_objs:
-        render_static_obj(canvas, obj, img_size)
-      i_frame += 1
-  assert i_frame == len(objlists) * n_epoch_max, '%d != %d' % (
-      i_frame, len(objlists) * n_epoch_max)
+  if renderer == 'numpy':
+    stamp_objects(movie, [epoch_objs for objects in by_epoch for epoch_objs in objects])
+  else:
+    i_frame = 0
+    for objects in by_epoch:
+      for epoch_objs in objects:
+        canvas = movie[i_frame:i_frame + 1, ...]  # return a view
+        canvas = np.squeeze(canvas, axis=0)
+        for obj in epoch_objs:
+          render_static_obj(canvas, obj, img_size)
+        i_frame += 1
+    assert i_frame == len(objlists) * n_epoch_max, '%d != %d' % (
+        i_frame, len(objlists) * n_epoch_max)
 
   if save_name is not None:
     t_total = len(objlists) * n_epoch_max * 1.0  # need fps >= 1
@@ -760,13 +847,15 @@ def render_static(objlists, img_size=224, save_name=None):
   return movie
 
 
-def render(objsets, img_size=224, save_name=None):
+def render(objsets, img_size=224, save_name=None, renderer='numpy'):
   """Render a movie by epoch.
 
   Args:
     objsets: an ObjsetSet instance or a list of them
     img_size: int, size of image (both x and y)
     save_name: if not None, save movie at save_name
+    renderer: 'numpy' to stamp precomputed masks, 'pil' to draw each object
+      with PIL (e.g. for parity checks)
 
   Returns:
     movie: numpy array (n_time, img_size, img_size, 3)
@@ -780,17 +869,23 @@ def render(objsets, img_size=224, save_name=None):
   # It's faster if use uint8 here, but later conversion to float32 seems slow
   movie = np.zeros((n_objset * n_epoch_max, img_size, img_size, 3), np.float32)
 
-  i_frame = 0
-  for objset in objsets:
-    for epoch_now in range(n_epoch_max):
-      canvas = movie[i_frame:i_frame + 1, ...]  # return a view
-      canvas = np.squeeze(canvas, axis=0)
+  if renderer == 'numpy':
+    objects_by_frame = [[obj if isinstance(obj, StaticObject) else obj.to_static()[0]
+                         for obj in objset.select_now(epoch_now)]
+                        for objset in objsets for epoch_now in range(n_epoch_max)]
+    stamp_objects(movie, objects_by_frame)
+  else:
+    i_frame = 0
+    for objset in objsets:
+      for epoch_now in range(n_epoch_max):
+        canvas = movie[i_frame:i_frame + 1, ...]  # return a view
+        canvas = np.squeeze(canvas, axis=0)
 
-      subset = objset.select_now(epoch_now)
-      for obj in subset:
-        render_obj(canvas, obj, img_size)
+        subset = objset.select_now(epoch_now)
+        for obj in subset:
+          render_obj(canvas, obj, img_size)
 
-      i_frame += 1
+        i_frame += 1
 
   if save_name is not None:
     t_total = n_objset * n_epoch_max * 1.0  # need fps >= 1
@@ -1,3 +1,7 @@
-from .seq_mnist_to_class import *
+from miprometheus.utils.lazy_import import lazy_attributes
 
-from .video_to_class_problem import VideoToClassProblem
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'VideoToClassProblem': '.video_to_class_problem'
+}, subpackages=[
+    '.seq_mnist_to_class'
+])
@@ -1,5 +1,6 @@
-from .permuted_sequential_row_mnist import PermutedSequentialRowMnist
-from .sequential_pixel_mnist import SequentialPixelMNIST
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['PermutedSequentialRowMnist',
-           'SequentialPixelMNIST']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'PermutedSequentialRowMnist': '.permuted_sequential_row_mnist',
+    'SequentialPixelMNIST': '.sequential_pixel_mnist'
+})
@@ -20,9 +20,11 @@
 __author__ = "Younes Bouhadjar & Vincent Marois"
 
 import torch
+import numpy as np
 from torchvision import datasets, transforms
 
 from miprometheus.utils.data_dict import DataDict
+from miprometheus.utils.batch_transforms import ToFloat, Permute, Reshape
 from miprometheus.problems.video_to_class.video_to_class_problem import VideoToClassProblem
 
 
@@ -51,6 +53,11 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
                     and  ``processed/test.pt`` will be saved,
                 - ``self.use_train_data`` (`bool`, `optional`) : If True, creates dataset from ``training.pt``,\
                     otherwise from ``test.pt``
+                - ``self.use_batch_transforms`` (`bool`, `optional`) : If True, the samples & batches contain the \
+                    uint8 [1, 28, 28] images, converted to float, permuted & reshaped into sequences of rows by the batch transforms of the problem \
+                    (cf. :py:func:`transform_batch`, called by the workers on the training device). \
+                    ``self.data_definitions`` then describe the batches after :py:func:`transform_batch`. \
+                    Default: ``False``.
                 - ``self.defaut_values`` :
 
                     >>> self.default_values = {'nb_classes': 10,
@@ -73,9 +80,14 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
         # Call base class constructor.
         super(PermutedSequentialRowMnist, self).__init__(params)
 
+        # Set default parameters.
+        params.add_default_params({'in_memory': True, 'batch_transforms': False})
+
         # Retrieve parameters from the dictionary.
         self.use_train_data = params['use_train_data']
         self.root_dir = params['root_dir']
+        self.in_memory = params['in_memory']
+        self.use_batch_transforms = params['batch_transforms']
 
         self.num_rows = 28
         self.num_columns = 28
@@ -100,8 +112,17 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
 
         # define transforms
         pixel_permutation = torch.randperm(self.num_rows)
-        transform = transforms.Compose([transforms.ToTensor(),
-                                        transforms.Lambda(lambda x: x[:, pixel_permutation])])
+        self.pixel_permutation = pixel_permutation
+
+        if self.use_batch_transforms:
+            # permute the rows & reshape into sequences of rows once per batch, on the training device.
+            transform = transforms.Compose([transforms.ToTensor()])
+            self.add_batch_transform(ToFloat('images'))
+            self.add_batch_transform(Permute('images', pixel_permutation, dim=2))
+            self.add_batch_transform(Reshape('images', [28, 1, 1, 28]))
+        else:
+            transform = transforms.Compose([transforms.ToTensor(),
+                                            transforms.Lambda(lambda x: x[:, pixel_permutation])])
 
         # load the dataset
         self.dataset = datasets.MNIST(self.root_dir, train=self.use_train_data,
@@ -109,6 +130,11 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
 
         self.length = len(self.dataset)
 
+        # load the whole split once as a contiguous uint8 tensor: the batches are served by index slicing.
+        if self.in_memory:
+            self.images = torch.as_tensor(np.asarray(self.dataset.data)).contiguous()
+            self.targets = torch.as_tensor(np.asarray(self.dataset.targets), dtype=torch.long)
+
     def __getitem__(self, index):
         """
         Getter method to access the dataset and return a sample.
@@ -125,6 +151,11 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
 
 
         """
+        # get sample from the in-memory tensors.
+        if self.in_memory:
+            batch = self.__getitems__([index])
+            return self.create_data_dict({key: value[0] for key, value in batch.items()})
+
         # get sample
         img, target = self.dataset.__getitem__(index)
 
@@ -135,14 +166,53 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
         mask = torch.IntTensor(self.num_rows,1).zero_()
         mask[-1,0] = 1
 
-        data_dict = DataDict({key: None for key in self.data_definitions.keys()})
-        data_dict['images'] = img.view(28,1,1,28)
+        data_dict = self.create_data_dict()
+        # left as [1, 28, 28] for the batch transforms.
+        data_dict['images'] = img if self.use_batch_transforms else img.view(28,1,1,28)
         data_dict['mask'] = mask
         data_dict['targets'] = target.expand((28,1))
         data_dict['targets_label'] = label
 
         return data_dict
 
+    def __getitems__(self, indices):
+        """
+        Batched getter, called by :py:class:`torch.utils.data.DataLoader` (if supported) with the indices of a \
+        whole batch: when the split is held in memory, slices the images & targets of the batch at once and \
+        permutes their rows.
+
+        :param indices: indices of the samples of the batch.
+        :type indices: list
+
+        :return: ``DataDict({'images', 'mask', 'targets', 'targets_label'})`` containing the batch \
+        (``collate_fn()`` returns it unchanged), or list of samples if the split is not held in memory.
+
+        """
+        if not self.in_memory:
+            return [self[index] for index in indices]
+
+        indices = torch.as_tensor(indices, dtype=torch.long)
+        batch_size = len(indices)
+
+        # create mask
+        mask = torch.IntTensor(batch_size, self.num_rows, 1).zero_()
+        mask[:, -1, 0] = 1
+
+        targets = self.targets[indices]
+
+        data_dict = self.create_data_dict()
+        if self.use_batch_transforms:
+            # uint8 [batch_size, 1, 28, 28]: converted, permuted & reshaped by the batch transforms.
+            data_dict['images'] = self.images[indices].unsqueeze(1)
+        else:
+            images = self.images[indices][:, self.pixel_permutation]
+            data_dict['images'] = images.float().div_(255).view(batch_size, 28, 1, 1, 28)
+        data_dict['mask'] = mask
+        data_dict['targets'] = targets.view(batch_size, 1, 1).expand((batch_size, 28, 1))
+        data_dict['targets_label'] = [self.labels[target] for target in targets.tolist()]
+
+        return data_dict
+
     def collate_fn(self, batch):
         """
         Combines a list of ``DataDict`` (retrieved with ``__getitem__`` ) into a batch.
@@ -159,9 +229,12 @@ class PermutedSequentialRowMnist(VideoToClassProblem):
         :return: ``DataDict({'images','targets', 'targets_label'})`` containing the batch.
 
         """
+        # batch already assembled by __getitems__().
+        if isinstance(batch, DataDict):
+            return batch
 
-        return DataDict({key: value for key, value in zip(self.data_definitions.keys(),
-                                                          super(PermutedSequentialRowMnist, self).collate_fn(batch).values())})
+        return self.create_data_dict({key: value for key, value in zip(self.data_definitions.keys(),
+                                                                      super(PermutedSequentialRowMnist, self).collate_fn(batch).values())})
 
 
 if __name__ == "__main__":
@@ -184,7 +257,9 @@ if __name__ == "__main__":
     # test whether data structures match expected definitions
     # images should be (batch size x sequence x channel x height x width)
     # as this is a sample, we should have (sequence x channel x height x width) == (28, 1, 1, 28)
-    assert sample['images'].shape == torch.ones((28, 1, 1, 28)).shape, "Unit test failed! Expected images shape {} but got {}".format(torch.ones((28*28, 1, 1, 1)).shape, sample['images'].shape)
+    # (after the batch transforms, applied here on a batch made of the sample)
+    images = problem.transform_batch(problem.collate_fn([sample]))['images'][0]
+    assert images.shape == torch.ones((28, 1, 1, 28)).shape, "Unit test failed! Expected images shape {} but got {}".format(torch.ones((28, 1, 1, 28)).shape, images.shape)
 
     # mask should be (sequence x class) == (28, 1)
     assert sample['mask'].shape == torch.ones((28,1)).shape, "Unit test failed! Expected mask shape {} but got {}".format(torch.ones((28*28,1)).shape, sample['mask'].shape)
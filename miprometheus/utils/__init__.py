@@ -1,13 +1,27 @@
-from .app_state import AppState
-from .param_interface import ParamInterface
-from .param_registry import MetaSingletonABC, ParamRegistry
-from .sampler_factory import SamplerFactory
-from .singleton import SingletonMetaClass
+from miprometheus.utils.lazy_import import lazy_attributes
 from .split_indices import split_indices
-from .statistics_collector import StatisticsCollector
-from .statistics_aggregator import StatisticsAggregator
-from .time_plot import TimePlot
-from .data_dict import DataDict
 
-from .loss import *
-from .problems_utils import *
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'AppState': '.app_state',
+    'ParamInterface': '.param_interface',
+    'MetaSingletonABC': '.param_registry',
+    'ParamRegistry': '.param_registry',
+    'SamplerFactory': '.sampler_factory',
+    'SingletonMetaClass': '.singleton',
+    'StatisticsCollector': '.statistics_collector',
+    'StatisticsAggregator': '.statistics_aggregator',
+    'TimePlot': '.time_plot',
+    'DataDict': '.data_dict',
+    'compile_data_dict': '.data_dict',
+    'TokenBudgetBatchSampler': '.batch_samplers',
+    'ImageGroupedBatchSampler': '.batch_samplers',
+    'BatchTransform': '.batch_transforms',
+    'ToFloat': '.batch_transforms',
+    'Normalize': '.batch_transforms',
+    'Resize': '.batch_transforms',
+    'Permute': '.batch_transforms',
+    'Reshape': '.batch_transforms'
+}, subpackages=[
+    '.loss',
+    '.problems_utils'
+])
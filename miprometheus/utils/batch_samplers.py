@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+batch_samplers.py:
+
+    - Contains the definition of batch samplers producing batches of variable size or of grouped samples, \
+    which can be passed to :py:class:`torch.utils.data.DataLoader` as ``batch_sampler``.
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import numpy as np
+from torch.utils.data.sampler import Sampler
+
+
+class TokenBudgetBatchSampler(Sampler):
+    """
+    Batch sampler packing as many samples as fit under a maximum number of (padded) tokens.
+
+    The samples are sorted by length, so that each batch gathers samples of similar lengths (which minimizes \
+    padding), and then split into batches for which ``batch_size * max_length <= max_tokens``.
+
+    .. note::
+
+        The batch boundaries are computed once, in the constructor. At every epoch, samples of equal length \
+        are shuffled (i.e. swapped between batches) and the order of the batches is shuffled, so that \
+        ``len(sampler)`` stays constant.
+
+    """
+
+    def __init__(self, lengths, max_tokens, shuffle=True):
+        """
+        Initializes the batch sampler and computes the batch boundaries.
+
+        :param lengths: Length of each sample of the dataset (in tokens).
+        :type lengths: list
+
+        :param max_tokens: Maximum number of (padded) tokens per batch. A sample longer than ``max_tokens`` \
+        will form a batch on its own.
+        :type max_tokens: int
+
+        :param shuffle: Shuffle the samples & batches at every epoch (DEFAULT: ``True``).
+        :type shuffle: bool
+
+        """
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+
+        # Sorted lengths - the batch boundaries depend only on them.
+        sorted_lengths = np.sort(self.lengths, kind='stable')
+
+        # Greedily pack the sorted samples: lengths are increasing, so the last added sample is the longest one.
+        self.boundaries = [0]
+        for i, length in enumerate(sorted_lengths):
+            if (i + 1 - self.boundaries[-1]) * length > self.max_tokens and i > self.boundaries[-1]:
+                self.boundaries.append(i)
+        if len(sorted_lengths) > 0:
+            self.boundaries.append(len(sorted_lengths))
+
+    def __iter__(self):
+        """
+        Returns an iterator over the batches (lists of indices).
+
+        """
+        if self.shuffle:
+            # Stable sort of a random permutation: shuffles samples of equal lengths.
+            perm = np.random.permutation(len(self.lengths))
+            order = perm[np.argsort(self.lengths[perm], kind='stable')]
+            batch_order = np.random.permutation(len(self))
+        else:
+            order = np.argsort(self.lengths, kind='stable')
+            batch_order = range(len(self))
+
+        for b in batch_order:
+            yield order[self.boundaries[b]:self.boundaries[b + 1]].tolist()
+
+    def __len__(self):
+        """
+        :return: Number of batches in an epoch.
+
+        """
+        return len(self.boundaries) - 1
+
+
+class ImageGroupedBatchSampler(Sampler):
+    """
+    Batch sampler gathering the questions about the same image in the same batches (VQA problems), so that \
+    each image of a batch is only encoded once by the model.
+
+    At every epoch, the order of the images and the order of the questions of each image are shuffled, the \
+    questions are concatenated image by image, and then split into batches of ``batch_size`` questions.
+
+    .. note::
+
+        The batches are less random than with a shuffled ``DataLoader`` (a batch only covers \
+        ~``batch_size / questions_per_image`` images): this trades some gradient variance for a cheaper image \
+        encoding.
+
+    """
+
+    def __init__(self, image_ids, batch_size, shuffle=True, drop_last=False):
+        """
+        Initializes the batch sampler and groups the samples by image.
+
+        :param image_ids: Identifier of the image of each sample of the dataset.
+        :type image_ids: list
+
+        :param batch_size: Number of samples (questions) per batch.
+        :type batch_size: int
+
+        :param shuffle: Shuffle the images & questions at every epoch (DEFAULT: ``True``).
+        :type shuffle: bool
+
+        :param drop_last: Drop the last, incomplete batch (DEFAULT: ``False``).
+        :type drop_last: bool
+
+        """
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+
+        # group the indices of the samples by image.
+        image_ids = np.asarray(image_ids)
+        order = np.argsort(image_ids, kind='stable')
+        _, starts = np.unique(image_ids[order], return_index=True)
+        self.groups = np.split(order, starts[1:])
+        self.num_samples = len(image_ids)
+
+    def __iter__(self):
+        """
+        Returns an iterator over the batches (lists of indices).
+
+        """
+        if self.shuffle:
+            groups = [np.random.permutation(self.groups[g]) for g in np.random.permutation(len(self.groups))]
+        else:
+            groups = self.groups
+
+        order = np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+
+        for b in range(len(self)):
+            yield order[b * self.batch_size:(b + 1) * self.batch_size].tolist()
+
+    def __len__(self):
+        """
+        :return: Number of batches in an epoch.
+
+        """
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return (self.num_samples + self.batch_size - 1) // self.batch_size
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+batch_transforms.py:
+
+    - Contains the definition of transforms applied to a whole batch (i.e. a :py:class:`DataDict`), after \
+    collation and on the device of the batch, by :py:func:`miprometheus.problems.Problem.transform_batch`.
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import torch
+from abc import ABCMeta, abstractmethod
+
+
+class BatchTransform(metaclass=ABCMeta):
+    """
+    Base class of the batch transforms: transforms a field of a :py:class:`DataDict`.
+
+    """
+
+    def __init__(self, key):
+        """
+        Initializes the transform.
+
+        :param key: Key of the field of the :py:class:`DataDict` to transform (e.g. 'images').
+        :type key: str
+
+        """
+        self.key = key
+
+    def __call__(self, data_dict):
+        """
+        Transforms the field ``self.key`` of ``data_dict``.
+
+        :param data_dict: batch of samples.
+        :type data_dict: :py:class:`DataDict`
+
+        :return: new :py:class:`DataDict`, sharing the other fields with ``data_dict`` (which is not modified).
+
+        """
+        # shallow copy: the batch of the caller (e.g. a stored validation batch) stays untransformed.
+        transformed = data_dict.apply(lambda tensor: tensor)
+        transformed[self.key] = self.transform(data_dict[self.key])
+        return transformed
+
+    @abstractmethod
+    def transform(self, tensor):
+        """
+        Transforms a tensor of the batch.
+
+        .. note::
+
+            Abstract - to be defined in derived classes.
+
+        :param tensor: tensor to transform, of shape [batch_size x ...].
+        :type tensor: torch.Tensor
+
+        :return: transformed tensor.
+
+        """
+
+
+class ToFloat(BatchTransform):
+    """
+    Converts ``uint8`` images to floats in [0, 1]. Tensors already in floating point are left unchanged.
+
+    """
+
+    def transform(self, tensor):
+        if tensor.dtype == torch.uint8:
+            return tensor.float().div_(255)
+        return tensor
+
+
+class Normalize(BatchTransform):
+    """
+    Normalizes images of shape [batch_size x C x H x W] with a mean & standard deviation per channel.
+
+    """
+
+    def __init__(self, key, mean, std):
+        """
+        Initializes the transform.
+
+        :param key: Key of the field of the :py:class:`DataDict` to transform.
+        :type key: str
+
+        :param mean: Mean of each channel.
+        :type mean: list
+
+        :param std: Standard deviation of each channel.
+        :type std: list
+
+        """
+        super(Normalize, self).__init__(key)
+        self.mean = torch.tensor(mean, dtype=torch.float).view(1, -1, 1, 1)
+        self.std = torch.tensor(std, dtype=torch.float).view(1, -1, 1, 1)
+
+    def transform(self, tensor):
+        return (tensor - self.mean.to(tensor.device)) / self.std.to(tensor.device)
+
+
+class Resize(BatchTransform):
+    """
+    Resizes images of shape [batch_size x C x H x W] with :py:func:`torch.nn.functional.interpolate`.
+
+    """
+
+    def __init__(self, key, size, mode='bilinear'):
+        """
+        Initializes the transform.
+
+        :param key: Key of the field of the :py:class:`DataDict` to transform.
+        :type key: str
+
+        :param size: Desired [height, width].
+        :type size: list
+
+        :param mode: Interpolation mode (DEFAULT: 'bilinear').
+        :type mode: str
+
+        """
+        super(Resize, self).__init__(key)
+        self.size = tuple(size)
+        self.mode = mode
+
+    def transform(self, tensor):
+        if tuple(tensor.shape[-2:]) == self.size:
+            return tensor
+        return torch.nn.functional.interpolate(tensor.float(), size=self.size, mode=self.mode,
+                                               align_corners=False if self.mode in ['bilinear', 'bicubic'] else None)
+
+
+class Permute(BatchTransform):
+    """
+    Permutes the elements of a tensor along a dimension (e.g. the rows of the images).
+
+    """
+
+    def __init__(self, key, permutation, dim):
+        """
+        Initializes the transform.
+
+        :param key: Key of the field of the :py:class:`DataDict` to transform.
+        :type key: str
+
+        :param permutation: Permutation of the indices of dimension ``dim``.
+        :type permutation: torch.LongTensor
+
+        :param dim: Permuted dimension, including the batch dimension.
+        :type dim: int
+
+        """
+        super(Permute, self).__init__(key)
+        self.permutation = permutation
+        self.dim = dim
+
+    def transform(self, tensor):
+        # keep a copy of the permutation on the device of the batch.
+        if self.permutation.device != tensor.device:
+            self.permutation = self.permutation.to(tensor.device)
+        return tensor.index_select(self.dim, self.permutation)
+
+
+class Reshape(BatchTransform):
+    """
+    Reshapes each sample of the batch (e.g. images into sequences of rows or pixels).
+
+    """
+
+    def __init__(self, key, shape):
+        """
+        Initializes the transform.
+
+        :param key: Key of the field of the :py:class:`DataDict` to transform.
+        :type key: str
+
+        :param shape: Shape of a sample, excluding the batch dimension.
+        :type shape: list
+
+        """
+        super(Reshape, self).__init__(key)
+        self.shape = list(shape)
+
+    def transform(self, tensor):
+        return tensor.reshape([tensor.shape[0]] + self.shape)
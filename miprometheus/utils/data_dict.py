@@ -19,12 +19,54 @@
 __author__ = "Vincent Marois"
 
 import torch
+import array
 import logging
 import collections
 
 logger = logging.Logger('DataDict')
 
 
+class StringTable(object):
+    """
+    Compact, picklable encoding of a list (or tuple) of strings: a table of the unique strings, joined in a \
+    single ``str``, and the index of each element in this table.
+
+    Used by :py:class:`DataDict` to send the string fields of a batch (e.g. ``questions_string`` or ``imgfiles`` \
+    in CLEVR) from the DataLoader workers as two objects instead of one object per string.
+
+    """
+    separator = '\x00'
+
+    def __init__(self, strings):
+        """
+        Encodes the strings.
+
+        :param strings: list or tuple of strings, not containing ``StringTable.separator``.
+
+        """
+        self.container = type(strings)
+        table = {}
+        self.indices = array.array('i', [table.setdefault(string, len(table)) for string in strings])
+        self.table = self.separator.join(table)
+
+    @classmethod
+    def encodable(cls, value):
+        """
+        :return: ``True`` if ``value`` is a non-empty list or tuple of strings which can be encoded.
+
+        """
+        return isinstance(value, (list, tuple)) and len(value) > 0 and \
+            all(type(string) is str and cls.separator not in string for string in value)
+
+    def decode(self):
+        """
+        :return: the list (or tuple) of strings.
+
+        """
+        table = self.table.split(self.separator)
+        return self.container(table[index] for index in self.indices)
+
+
 class DataDict(collections.MutableMapping):
     """
     - Mapping: A container object that supports arbitrary key lookups and implements the methods ``__getitem__``, \
@@ -129,6 +171,63 @@ class DataDict(collections.MutableMapping):
         """
         return '{}, DataDict({})'.format(super(DataDict, self).__repr__(), self.__dict__)
 
+    def __getstate__(self):
+        """
+        Returns the state of the ``DataDict`` to pickle, i.e. when sending a batch from a DataLoader worker to \
+        the main process:
+
+            - The ``torch.tensor`` (s) are left as is: the reducers of ``torch.multiprocessing`` move their \
+            storage to shared memory and only send the handles,
+            - The lists of strings are encoded as :py:class:`StringTable` (s).
+
+        :return: State dict.
+
+        """
+        state = {}
+        for key, value in self.items():
+            state[key] = StringTable(value) if StringTable.encodable(value) else value
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the ``DataDict`` from the state returned by :py:func:`__getstate__`, decoding the \
+        :py:class:`StringTable` (s).
+
+        :param state: State dict.
+
+        """
+        for key, value in state.items():
+            self.__setitem__(key, value.decode() if isinstance(value, StringTable) else value)
+
+    def apply(self, function):
+        """
+        Returns a new DataDict, with ``function`` applied to all the ``torch.tensor`` (s) of `self`, in one pass.
+        The other elements of `self` are returned as is.
+
+        :param function: Function taking & returning a ``torch.tensor``.
+
+        :return: Converted DataDict.
+
+        """
+        return self.__class__({key: function(value) if isinstance(value, torch.Tensor) else value
+                               for key, value in self.items()})
+
+    def to(self, device, non_blocking=False):
+        """
+        Moves all the ``torch.tensor`` (s) of the DataDict to ``device``, in one pass.
+
+        :param device: The destination device.
+        :type device: torch.device
+
+        :param non_blocking: If True and the source is in pinned memory, the copies will be asynchronous with \
+        respect to the host. Default: ``False``.
+        :type non_blocking: bool
+
+        :return: Converted DataDict.
+
+        """
+        return self.apply(lambda tensor: tensor.to(device, non_blocking=non_blocking))
+
     def numpy(self):
         """
         Converts the DataDict to numpy objects.
@@ -145,15 +244,7 @@ class DataDict(collections.MutableMapping):
         :return: Converted DataDict.
 
         """
-        numpy_datadict = self.__class__({key: None for key in self.keys()})
-
-        for key in self:
-            if isinstance(self[key], torch.Tensor):
-                numpy_datadict[key] = self[key].numpy()
-            else:
-                numpy_datadict[key] = self[key]
-
-        return numpy_datadict
+        return self.apply(lambda tensor: tensor.numpy())
 
     def cpu(self):
         """
@@ -169,15 +260,7 @@ class DataDict(collections.MutableMapping):
         :return: Converted DataDict.
 
         """
-        cpu_datadict = self.__class__({key: None for key in self.keys()})
-
-        for key in self:
-            if isinstance(self[key], torch.Tensor):
-                cpu_datadict[key] = self[key].cpu()
-            else:
-                cpu_datadict[key] = self[key]
-
-        return cpu_datadict
+        return self.apply(lambda tensor: tensor.cpu())
 
     def cuda(self, device=None, non_blocking=False):
         """
@@ -199,14 +282,7 @@ class DataDict(collections.MutableMapping):
         :type non_blocking: bool
 
         """
-        cuda_datadict = self.__class__({key: None for key in self.keys()})
-        for key in self:
-            if isinstance(self[key], torch.Tensor):
-                cuda_datadict[key] = self[key].cuda(device=device, non_blocking=non_blocking)
-            else:
-                cuda_datadict[key] = self[key]
-
-        return cuda_datadict
+        return self.apply(lambda tensor: tensor.cuda(device=device, non_blocking=non_blocking))
 
     def detach(self):
         """
@@ -219,14 +295,144 @@ class DataDict(collections.MutableMapping):
             In-place modifications on either of them will be seen, and may trigger errors in correctness checks.
 
         """
-        detached_datadict = self.__class__({key: None for key in self.keys()})
-        for key in self:
-            if isinstance(self[key], torch.Tensor):
-                detached_datadict[key] = self[key].detach()
-            else:
-                detached_datadict[key] = self[key]
+        return self.apply(lambda tensor: tensor.detach())
 
-        return detached_datadict
+
+class SchemaDataDict(DataDict):
+    """
+    Base class of the DataDicts compiled from a schema (i.e. the keys of the ``data_definitions`` of a problem) \
+    by :py:func:`compile_data_dict`.
+
+    The keys of the schema are stored in ``__slots__`` instead of ``__dict__``, which makes the construction & \
+    the accesses cheaper. Keys added `on-the-fly` are still stored in ``__dict__``.
+
+    """
+    __slots__ = ()
+
+    # Keys of the schema (ordered, and as a set for the membership tests), set by compile_data_dict().
+    schema = ()
+    schema_keys = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        """
+        Sets all the keys of the schema to ``None``, then updates the DataDict with the passed arguments, \
+        like ``DataDict.__init__``.
+
+        """
+        for key in self.schema:
+            object.__setattr__(self, key, None)
+        for key, value in dict(*args, **kwargs).items():
+            self.__setitem__(key, value)
+
+    def __setitem__(self, key, value, addkey=False):
+        if key in self.schema_keys:
+            object.__setattr__(self, key, value)
+        else:
+            super(SchemaDataDict, self).__setitem__(key, value, addkey)
+
+    def __getitem__(self, key):
+        if key in self.schema_keys:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                # the key was deleted.
+                raise KeyError(key) from None
+        return self.__dict__[key]
+
+    def __delitem__(self, key, override=False):
+        if key in self.schema_keys and override:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            super(SchemaDataDict, self).__delitem__(key, override)
+
+    def __iter__(self):
+        for key in self.schema:
+            if hasattr(self, key):
+                yield key
+        for key in self.__dict__:
+            yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return (key in self.schema_keys and hasattr(self, key)) or key in self.__dict__
+
+    def __str__(self):
+        return str(dict(self.items()))
+
+    def __repr__(self):
+        return '{}, DataDict({})'.format(object.__repr__(self), dict(self.items()))
+
+    def __reduce__(self):
+        """
+        The compiled classes are not importable by name: pickles the schema, so that the class can be compiled \
+        again (e.g. in the main process, when receiving a batch from a DataLoader worker).
+
+        """
+        return _rebuild_data_dict, (self.schema, self.__getstate__())
+
+    def apply(self, function):
+        """
+        Returns a new DataDict, with ``function`` applied to all the ``torch.tensor`` (s) of `self`, in one pass.
+        The other elements of `self` are returned as is.
+
+        :param function: Function taking & returning a ``torch.tensor``.
+
+        :return: Converted DataDict.
+
+        """
+        converted = self.__class__.__new__(self.__class__)
+        for key, value in self.items():
+            converted.__setitem__(key, function(value) if isinstance(value, torch.Tensor) else value)
+        return converted
+
+
+# Cache of the compiled DataDict classes, indexed by their schema.
+_compiled_data_dicts = {}
+
+
+def compile_data_dict(keys):
+    """
+    Returns a subclass of :py:class:`SchemaDataDict` storing the specified keys in ``__slots__``.
+
+    The classes are cached, so that the same schema always returns the same class.
+
+    .. note::
+
+        Keys which are not valid identifiers, start with an underscore or shadow a method of ``DataDict`` \
+        cannot be slots: for such a schema, ``DataDict`` is returned.
+
+    :param keys: Keys of the DataDict, e.g. ``problem.data_definitions.keys()``.
+
+    :return: DataDict class.
+
+    """
+    schema = tuple(keys)
+    data_dict_class = _compiled_data_dicts.get(schema)
+    if data_dict_class is None:
+        if all(key.isidentifier() and not key.startswith('_') and not hasattr(SchemaDataDict, key)
+               for key in schema):
+            data_dict_class = type('SchemaDataDict', (SchemaDataDict,), {'__slots__': schema, 'schema': schema,
+                                                                      'schema_keys': frozenset(schema)})
+        else:
+            data_dict_class = DataDict
+        _compiled_data_dicts[schema] = data_dict_class
+    return data_dict_class
+
+
+def _rebuild_data_dict(schema, state):
+    """
+    Unpickles a :py:class:`SchemaDataDict` (cf ``SchemaDataDict.__reduce__``).
+
+    """
+    data_dict_class = compile_data_dict(schema)
+    data_dict = data_dict_class.__new__(data_dict_class)
+    data_dict.__setstate__(state)
+    return data_dict
 
 
 if __name__ == '__main__':
@@ -243,3 +449,20 @@ if __name__ == '__main__':
 
     print(repr(datadict))
 
+    # check the transport of a batch with string fields.
+    import pickle
+    datadict = DataDict({'inputs': torch.ones([4, 3]), 'imgfiles': ['a.png', 'b.png', 'a.png', 'a.png'],
+                         'tasks': ('x', 'y', 'x', 'y')})
+    restored = pickle.loads(pickle.dumps(datadict))
+    assert restored['imgfiles'] == datadict['imgfiles'] and restored['tasks'] == datadict['tasks']
+    assert torch.equal(restored['inputs'], datadict['inputs'])
+
+    # check the DataDict compiled from the data definitions.
+    data_dict_class = compile_data_dict(data_definitions.keys())
+    datadict = data_dict_class({'inputs': torch.ones([4, 3])})
+    assert list(datadict.keys()) == ['inputs', 'targets'] and datadict['targets'] is None
+    datadict['extra'] = 1
+    restored = pickle.loads(pickle.dumps(datadict.detach()))
+    assert type(restored) is data_dict_class and restored['extra'] == 1
+    print(repr(restored))
+
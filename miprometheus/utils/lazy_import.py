@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+lazy_import.py:
+
+    - Contains the definition of :py:func:`lazy_attributes`, used by the ``__init__.py`` of the packages to \
+    import their modules on first access to their attributes (PEP 562), instead of when the package is imported.
+
+    This avoids importing all the models, problems & their dependencies (torchvision, h5py, nltk, PyQt5, \
+    matplotlib...) at the start of each worker (or DataLoader worker), when only a few of them are used.
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import sys
+import importlib
+
+
+def lazy_attributes(package, attributes, subpackages=()):
+    """
+    Creates the module-level ``__getattr__`` & ``__dir__`` functions of a package.
+
+    Usage, in the ``__init__.py`` of a package:
+
+        >>> __getattr__, __dir__ = lazy_attributes(__name__, {'CLEVR': '.clevr'}, ['.seq_to_seq'])
+
+    ``from package import *`` imports all the attributes, as ``__all__`` is computed on demand.
+
+    :param package: Name of the package (i.e. ``__name__``).
+    :type package: str
+
+    :param attributes: Attributes of the package, with the (relative) names of the modules defining them, \
+    e.g. ``{'CLEVR': '.clevr'}``.
+    :type attributes: dict
+
+    :param subpackages: (Relative) names of the subpackages whose attributes (i.e. their ``__all__``) are also \
+    exported by the package. If several subpackages export the same name, the last one takes precedence.
+    :type subpackages: list
+
+    :return: ``__getattr__``, ``__dir__`` functions.
+
+    """
+    subpackages = list(subpackages)
+
+    def __getattr__(name):
+        if name == '__all__':
+            value = list(attributes)
+            for subpackage in subpackages:
+                value += [n for n in importlib.import_module(subpackage, package).__all__ if n not in value]
+
+        elif name in attributes:
+            value = getattr(importlib.import_module(attributes[name], package), name)
+
+        elif '.' + name in subpackages:
+            value = importlib.import_module('.' + name, package)
+
+        else:
+            for subpackage in reversed(subpackages):
+                module = importlib.import_module(subpackage, package)
+                if name in module.__all__:
+                    value = getattr(module, name)
+                    break
+            else:
+                # submodule which was not imported yet (e.g. package.module.function).
+                try:
+                    value = importlib.import_module('.' + name, package)
+                except ModuleNotFoundError as e:
+                    if e.name != '{}.{}'.format(package, name):
+                        raise
+                    raise AttributeError("module '{}' has no attribute '{}'".format(package, name)) from None
+
+        # the next accesses do not go through __getattr__.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(__getattr__('__all__')))
+
+    return __getattr__, __dir__
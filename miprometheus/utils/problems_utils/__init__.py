@@ -1,4 +1,9 @@
-from .generate_feature_maps import GenerateFeatureMaps
-from .language import Language
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['GenerateFeatureMaps', 'Language']
\ No newline at end of file
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'GenerateFeatureMaps': '.generate_feature_maps',
+    'Language': '.language',
+    'bleu_statistics': '.bleu',
+    'sentence_bleu_scores': '.bleu',
+    'corpus_bleu_score': '.bleu'
+})
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+bleu.py: Vectorized computation of the BLEU score on batches of tensors of indexes.
+
+Reference paper: http://www.aclweb.org/anthology/P02-1040.pdf
+
+"""
+__author__ = "Vincent Marois"
+
+import math
+import torch
+
+
+def sequences_length(sequences, eos_token, pad_token):
+    """
+    Computes the length of each sequence of indexes, i.e. the position of the first EOS or PAD token.
+
+    :param sequences: Tensor of indexes, of shape [batch_size x max_length].
+
+    :param eos_token: Index of the EOS token.
+    :type eos_token: int
+
+    :param pad_token: Index of the PAD token.
+    :type pad_token: int
+
+    :return: Tensor of lengths, of shape [batch_size].
+
+    """
+    stop = (sequences == eos_token) | (sequences == pad_token)
+
+    # Tokens located before the first EOS / PAD token are valid.
+    return (torch.cumsum(stop.long(), dim=1) == 0).long().sum(dim=1)
+
+
+def hash_ngrams(sequences, n, base):
+    """
+    Hashes all the n-grams of the sequences of indexes into single integers.
+
+    :param sequences: Tensor of indexes, of shape [batch_size x max_length].
+
+    :param n: Order of the n-grams.
+    :type n: int
+
+    :param base: Base of the polynomial hash, i.e. an upper bound of the indexes.
+    :type base: int
+
+    :return: Tensor of hashes, of shape [batch_size x (max_length - n + 1)].
+
+    """
+    ngrams = sequences.long().unfold(1, n, 1)
+
+    # Polynomial hash: exact as long as base ** n fits in int64, wraps around otherwise (collisions are unlikely).
+    hashes = ngrams[:, :, 0]
+    for k in range(1, n):
+        hashes = hashes * base + ngrams[:, :, k]
+
+    return hashes
+
+
+def bleu_statistics(candidates, references, max_order=4, eos_token=2, pad_token=0):
+    """
+    Computes the statistics required by the BLEU score for a batch of (candidate, reference) pairs of sequences \
+    of indexes: number of clipped n-gram matches, number of candidate n-grams & lengths.
+
+    The sequences are truncated at their first EOS or PAD token.
+
+    The n-gram counts are computed by hashing the n-grams (using :py:func:`torch.Tensor.unfold`) and comparing \
+    all the pairs of n-grams at once, i.e. without any Python loop over the samples.
+
+    :param candidates: Tensor of predicted indexes, of shape [batch_size x max_candidate_length].
+
+    :param references: Tensor of reference indexes, of shape [batch_size x max_reference_length].
+
+    :param max_order: Maximum order of the n-grams (DEFAULT: 4).
+    :type max_order: int
+
+    :param eos_token: Index of the EOS token (DEFAULT: 2).
+    :type eos_token: int
+
+    :param pad_token: Index of the PAD token (DEFAULT: 0).
+    :type pad_token: int
+
+    :return: tuple (matches, ngrams, candidates_length, references_length): the two first of shape \
+    [batch_size x max_order], the two last of shape [batch_size].
+
+    """
+    batch_size = candidates.shape[0]
+
+    candidates_length = sequences_length(candidates, eos_token, pad_token)
+    references_length = sequences_length(references, eos_token, pad_token)
+
+    matches = torch.zeros(batch_size, max_order, dtype=torch.float, device=candidates.device)
+    ngrams = torch.zeros(batch_size, max_order, dtype=torch.float, device=candidates.device)
+
+    # Base of the n-grams hashes, shared by the candidates and the references.
+    base = max(int(candidates.max().item()) if candidates.numel() > 0 else 0,
+               int(references.max().item()) if references.numel() > 0 else 0) + 1
+
+    for n in range(1, max_order + 1):
+        # Number of n-grams in the candidates.
+        ngrams[:, n - 1] = torch.clamp(candidates_length - n + 1, min=0).float()
+
+        if candidates.shape[1] < n or references.shape[1] < n:
+            continue
+
+        cand_hashes = hash_ngrams(candidates, n, base)
+        ref_hashes = hash_ngrams(references, n, base)
+
+        # Mask the n-grams overlapping the EOS / PAD tokens.
+        cand_mask = torch.arange(cand_hashes.shape[1], device=candidates.device).unsqueeze(0) \
+            <= (candidates_length - n).unsqueeze(1)
+        ref_mask = torch.arange(ref_hashes.shape[1], device=references.device).unsqueeze(0) \
+            <= (references_length - n).unsqueeze(1)
+
+        # Count of each candidate n-gram in the candidate and in the reference: [batch_size x num_cand_ngrams].
+        cand_counts = ((cand_hashes.unsqueeze(2) == cand_hashes.unsqueeze(1)) & cand_mask.unsqueeze(1)).sum(dim=2)
+        ref_counts = ((cand_hashes.unsqueeze(2) == ref_hashes.unsqueeze(1)) & ref_mask.unsqueeze(1)).sum(dim=2)
+
+        # Each of the cand_count occurrences of a n-gram contributes min(cand_count, ref_count) / cand_count.
+        clipped = torch.min(cand_counts, ref_counts).float() / torch.clamp(cand_counts, min=1).float()
+        matches[:, n - 1] = torch.round((clipped * cand_mask.float()).sum(dim=1))
+
+    return matches, ngrams, candidates_length.float(), references_length.float()
+
+
+def sentence_bleu_scores(matches, ngrams, candidates_length, references_length, epsilon=0.1):
+    """
+    Computes the BLEU score of each pair of sentences from the statistics returned by :py:func:`bleu_statistics`.
+
+    Uses uniform weights and the smoothing ``method1`` of NLTK (``epsilon`` added to the null matches counts), \
+    so that the scores match :py:func:`nltk.translate.bleu_score.sentence_bleu`.
+
+    :param matches: Clipped n-gram matches, of shape [batch_size x max_order].
+
+    :param ngrams: Number of candidate n-grams, of shape [batch_size x max_order].
+
+    :param candidates_length: Candidates lengths, of shape [batch_size].
+
+    :param references_length: References lengths, of shape [batch_size].
+
+    :param epsilon: Smoothing constant (DEFAULT: 0.1).
+    :type epsilon: float
+
+    :return: Tensor of BLEU scores, of shape [batch_size].
+
+    """
+    # Smoothed modified precisions.
+    precisions = torch.where(matches > 0, matches, matches + epsilon) / torch.clamp(ngrams, min=1)
+    log_precisions = torch.log(precisions).mean(dim=1)
+
+    # Brevity penalty.
+    brevity_penalty = torch.where(candidates_length > references_length,
+                                  torch.ones_like(candidates_length),
+                                  torch.exp(1 - references_length / torch.clamp(candidates_length, min=1)))
+
+    scores = brevity_penalty * torch.exp(log_precisions)
+
+    # No unigram match (or empty candidate) -> score of 0.
+    return torch.where(matches[:, 0] > 0, scores, torch.zeros_like(scores))
+
+
+def corpus_bleu_score(matches, ngrams, candidates_length, references_length):
+    """
+    Computes the corpus-level BLEU score from the statistics accumulated over the whole corpus, i.e. the \
+    statistics returned by :py:func:`bleu_statistics` summed over the samples.
+
+    :param matches: Total clipped n-gram matches, for each order.
+    :type matches: list
+
+    :param ngrams: Total number of candidate n-grams, for each order.
+    :type ngrams: list
+
+    :param candidates_length: Total length of the candidates.
+    :type candidates_length: float
+
+    :param references_length: Total length of the references.
+    :type references_length: float
+
+    :return: corpus BLEU score ( 0 < BLEU < 1).
+
+    """
+    if min(matches) <= 0 or candidates_length <= 0:
+        return 0.0
+
+    log_precision = sum(math.log(m / n) for m, n in zip(matches, ngrams)) / len(matches)
+
+    if candidates_length > references_length:
+        brevity_penalty = 1.0
+    else:
+        brevity_penalty = math.exp(1 - references_length / candidates_length)
+
+    return brevity_penalty * math.exp(log_precision)
+
+
+if __name__ == '__main__':
+    """ Compares the vectorized BLEU scores with NLTK. """
+    from nltk.translate.bleu_score import sentence_bleu, corpus_bleu, SmoothingFunction
+
+    torch.manual_seed(0)
+    batch_size, vocab_size = 64, 12
+    candidates = torch.randint(3, vocab_size, (batch_size, 15), dtype=torch.long)
+    references = torch.randint(3, vocab_size, (batch_size, 12), dtype=torch.long)
+    # Add some EOS / padding.
+    candidates[::3, 10] = 2
+    references[::2, 8] = 2
+    references[::2, 9:] = 0
+
+    stats = bleu_statistics(candidates, references)
+    scores = sentence_bleu_scores(*stats)
+
+    # Truncated lists of indexes for NLTK.
+    cands = [c[:l].tolist() for c, l in zip(candidates, stats[2].long())]
+    refs = [r[:l].tolist() for r, l in zip(references, stats[3].long())]
+
+    for i in range(batch_size):
+        nltk_score = sentence_bleu([refs[i]], cands[i], smoothing_function=SmoothingFunction().method1)
+        assert abs(nltk_score - scores[i].item()) < 1e-4, (i, nltk_score, scores[i].item())
+
+    corpus = corpus_bleu_score(stats[0].sum(dim=0).tolist(), stats[1].sum(dim=0).tolist(),
+                               stats[2].sum().item(), stats[3].sum().item())
+    assert abs(corpus_bleu([[r] for r in refs], cands) - corpus) < 1e-4
+
+    print('Vectorized BLEU matches NLTK.')
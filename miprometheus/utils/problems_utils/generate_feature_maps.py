@@ -43,7 +43,8 @@
 generate_feature_maps.py: This file contains 1 class:
 
     - GenerateFeatureMaps: This class instantiates a specified pretrained CNN model to extract feature maps from\
-     images stored in the indicated directory. It also creates a DataLoader to generate batches of these images.
+     images stored in the indicated directory. It also creates a DataLoader to generate batches of these images,\
+     decoded & resized by parallel workers.
 
 This class is used in problems.image_text_to_class.CLEVR.generate_feature_maps_file.
 
@@ -55,7 +56,7 @@ from torchvision import transforms
 import torch
 from PIL import Image
 
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, DataLoader, Subset
 
 
 class GenerateFeatureMaps(Dataset):
@@ -63,7 +64,8 @@ class GenerateFeatureMaps(Dataset):
     Class handling the generation of feature using a pretrained CNN for specified images.
     """
 
-    def __init__(self, image_dir, cnn_model, num_blocks, filename_template, set='train', transform=transforms.ToTensor):
+    def __init__(self, image_dir, cnn_model, num_blocks, filename_template, set='train', transform=transforms.ToTensor,
+                 channels_last=False, bfloat16=False):
         """
         Creates the pretrained CNN model & move it to CUDA if available.
 
@@ -93,6 +95,13 @@ class GenerateFeatureMaps(Dataset):
 
         :type transform: transforms, optional.
 
+        :param channels_last: Whether to run the CNN model in the ``channels_last`` memory format (faster \
+        convolutions on recent CPUs & GPUs).
+        :type channels_last: bool, optional.
+
+        :param bfloat16: Whether to run the CNN model in ``bfloat16`` (using autocast) when on CPU.
+        :type bfloat16: bool, optional.
+
         """
         # call base constructor
         super(GenerateFeatureMaps, self).__init__()
@@ -104,6 +113,8 @@ class GenerateFeatureMaps(Dataset):
         self.num_blocks = num_blocks
         self.transform = transform
         self.filename_template = filename_template
+        self.channels_last = channels_last
+        self.bfloat16 = bfloat16
 
         # Get specified pretrained cnn model
         cnn = getattr(torchvision.models, self.cnn_model)(pretrained=True)
@@ -125,9 +136,13 @@ class GenerateFeatureMaps(Dataset):
         self.model = torch.nn.Sequential(*layers)
 
         # move it to CUDA & specify evaluation behavior
-        self.model.cuda() if torch.cuda.is_available() else None
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.model.to(self.device)
         self.model.eval()
 
+        if self.channels_last:
+            self.model.to(memory_format=torch.channels_last)
+
         # set the dataset size as the numbers of images in the folder
         self.length = len(os.listdir(os.path.expanduser(self.image_dir)))
 
@@ -152,3 +167,59 @@ class GenerateFeatureMaps(Dataset):
         :return: length of dataset.
         """
         return self.length
+
+    def __getstate__(self):
+        """
+        Excludes the CNN model from pickling: the DataLoader workers only decode & transform the images.
+
+        """
+        state = self.__dict__.copy()
+        state['model'] = None
+        return state
+
+    def extract(self, images):
+        """
+        Passes a batch of images through the pretrained CNN model.
+
+        :param images: batch of transformed images, of shape [batch_size x 3 x H x W].
+        :type images: torch.Tensor
+
+        :return: feature maps as a ``float32`` tensor on CPU.
+
+        """
+        images = images.to(self.device, non_blocking=True)
+        if self.channels_last:
+            images = images.contiguous(memory_format=torch.channels_last)
+
+        with torch.no_grad(), torch.autocast(device_type='cpu', dtype=torch.bfloat16,
+                                             enabled=self.bfloat16 and self.device.type == 'cpu'):
+            features = self.model(images)
+
+        return features.float().contiguous().cpu()
+
+    def batches(self, indices, batch_size=64, num_workers=0):
+        """
+        Generator extracting the feature maps of the specified images by batches.
+
+        The images are decoded & transformed by ``num_workers`` DataLoader workers, while the CNN model processes \
+        the previous batches.
+
+        :param indices: indices of the images to process, in order.
+        :type indices: list
+
+        :param batch_size: number of images per batch.
+        :type batch_size: int
+
+        :param num_workers: number of DataLoader workers.
+        :type num_workers: int
+
+        :return: tuples (indices of the batch, feature maps of the batch as a ``np.ndarray``).
+
+        """
+        dataloader = DataLoader(Subset(self, indices), batch_size=batch_size, shuffle=False,
+                                num_workers=num_workers, pin_memory=self.device.type == 'cuda')
+
+        position = 0
+        for images in dataloader:
+            yield indices[position:position + len(images)], self.extract(images).numpy()
+            position += len(images)
@@ -44,7 +44,10 @@ __author__ = "Vincent Marois, Ryan L. McAvoy"
 
 """
 
+import os
 import torch
+import hashlib
+import numpy as np
 from collections import Counter, OrderedDict
 from torchtext import vocab
 
@@ -100,6 +103,16 @@ class Language(object):
         index = self.vocab.stoi[word]
         return self.vocab.vectors[index]
 
+    def tokenize_sentence(self, sentence):
+        """
+        Converts a sentence into the indices of its words in the vocab.
+
+        :param sentence: A string containing the words to convert.
+        :returns: list of indices (the index of ``self.unk_token`` for unknown words).
+
+        """
+        return [self.vocab.stoi[word] for word in sentence.split()]
+
     def return_index_from_word(self, word):
         """
         returns the index of a word in the vocab.
@@ -119,12 +132,14 @@ class Language(object):
 
         return self.vocab.itos[index]
 
-    def build_pretrained_vocab(self, data_set, **kwargs):
+    def build_pretrained_vocab(self, data_set, cache_folder=None, **kwargs):
         """
         Construct the torchtext Vocab object from a list of sentences. This
         allows us to load only vectors we actually need.
 
         :param data_set: A list containing strings (either sentences or just single word string work)
+        :param cache_folder: Folder in which the vectors of the vocab are cached (cf. :py:func:`load_vectors`). \
+        Default: ``None`` (no cache).
         :param \**kwargs: The keyword arguments for the vectors class from torch text. The most important kwarg is vectors which is a string containing the embedding type to be loaded
 
         """
@@ -140,8 +155,51 @@ class Language(object):
             tok for tok in [self.unk_token, self.pad_token, self.init_token,
                             self.eos_token]
             if tok is not None))
+        # the vectors are loaded once the vocab is known.
+        vectors = kwargs.pop('vectors', None)
+        unk_init = kwargs.pop('unk_init', None)
+        vectors_cache = kwargs.pop('vectors_cache', None)
         self.vocab = self.vocab_cls(counter, specials=specials, **kwargs)
 
+        if vectors is not None:
+            self.load_vectors(vectors, cache_folder, unk_init=unk_init, vectors_cache=vectors_cache)
+
+    def load_vectors(self, vectors, cache_folder=None, unk_init=None, vectors_cache=None):
+        """
+        Loads the pretrained vectors of the words of the vocab.
+
+        The full vectors files are only read on the first run: the vectors of the vocab are then saved in \
+        ``cache_folder``, in a ``.npy`` file indexed by the embedding type & a hash of the vocab, and memory-mapped \
+        on the next runs.
+
+        :param vectors: The embedding type to load (e.g. 'glove.6B.300d').
+        :param cache_folder: Folder in which the vectors of the vocab are cached. Default: ``None`` (no cache).
+        :param unk_init: Initialization of the vectors of the unknown words (DEFAULT: zeros).
+        :param vectors_cache: Folder of the full vectors files (DEFAULT: torchtext's '.vector_cache').
+
+        """
+        cache_file = None
+        if cache_folder is not None and isinstance(vectors, str):
+            vocab_hash = hashlib.sha1('\n'.join(self.vocab.itos).encode('utf-8')).hexdigest()[:16]
+            cache_file = os.path.join(os.path.expanduser(cache_folder), '{}_{}_vectors.npy'.format(vectors, vocab_hash))
+
+            if os.path.isfile(cache_file):
+                # copy-on-write mapping: the file is not modified.
+                self.vocab.vectors = torch.from_numpy(np.load(cache_file, mmap_mode='c'))
+                return
+
+        kwargs = {'unk_init': unk_init}
+        if vectors_cache is not None:
+            kwargs['cache'] = vectors_cache
+        self.vocab.load_vectors(vectors, **kwargs)
+
+        if cache_file is not None:
+            # write to a temporary file first, so that concurrent runs never read a partial file.
+            tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+            with open(tmp_file, 'wb') as f:
+                np.save(f, self.vocab.vectors.numpy())
+            os.replace(tmp_file, cache_file)
+
 
 """
 The names of the classes available in torchtext vocab for reference
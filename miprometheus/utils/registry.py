@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) IBM Corporation 2018
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+registry.py:
+
+    - Contains the functions mapping the names of the problems & models (as indicated in the configuration files) \
+    to their classes, used by :py:class:`miprometheus.problems.ProblemFactory` & \
+    :py:class:`miprometheus.models.ModelFactory`.
+
+    A name is resolved, in this order, as:
+
+        - a class bundled with ``miprometheus`` (e.g. ``MACNetwork``): only its module is imported (cf. \
+        :py:func:`miprometheus.utils.lazy_import.lazy_attributes`),
+        - a class registered by another package through an entry point of the ``miprometheus.problems`` or \
+        ``miprometheus.models`` groups, e.g. in its ``setup.py``:
+
+            >>> entry_points={'miprometheus.models': ['MyModel = my_package.my_model:MyModel']}
+
+        - the import path of a class, e.g. ``my_package.my_model.MyModel``.
+
+"""
+__author__ = "Tomasz Kornuta"
+
+import importlib
+
+PROBLEMS_GROUP = 'miprometheus.problems'
+MODELS_GROUP = 'miprometheus.models'
+
+# entry points of the installed packages, indexed by group.
+_entry_points = {}
+
+
+def entry_points(group):
+    """
+    Returns the entry points of a group, declared by the installed packages.
+
+    :param group: Name of the group (e.g. ``miprometheus.models``).
+    :type group: str
+
+    :return: dict ``{name: 'module:attribute'}``.
+
+    """
+    if group not in _entry_points:
+        try:
+            from importlib import metadata
+            eps = metadata.entry_points()
+            eps = eps.select(group=group) if hasattr(eps, 'select') else eps.get(group, [])
+            _entry_points[group] = {ep.name: ep.value for ep in eps}
+        except ImportError:
+            # python 3.7
+            import pkg_resources
+            _entry_points[group] = {ep.name: '{}:{}'.format(ep.module_name, '.'.join(ep.attrs))
+                                    for ep in pkg_resources.iter_entry_points(group)}
+
+    return _entry_points[group]
+
+
+def load(path):
+    """
+    Imports an attribute from its path.
+
+    :param path: ``module:attribute`` or ``module.attribute``.
+    :type path: str
+
+    :return: the attribute.
+
+    """
+    if ':' in path:
+        module, attribute = path.split(':', 1)
+    else:
+        module, attribute = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module), attribute)
+
+
+def resolve(name, package, group):
+    """
+    Returns the class corresponding to a name, importing only the module defining it.
+
+    :param name: Name of the class (bundled or registered through an entry point) or its import path.
+    :type name: str
+
+    :param package: Package containing the bundled classes (e.g. ``miprometheus.models``).
+    :type package: module
+
+    :param group: Group of the entry points (e.g. ``miprometheus.models``).
+    :type group: str
+
+    :return: The class, or ``None`` if not found.
+
+    """
+    if '.' not in name and ':' not in name:
+        # bundled class.
+        try:
+            return getattr(package, name)
+        except AttributeError:
+            pass
+
+        # class registered by another package.
+        registered = entry_points(group)
+        if name in registered:
+            return load(registered[name])
+        return None
+
+    try:
+        return load(name)
+    except ModuleNotFoundError as e:
+        # errors raised by the imported module itself are not hidden.
+        if not name.replace(':', '.').startswith(str(e.name)):
+            raise
+        return None
+    except AttributeError:
+        return None
@@ -1,8 +1,10 @@
-# Base workers.
-from .worker import Worker
-from .trainer import Trainer
-from .offline_trainer import OfflineTrainer
-from .online_trainer import OnlineTrainer
-from .tester import Tester
+from miprometheus.utils.lazy_import import lazy_attributes
 
-__all__ = ['Worker', 'Trainer', 'OfflineTrainer', 'OnlineTrainer', 'Tester']
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    # Base workers.
+    'Worker': '.worker',
+    'Trainer': '.trainer',
+    'OfflineTrainer': '.offline_trainer',
+    'OnlineTrainer': '.online_trainer',
+    'Tester': '.tester'
+})
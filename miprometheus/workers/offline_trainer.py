@@ -198,8 +198,9 @@ class OfflineTrainer(Trainer):
                     self.model.train()
 
                     # 1. Perform forward step, get predictions and compute loss.
-                    logits, loss = self.predict_evaluate_collect(self.model, self.training_problem, 
-                                                                 training_dict, self.training_stat_col, episode, epoch)
+                    logits, loss, training_dict = self.predict_evaluate_collect(self.model, self.training_problem,
+                                                                                training_dict, self.training_stat_col,
+                                                                                episode, epoch)
 
                     # 2. Backward gradient flow.
                     loss.backward()
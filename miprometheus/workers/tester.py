@@ -219,6 +219,9 @@ class Tester(Worker):
         # Create model object.
         self.model = ModelFactory.build(self.params['model'], self.problem.default_values)
 
+        # Fail fast if the model cannot process the batches of the problem.
+        self.check_unique_images_support(self.problem, self.model, 'testing')
+
         # Load the pretrained model from checkpoint.
         try: 
             model_name = self.flags.model
@@ -319,8 +322,8 @@ class Tester(Worker):
                         break
 
                     # Evaluate model on a given batch.
-                    logits, _ = self.predict_evaluate_collect(self.model, self.problem, 
-                                                              test_dict, self.testing_stat_col, episode)
+                    logits, _, test_dict = self.predict_evaluate_collect(self.model, self.problem,
+                                                                         test_dict, self.testing_stat_col, episode)
 
                     # Export to csv - at every step.
                     self.testing_stat_col.export_to_csv()
@@ -252,6 +252,10 @@ class Trainer(Worker):
         # Build the model using the loaded configuration and the default values of the problem.
         self.model = ModelFactory.build(self.params['model'], self.training_problem.default_values)
 
+        # Fail fast if the model cannot process the batches of the problems.
+        self.check_unique_images_support(self.training_problem, self.model, 'training')
+        self.check_unique_images_support(self.validation_problem, self.model, 'validation')
+
         # Load the pretrained model from checkpoint.
         try: 
             # Check command line arguments, then check load option in config.
@@ -442,9 +446,10 @@ class Trainer(Worker):
 
         # Compute the validation loss using the provided data batch.
         with torch.no_grad():
-            valid_logits, valid_loss = self.predict_evaluate_collect(self.model, self.validation_problem,
-                                                                     valid_batch, self.validation_stat_col,
-                                                                     episode, epoch)
+            valid_logits, valid_loss, valid_batch = self.predict_evaluate_collect(self.model,
+                                                                                  self.validation_problem,
+                                                                                  valid_batch, self.validation_stat_col,
+                                                                                  episode, epoch)
 
         # Export  collected statistics.
         self.export_statistics(self.validation_stat_col, '[Partial Validation]')
@@ -502,8 +507,9 @@ class Trainer(Worker):
         with torch.no_grad():
             for ep, valid_batch in enumerate(self.validation_dataloader):
                 # 1. Perform forward step, get predictions and compute loss.
-                valid_logits, _ = self.predict_evaluate_collect(self.model, self.validation_problem, valid_batch,
-                                                                self.validation_stat_col, ep, epoch)
+                valid_logits, _, valid_batch = self.predict_evaluate_collect(self.model, self.validation_problem,
+                                                                             valid_batch, self.validation_stat_col,
+                                                                             ep, epoch)
 
                 # 2.Visualization of validation for the randomly selected batch
                 if self.app_state.visualize and ep == vis_index:
@@ -280,36 +280,73 @@ class Worker(object):
         if sampler is not None:
             # Set shuffle to False - REQUIRED as those two are exclusive.
             params['dataloader'].add_config_params({'shuffle': False})
-
-        # build the DataLoader on top of the validation problem
-        loader = DataLoader(dataset=problem,
-                            batch_size=params['problem']['batch_size'],
-                            shuffle=params['dataloader']['shuffle'],
-                            sampler=sampler,
-                            batch_sampler=params['dataloader']['batch_sampler'],
-                            num_workers=params['dataloader']['num_workers'],
-                            collate_fn=problem.collate_fn,
-                            pin_memory=params['dataloader']['pin_memory'],
-                            drop_last=params['dataloader']['drop_last'],
-                            timeout=params['dataloader']['timeout'],
-                            worker_init_fn=problem.worker_init_fn)
+            batch_sampler = None
+        else:
+            # Try to get the batch sampler of the problem (e.g. batches of variable size).
+            batch_sampler = problem.get_batch_sampler(params['dataloader']['shuffle'])
+
+        if batch_sampler is not None:
+            # Batch sampler is mutually exclusive with batch_size, shuffle, sampler and drop_last.
+            params['dataloader'].add_config_params({'shuffle': False, 'drop_last': False})
+
+            # build the DataLoader on top of the problem, using its batch sampler
+            loader = DataLoader(dataset=problem,
+                                batch_sampler=batch_sampler,
+                                num_workers=params['dataloader']['num_workers'],
+                                collate_fn=problem.collate_fn,
+                                pin_memory=params['dataloader']['pin_memory'],
+                                timeout=params['dataloader']['timeout'],
+                                worker_init_fn=problem.worker_init_fn)
+        else:
+            # build the DataLoader on top of the problem
+            loader = DataLoader(dataset=problem,
+                                batch_size=params['problem']['batch_size'],
+                                shuffle=params['dataloader']['shuffle'],
+                                sampler=sampler,
+                                batch_sampler=params['dataloader']['batch_sampler'],
+                                num_workers=params['dataloader']['num_workers'],
+                                collate_fn=problem.collate_fn,
+                                pin_memory=params['dataloader']['pin_memory'],
+                                drop_last=params['dataloader']['drop_last'],
+                                timeout=params['dataloader']['timeout'],
+                                worker_init_fn=problem.worker_init_fn)
 
         # Display sizes.
         self.logger.info("Problem for '{}' loaded (size: {})".format(section_name, len(problem)))
         if (sampler is not None):
             self.logger.info("Sampler for '{}' created (size: {})".format(section_name, len(sampler)))
+        if (batch_sampler is not None):
+            self.logger.info("Batch sampler for '{}' created (number of batches: {})".format(
+                section_name, len(batch_sampler)))
 
 
         # Return sampler - even if it is none :]
         return problem, sampler, loader
 
 
-    def get_epoch_size(self, problem, sampler, batch_size, drop_last):
+    def check_unique_images_support(self, problem, model, section_name):
+        """
+        Checks that the model accepts the batches of the problem when it keeps only the unique images of each \
+        batch (cf. :py:attr:`miprometheus.models.Model.supports_unique_images`), otherwise exits.
+
+        :param problem: Problem instance.
+
+        :param model: Model instance.
+
+        :param section_name: name of the section that will be used by logger for display.
+
+        """
+        if getattr(problem, 'unique_images', False) and not model.supports_unique_images:
+            self.logger.error("Model '{}' does not support the 'unique_images' option of the problem for '{}': "
+                              "please disable it".format(type(model).__name__, section_name))
+            exit(-7)
+
+    def get_epoch_size(self, problem, sampler, batch_size, drop_last, batch_sampler=None):
         """
         Compute the number of iterations ('episodes') to run given the size of the dataset and the batch size to cover
         the entire dataset once.
 
-        Takes into account whether one used sampler or not.
+        Takes into account whether one used sampler (or batch sampler) or not.
 
         :param problem: Object derived from the ''Problem'' class
 
@@ -321,6 +358,9 @@ class Worker(object):
         :param drop_last: If True then last batch (if incomplete) will not be counted
         :type drop_last: bool
 
+        :param batch_sampler: Batch sampler (may be None). If set, batches are of variable size and the epoch size \
+        is the number of batches it yields.
+
         .. note::
 
             If the last batch is incomplete we are counting it in when ``drop_last`` in ``DataLoader()`` is set to Ttrue.
@@ -332,6 +372,10 @@ class Worker(object):
         :return: Number of iterations to perform to go though the entire dataset once.
 
         """
+        # Batches of variable size: the batch sampler knows how many there are.
+        if (batch_sampler is not None):
+            return len(batch_sampler)
+
         # "Estimate" dataset size.
         if (sampler is not None):
             problem_size = len(sampler)
@@ -443,7 +487,13 @@ class Worker(object):
         loss_values = stat_col['loss']
 
         # Calculate default aggregates.
-        stat_agg.aggregators['loss'] = torch.mean(torch.tensor(loss_values))
+        if len(stat_col.get('batch_size', [])) == len(loss_values):
+            # Batch sizes collected by the problem: weight the loss of each batch by its size (the batch size
+            # might vary e.g. when using dynamic batching).
+            batch_sizes = torch.tensor(stat_col['batch_size'], dtype=torch.float)
+            stat_agg.aggregators['loss'] = torch.sum(torch.tensor(loss_values) * batch_sizes) / torch.sum(batch_sizes)
+        else:
+            stat_agg.aggregators['loss'] = torch.mean(torch.tensor(loss_values))
         stat_agg.aggregators['loss_min'] = min(loss_values)
         stat_agg.aggregators['loss_max'] = max(loss_values)
         stat_agg.aggregators['loss_std'] = 0.0 if len(loss_values) <= 1 else torch.std(torch.tensor(loss_values))
@@ -604,7 +654,9 @@ class Worker(object):
         :return:
 
             - logits,
-            - loss
+            - loss,
+            - data_dict, converted to CUDA & transformed by the batch transforms of the problem (to be used for \
+            the visualization).
 
 
         """
@@ -612,6 +664,9 @@ class Worker(object):
         if self.app_state.use_CUDA:
             data_dict = data_dict.cuda()
 
+        # Apply the batch transforms of the problem (on the training device).
+        data_dict = problem.transform_batch(data_dict)
+
         # Perform forward calculation.
         logits = model(data_dict)
 
@@ -630,8 +685,8 @@ class Worker(object):
         problem.collect_statistics(stat_col, data_dict, logits)
         model.collect_statistics(stat_col, data_dict, logits)
 
-        # Return tuple: logits, loss.
-        return logits, loss
+        # Return tuple: logits, loss, transformed batch.
+        return logits, loss, data_dict
 
     def export_statistics(self, stat_obj, tag='', export_to_log = True):
         """
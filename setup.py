@@ -119,7 +119,7 @@ setup(
         # 'Programming Language :: Python :: 3',
         # 'Programming Language :: Python :: 3.4',
         # 'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
 
         'Operating System :: Linux',
         'Topic :: Scientific/Engineering :: Artificial Intelligence'
@@ -146,7 +146,7 @@ setup(
     # Any package you put here will be installed by pip when your project is
     # installed, so they must be valid existing projects.
     #
-    python_requires='~=3.6',
+    python_requires='>=3.7',  # lazy imports of the packages (PEP 562)
     # For an analysis of "install_requires" vs pip's requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
     # Should not pin down version